@@ -0,0 +1,72 @@
+"""Restaurant-scoped unique row hash on transaction_items
+
+Adds transaction_items.restaurant_id (backfilled from transactions) and a
+unique (restaurant_id, source_hash) index so row-level deduplication can be
+enforced by the database with INSERT ... ON CONFLICT DO NOTHING.
+
+Revision ID: 014_item_hash_dedup
+Revises: 558c88a5498e
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = '014_item_hash_dedup'
+down_revision: Union[str, None] = '558c88a5498e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'transaction_items',
+        sa.Column(
+            'restaurant_id',
+            UUID(as_uuid=True),
+            sa.ForeignKey('restaurants.id', ondelete='CASCADE'),
+            nullable=True
+        )
+    )
+
+    # Backfill from the parent transaction
+    op.execute("""
+        UPDATE transaction_items ti
+        SET restaurant_id = t.restaurant_id
+        FROM transactions t
+        WHERE ti.transaction_id = t.id
+    """)
+
+    # Keep the oldest copy of any hash that slipped in twice, so the
+    # unique index can be built; the other copies keep their data but
+    # no longer take part in dedup
+    op.execute("""
+        UPDATE transaction_items
+        SET source_hash = NULL
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY restaurant_id, source_hash
+                    ORDER BY created_at, id
+                ) AS rn
+                FROM transaction_items
+                WHERE source_hash IS NOT NULL
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+
+    op.create_index(
+        'uq_transaction_items_restaurant_hash',
+        'transaction_items',
+        ['restaurant_id', 'source_hash'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_transaction_items_restaurant_hash', table_name='transaction_items')
+    op.drop_column('transaction_items', 'restaurant_id')
@@ -0,0 +1,31 @@
+"""Row-level progress counters on data_uploads
+
+Background upload jobs update these while ingesting so clients can poll
+GET /api/data/uploads/{id} for live progress.
+
+Revision ID: 015_upload_progress
+Revises: 014_item_hash_dedup
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '015_upload_progress'
+down_revision: Union[str, None] = '014_item_hash_dedup'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('data_uploads', sa.Column('rows_processed', sa.Integer, server_default='0', nullable=False))
+    op.add_column('data_uploads', sa.Column('rows_inserted', sa.Integer, server_default='0', nullable=False))
+    op.add_column('data_uploads', sa.Column('rows_failed', sa.Integer, server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('data_uploads', 'rows_failed')
+    op.drop_column('data_uploads', 'rows_inserted')
+    op.drop_column('data_uploads', 'rows_processed')
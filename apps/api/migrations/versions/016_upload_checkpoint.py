@@ -0,0 +1,30 @@
+"""Ingestion checkpoint on data_uploads
+
+Large uploads commit in durable batches; the last committed CSV row and
+the counters at that point let a failed upload resume instead of being
+re-ingested from scratch.
+
+Revision ID: 016_upload_checkpoint
+Revises: 015_upload_progress
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '016_upload_checkpoint'
+down_revision: Union[str, None] = '015_upload_progress'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('data_uploads', sa.Column('checkpoint_row', sa.Integer, server_default='0', nullable=False))
+    op.add_column('data_uploads', sa.Column('checkpoint', sa.JSON, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('data_uploads', 'checkpoint')
+    op.drop_column('data_uploads', 'checkpoint_row')
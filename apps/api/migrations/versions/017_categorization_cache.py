@@ -0,0 +1,35 @@
+"""Shared cache of LLM menu item categorizations
+
+Categorization results are keyed by normalized item name and shared
+across restaurants, so repeated names never hit the LLM twice.
+
+Revision ID: 017_categorization_cache
+Revises: 016_upload_checkpoint
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '017_categorization_cache'
+down_revision: Union[str, None] = '016_upload_checkpoint'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'menu_categorization_cache',
+        sa.Column('normalized_name', sa.String(255), primary_key=True),
+        sa.Column('category_path', sa.String(255), nullable=False),
+        sa.Column('confidence', sa.Numeric(3, 2), nullable=True),
+        sa.Column('reasoning', sa.Text, nullable=True),
+        sa.Column('created_at', sa.DateTime, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime, server_default=sa.text('now()')),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('menu_categorization_cache')
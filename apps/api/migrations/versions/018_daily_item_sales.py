@@ -0,0 +1,52 @@
+"""Daily per-item sales rollup
+
+Pre-aggregated (restaurant, business date, item) sales maintained at
+ingest time, so analytics no longer GROUP BY over transaction_items.
+Existing data is filled with scripts/daily_item_sales.py.
+
+Revision ID: 018_daily_item_sales
+Revises: 017_categorization_cache
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = '018_daily_item_sales'
+down_revision: Union[str, None] = '017_categorization_cache'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_item_sales',
+        sa.Column('restaurant_id', UUID(as_uuid=True),
+                  sa.ForeignKey('restaurants.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('business_date', sa.Date, primary_key=True),
+        sa.Column('menu_item_name', sa.String, primary_key=True),
+        sa.Column('quantity', sa.Integer, nullable=False),
+        sa.Column('revenue', sa.Numeric(12, 2), nullable=False),
+        sa.Column('line_count', sa.Integer, nullable=False),
+        sa.Column('avg_price', sa.Numeric(12, 4), nullable=False),
+        sa.Column('min_price', sa.Numeric(10, 2), nullable=False),
+        sa.Column('max_price', sa.Numeric(10, 2), nullable=False),
+        sa.Column('is_promo', sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column('stockout_occurred', sa.Boolean, nullable=True),
+        sa.Column('first_order_time', sa.Time, nullable=True),
+        sa.Column('last_order_time', sa.Time, nullable=True),
+        sa.Column('updated_at', sa.DateTime, server_default=sa.text('now()')),
+    )
+    op.create_index(
+        'idx_daily_item_sales_item_date',
+        'daily_item_sales',
+        ['restaurant_id', 'menu_item_name', 'business_date']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_daily_item_sales_item_date', table_name='daily_item_sales')
+    op.drop_table('daily_item_sales')
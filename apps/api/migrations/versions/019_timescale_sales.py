@@ -0,0 +1,123 @@
+"""Optional TimescaleDB storage for the daily sales rollup
+
+When the timescaledb extension is available (docker-compose runs the
+timescale/timescaledb image), daily_item_sales becomes a hypertable
+partitioned by business date in monthly chunks, chunks older than
+COMPRESS_AFTER are compressed, and a weekly_item_sales continuous
+aggregate is maintained on top of it. On plain PostgreSQL this
+migration does nothing and services aggregate weeks on the fly.
+
+The raw transactions/transaction_items tables stay regular tables:
+transaction_items references transactions by id alone, which a
+hypertable partitioned by date cannot provide a unique key for.
+
+Revision ID: 019_timescale_sales
+Revises: 018_daily_item_sales
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '019_timescale_sales'
+down_revision: Union[str, None] = '018_daily_item_sales'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_INTERVAL = "1 month"
+COMPRESS_AFTER = "180 days"
+
+
+def _timescale_available() -> bool:
+    return op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb'"
+    )).first() is not None
+
+
+def _timescale_installed() -> bool:
+    return op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'"
+    )).first() is not None
+
+
+def upgrade() -> None:
+    if not _timescale_available():
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+
+    op.execute(f"""
+        SELECT create_hypertable(
+            'daily_item_sales', 'business_date',
+            chunk_time_interval => INTERVAL '{CHUNK_INTERVAL}',
+            migrate_data => true,
+            if_not_exists => true
+        )
+    """)
+
+    # Per-item series compress well and stay cheap to scan by item
+    op.execute("""
+        ALTER TABLE daily_item_sales SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'restaurant_id, menu_item_name',
+            timescaledb.compress_orderby = 'business_date'
+        )
+    """)
+    op.execute(f"SELECT add_compression_policy('daily_item_sales', INTERVAL '{COMPRESS_AFTER}', if_not_exists => true)")
+
+    # Real-time aggregate: weeks not yet materialized are computed from the hypertable
+    op.execute("""
+        CREATE MATERIALIZED VIEW weekly_item_sales
+        WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+        SELECT
+            restaurant_id,
+            menu_item_name,
+            time_bucket(INTERVAL '1 week', business_date) AS week_start,
+            sum(quantity) AS quantity,
+            sum(revenue) AS revenue,
+            sum(line_count) AS line_count,
+            count(*) AS active_days,
+            min(min_price) AS min_price,
+            max(max_price) AS max_price,
+            bool_or(is_promo) AS is_promo
+        FROM daily_item_sales
+        GROUP BY restaurant_id, menu_item_name, week_start
+        WITH NO DATA
+    """)
+    op.execute("""
+        SELECT add_continuous_aggregate_policy(
+            'weekly_item_sales',
+            start_offset => NULL,
+            end_offset => INTERVAL '1 day',
+            schedule_interval => INTERVAL '1 hour'
+        )
+    """)
+
+
+def downgrade() -> None:
+    if not _timescale_installed():
+        return
+
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS weekly_item_sales")
+    op.execute("SELECT remove_compression_policy('daily_item_sales', if_exists => true)")
+
+    # Hypertables cannot be converted back in place - copy into a plain table
+    op.execute("CREATE TABLE daily_item_sales_plain (LIKE daily_item_sales INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO daily_item_sales_plain SELECT * FROM daily_item_sales")
+    op.execute("DROP TABLE daily_item_sales")
+    op.execute("ALTER TABLE daily_item_sales_plain RENAME TO daily_item_sales")
+    op.create_primary_key(
+        'daily_item_sales_pkey', 'daily_item_sales',
+        ['restaurant_id', 'business_date', 'menu_item_name']
+    )
+    op.create_foreign_key(
+        'daily_item_sales_restaurant_id_fkey', 'daily_item_sales', 'restaurants',
+        ['restaurant_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index(
+        'idx_daily_item_sales_item_date',
+        'daily_item_sales',
+        ['restaurant_id', 'menu_item_name', 'business_date']
+    )
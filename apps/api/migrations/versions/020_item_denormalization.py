@@ -0,0 +1,86 @@
+"""Denormalize business date and menu item onto transaction_items
+
+Adds transaction_items.business_date (copied from the parent transaction)
+and a menu_item_id FK resolved from the item name, makes restaurant_id and
+business_date NOT NULL, and adds covering indexes so per-item and per-date
+scans no longer join transactions just to filter:
+- (restaurant_id, menu_item_id, business_date) INCLUDE quantity/price/total
+- (restaurant_id, business_date, menu_item_name) INCLUDE the same plus
+  transaction_id, which the daily_item_sales refresh reads
+
+Revision ID: 020_item_denormalization
+Revises: 019_timescale_sales
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = '020_item_denormalization'
+down_revision: Union[str, None] = '019_timescale_sales'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('transaction_items', sa.Column('business_date', sa.Date, nullable=True))
+    op.add_column(
+        'transaction_items',
+        sa.Column(
+            'menu_item_id',
+            UUID(as_uuid=True),
+            sa.ForeignKey('menu_items.id', ondelete='SET NULL'),
+            nullable=True
+        )
+    )
+
+    # Backfill from the parent transaction (restaurant_id too, for rows
+    # written before 014 or by scripts that left it empty)
+    op.execute("""
+        UPDATE transaction_items ti
+        SET business_date = t.transaction_date,
+            restaurant_id = t.restaurant_id
+        FROM transactions t
+        WHERE ti.transaction_id = t.id
+    """)
+
+    # Link names to menu items case-insensitively; with several candidates
+    # the oldest item wins, as the ingestion resolver would pick it first
+    op.execute("""
+        UPDATE transaction_items ti
+        SET menu_item_id = mi.id
+        FROM (
+            SELECT DISTINCT ON (restaurant_id, lower(name)) id, restaurant_id, lower(name) AS name_key
+            FROM menu_items
+            ORDER BY restaurant_id, lower(name), created_at, id
+        ) mi
+        WHERE mi.restaurant_id = ti.restaurant_id
+          AND mi.name_key = lower(ti.menu_item_name)
+    """)
+
+    op.alter_column('transaction_items', 'restaurant_id', nullable=False)
+    op.alter_column('transaction_items', 'business_date', nullable=False)
+
+    op.create_index(
+        'idx_transaction_items_restaurant_item_date',
+        'transaction_items',
+        ['restaurant_id', 'menu_item_id', 'business_date'],
+        postgresql_include=['quantity', 'unit_price', 'total']
+    )
+    op.create_index(
+        'idx_transaction_items_restaurant_date_name',
+        'transaction_items',
+        ['restaurant_id', 'business_date', 'menu_item_name'],
+        postgresql_include=['quantity', 'unit_price', 'total', 'transaction_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_transaction_items_restaurant_date_name', table_name='transaction_items')
+    op.drop_index('idx_transaction_items_restaurant_item_date', table_name='transaction_items')
+    op.alter_column('transaction_items', 'restaurant_id', nullable=True)
+    op.drop_column('transaction_items', 'menu_item_id')
+    op.drop_column('transaction_items', 'business_date')
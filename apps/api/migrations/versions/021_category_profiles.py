@@ -0,0 +1,46 @@
+"""Add category_profiles for cached seasonality and prior aggregates
+
+One row per (restaurant, category context) holding the per-weekday sales
+totals and item-day sample count/sum that forecast seasonality and Gamma
+priors are derived from. Rows are recomputed daily and deleted when the
+restaurant's daily_item_sales rows are refreshed.
+
+Revision ID: 021_category_profiles
+Revises: 020_item_denormalization
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = '021_category_profiles'
+down_revision: Union[str, None] = '020_item_denormalization'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'category_profiles',
+        sa.Column(
+            'restaurant_id',
+            UUID(as_uuid=True),
+            sa.ForeignKey('restaurants.id', ondelete='CASCADE'),
+            primary_key=True
+        ),
+        sa.Column('category', sa.String, primary_key=True),
+        sa.Column('as_of', sa.Date, nullable=False),
+        sa.Column('window_days', sa.Integer, nullable=False),
+        sa.Column('dow_dates', sa.JSON, nullable=False),
+        sa.Column('dow_quantity', sa.JSON, nullable=False),
+        sa.Column('sample_count', sa.Integer, nullable=False),
+        sa.Column('sample_sum', sa.Float, nullable=False),
+        sa.Column('computed_at', sa.DateTime, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('category_profiles')
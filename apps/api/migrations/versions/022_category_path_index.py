@@ -0,0 +1,33 @@
+"""Index menu_items.category_path for category subtree scans
+
+Forecast category profiles select a restaurant's items in a category and
+its subcategories with category_path = 'Entrees' OR category_path LIKE
+'Entrees > %'. varchar_pattern_ops lets the btree serve those prefix
+LIKEs under any database collation.
+
+Revision ID: 022_category_path_index
+Revises: 021_category_profiles
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '022_category_path_index'
+down_revision: Union[str, None] = '021_category_profiles'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'idx_menu_items_restaurant_category_path',
+        'menu_items',
+        ['restaurant_id', 'category_path'],
+        postgresql_ops={'category_path': 'varchar_pattern_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_menu_items_restaurant_category_path', table_name='menu_items')
@@ -0,0 +1,33 @@
+"""Add inventory_snapshots.updated_at
+
+Snapshots are edited in place when a stockout flag is set or cleared, so
+created_at does not tell the feature store that an item's stockout days
+changed. updated_at is stamped on every write; existing rows start from
+their created_at.
+
+Revision ID: 023_snapshot_updated_at
+Revises: 022_category_path_index
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '023_snapshot_updated_at'
+down_revision: Union[str, None] = '022_category_path_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'inventory_snapshots',
+        sa.Column('updated_at', sa.DateTime, server_default=sa.func.now(), nullable=True)
+    )
+    op.execute("UPDATE inventory_snapshots SET updated_at = created_at WHERE created_at IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('inventory_snapshots', 'updated_at')
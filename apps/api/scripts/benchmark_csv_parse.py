@@ -0,0 +1,87 @@
+"""
+Parallel CSV Parse Benchmark
+
+Measures CSVParser.parse_csv throughput with 1..N worker processes on a
+synthetic Toast-style export (from generate_synthetic_data.py), and checks
+that every run produces the same rows as the serial parse. The columnar
+(pandas) streaming backend is timed on the same file for comparison.
+
+Usage:
+    python scripts/benchmark_csv_parse.py [ROWS] [MAX_WORKERS] [CSV_PATH]
+"""
+import sys
+import io
+import os
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.columnar_parser import ColumnarCSVParser
+from src.services.csv_parser import CSVParser, ParsedRow
+
+from generate_synthetic_data import SyntheticDataGenerator
+
+
+def worker_counts(max_workers: int):
+    """1, 2, 4, ... up to and including max_workers."""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    csv_path = sys.argv[3] if len(sys.argv) > 3 else None
+
+    if csv_path is None:
+        csv_path = os.path.join(tempfile.gettempdir(), f"flux_ingest_bench_{num_rows}.csv")
+        if not os.path.exists(csv_path):
+            print(f"Generating {num_rows} synthetic rows -> {csv_path}")
+            SyntheticDataGenerator(db=None, random_seed=42).write_transactions_csv(csv_path, num_rows=num_rows)
+
+    with open(csv_path, "rb") as f:
+        file_bytes = f.read()
+
+    print(f"Benchmarking parse of {csv_path} ({len(file_bytes) / 1e6:.0f} MB)")
+
+    parser = CSVParser()
+    baseline = None
+    serial_secs = None
+    for workers in worker_counts(max_workers):
+        start = time.perf_counter()
+        result = parser.parse_csv(file_bytes, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline, serial_secs = result, elapsed
+        else:
+            assert result.parsed_rows == baseline.parsed_rows, "parallel rows differ from serial"
+            assert result.errors == baseline.errors, "parallel errors differ from serial"
+
+        print(
+            f"  {workers:>3} workers: {elapsed:.1f}s, "
+            f"{result.total_rows / elapsed:,.0f} rows/sec, "
+            f"speedup x{serial_secs / elapsed:.2f}"
+        )
+
+    start = time.perf_counter()
+    records = []
+    for batch in ColumnarCSVParser().stream_csv(io.BytesIO(file_bytes)):
+        records.extend(batch.parsed_rows)
+    elapsed = time.perf_counter() - start
+    assert [ParsedRow(**r._asdict()) for r in records] == baseline.parsed_rows, "columnar rows differ"
+    print(
+        f"     columnar: {elapsed:.1f}s, "
+        f"{baseline.total_rows / elapsed:,.0f} rows/sec, "
+        f"speedup x{serial_secs / elapsed:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
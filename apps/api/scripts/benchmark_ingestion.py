@@ -0,0 +1,117 @@
+"""
+Ingestion Throughput Benchmark
+
+Compares rows/sec of the two TransactionIngestionService write backends:
+- bulk: client-generated UUIDs + multi-row INSERTs
+- orm:  one ORM object per row (fallback path)
+
+Both runs stream the same synthetic CSV (from generate_synthetic_data.py)
+into a throwaway restaurant, with menu extraction disabled so only
+parsing and transaction writes are measured. A parse-only pass is timed
+as well so write throughput can be separated from parse cost.
+
+Usage:
+    python scripts/benchmark_ingestion.py [ROWS] [CSV_PATH]
+"""
+import sys
+import os
+import tempfile
+import time
+from uuid import uuid4
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.db.session import SessionLocal
+from src.models.data_upload import DataUpload
+from src.models.ingestion_log import IngestionLog
+from src.models.restaurant import Restaurant
+from src.models.transaction import Transaction, TransactionItem
+from src.models.user import User
+from src.services.csv_parser import CSVParser
+from src.services.ingestion import TransactionIngestionService
+
+from generate_synthetic_data import SyntheticDataGenerator
+
+
+def time_parse_only(csv_path: str) -> float:
+    """Time a streaming parse with no database writes."""
+    start = time.perf_counter()
+    with open(csv_path, "rb") as f:
+        for _ in CSVParser().stream_csv(f):
+            pass
+    return time.perf_counter() - start
+
+
+def run_backend(db, csv_path: str, bulk_insert: bool) -> dict:
+    """Ingest the CSV into a fresh restaurant and return timing stats."""
+    user = User(email=f"bench_{uuid4()}@example.com", hashed_password="dummy_hash")
+    db.add(user)
+    db.flush()
+    restaurant = Restaurant(name=f"Ingestion Benchmark {uuid4()}", owner_id=user.id)
+    db.add(restaurant)
+    db.flush()
+    upload = DataUpload(restaurant_id=restaurant.id, status="PROCESSING")
+    db.add(upload)
+    db.commit()
+
+    service = TransactionIngestionService(db, enable_menu_extraction=False, bulk_insert=bulk_insert)
+
+    try:
+        with open(csv_path, "rb") as f:
+            file_hash = service.compute_stream_hash(f)
+            start = time.perf_counter()
+            stream = CSVParser().stream_csv(f)
+            result = service.ingest_stream(restaurant.id, upload.id, stream, file_hash)
+            elapsed = time.perf_counter() - start
+    finally:
+        # Cleanup
+        tx_ids = db.query(Transaction.id).filter(Transaction.restaurant_id == restaurant.id)
+        db.query(TransactionItem).filter(
+            TransactionItem.transaction_id.in_(tx_ids)
+        ).delete(synchronize_session=False)
+        db.query(Transaction).filter(Transaction.restaurant_id == restaurant.id).delete()
+        db.query(IngestionLog).filter(IngestionLog.upload_id == upload.id).delete()
+        db.query(DataUpload).filter(DataUpload.restaurant_id == restaurant.id).delete()
+        db.query(Restaurant).filter(Restaurant.id == restaurant.id).delete()
+        db.query(User).filter(User.id == user.id).delete()
+        db.commit()
+
+    return {
+        "elapsed": elapsed,
+        "rows_inserted": result.rows_inserted,
+        "rows_per_sec": result.rows_processed / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else None
+
+    if csv_path is None:
+        csv_path = os.path.join(tempfile.gettempdir(), f"flux_ingest_bench_{num_rows}.csv")
+        if not os.path.exists(csv_path):
+            print(f"Generating {num_rows} synthetic rows -> {csv_path}")
+            SyntheticDataGenerator(db=None, random_seed=42).write_transactions_csv(csv_path, num_rows=num_rows)
+
+    print(f"Benchmarking ingestion of {csv_path}")
+
+    parse_secs = time_parse_only(csv_path)
+    print(f"  parse only: {parse_secs:.1f}s ({num_rows / parse_secs:,.0f} rows/sec)")
+
+    db = SessionLocal()
+    try:
+        for label, bulk in [("bulk", True), ("orm", False)]:
+            stats = run_backend(db, csv_path, bulk_insert=bulk)
+            write_secs = max(stats["elapsed"] - parse_secs, 1e-9)
+            print(
+                f"  {label:>4}: {stats['elapsed']:.1f}s total, "
+                f"{stats['rows_per_sec']:,.0f} rows/sec end-to-end, "
+                f"~{stats['rows_inserted'] / write_secs:,.0f} rows/sec writes "
+                f"({stats['rows_inserted']} inserted)"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Per-Item Query Benchmark
+
+Compares EXPLAIN ANALYZE execution times of the hot per-item queries
+before and after transaction_items carried restaurant_id, business_date
+and menu_item_id (migration 020):
+- before: join transactions to filter on restaurant and date, filter the
+  item by name
+- after:  filter transaction_items alone through the covering indexes
+
+Queries measured:
+- item_series:  one item's daily quantities over the last DAYS days
+                (feature building, stockout velocity)
+- date_rollup:  per-item aggregates of the last 7 business dates
+                (daily_item_sales refresh after an upload)
+- price_points: one item's observation and distinct price counts
+                (elasticity data sufficiency)
+
+Each query runs RUNS times per variant; the median execution time is
+reported. Defaults to the restaurant with the most line items and its
+best-selling linked item.
+
+Usage:
+    python scripts/benchmark_item_queries.py [RESTAURANT_ID] [RUNS]
+"""
+import sys
+import os
+import json
+import statistics
+from datetime import date, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text
+
+from src.db.session import SessionLocal
+
+DAYS = 90
+
+QUERIES = {
+    "item_series": (
+        """
+        SELECT t.transaction_date, sum(ti.quantity)
+        FROM transaction_items ti
+        JOIN transactions t ON t.id = ti.transaction_id
+        WHERE t.restaurant_id = :restaurant_id
+          AND ti.menu_item_name = :item_name
+          AND t.transaction_date >= :start_date
+        GROUP BY t.transaction_date
+        """,
+        """
+        SELECT business_date, sum(quantity)
+        FROM transaction_items
+        WHERE restaurant_id = :restaurant_id
+          AND menu_item_id = :menu_item_id
+          AND business_date >= :start_date
+        GROUP BY business_date
+        """,
+    ),
+    "date_rollup": (
+        """
+        SELECT t.transaction_date, ti.menu_item_name, sum(ti.quantity), sum(ti.total),
+               count(ti.id), avg(ti.unit_price), bool_or(t.is_promo)
+        FROM transaction_items ti
+        JOIN transactions t ON t.id = ti.transaction_id
+        WHERE t.restaurant_id = :restaurant_id
+          AND t.transaction_date >= :recent_date
+        GROUP BY t.transaction_date, ti.menu_item_name
+        """,
+        """
+        SELECT ti.business_date, ti.menu_item_name, sum(ti.quantity), sum(ti.total),
+               count(*), avg(ti.unit_price), bool_or(t.is_promo)
+        FROM transaction_items ti
+        JOIN transactions t ON t.id = ti.transaction_id
+        WHERE ti.restaurant_id = :restaurant_id
+          AND ti.business_date >= :recent_date
+        GROUP BY ti.business_date, ti.menu_item_name
+        """,
+    ),
+    "price_points": (
+        """
+        SELECT count(t.id), count(DISTINCT ti.unit_price)
+        FROM transaction_items ti
+        JOIN transactions t ON t.id = ti.transaction_id
+        WHERE t.restaurant_id = :restaurant_id
+          AND ti.menu_item_name = :item_name
+        """,
+        """
+        SELECT count(*), count(DISTINCT unit_price)
+        FROM transaction_items
+        WHERE restaurant_id = :restaurant_id
+          AND menu_item_id = :menu_item_id
+        """,
+    ),
+}
+
+
+def pick_restaurant(db):
+    """Restaurant with the most line items."""
+    return db.execute(text("""
+        SELECT restaurant_id FROM transaction_items
+        GROUP BY restaurant_id ORDER BY count(*) DESC LIMIT 1
+    """)).scalar()
+
+
+def pick_item(db, restaurant_id):
+    """Best-selling item of the restaurant that is linked to a menu item."""
+    return db.execute(text("""
+        SELECT menu_item_name, menu_item_id FROM transaction_items
+        WHERE restaurant_id = :restaurant_id AND menu_item_id IS NOT NULL
+        GROUP BY menu_item_name, menu_item_id ORDER BY count(*) DESC LIMIT 1
+    """), {"restaurant_id": restaurant_id}).first()
+
+
+def explain_ms(db, sql: str, params: dict) -> float:
+    """Execution time in ms reported by EXPLAIN ANALYZE."""
+    plan = db.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Execution Time"]
+
+
+def main():
+    restaurant_id = sys.argv[1] if len(sys.argv) > 1 else None
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    db = SessionLocal()
+    try:
+        restaurant_id = restaurant_id or pick_restaurant(db)
+        if restaurant_id is None:
+            print("No transaction items to benchmark - load data first")
+            return
+
+        item = pick_item(db, restaurant_id)
+        if item is None:
+            print(f"Restaurant {restaurant_id} has no line items linked to menu items")
+            return
+
+        params = {
+            "restaurant_id": restaurant_id,
+            "item_name": item.menu_item_name,
+            "menu_item_id": item.menu_item_id,
+            "start_date": date.today() - timedelta(days=DAYS),
+            "recent_date": date.today() - timedelta(days=7),
+        }
+        print(f"Benchmarking restaurant {restaurant_id}, item '{item.menu_item_name}' ({runs} runs)")
+
+        for name, (before_sql, after_sql) in QUERIES.items():
+            # One untimed pass each so both variants start with a warm cache
+            explain_ms(db, before_sql, params)
+            explain_ms(db, after_sql, params)
+
+            before = statistics.median(explain_ms(db, before_sql, params) for _ in range(runs))
+            after = statistics.median(explain_ms(db, after_sql, params) for _ in range(runs))
+            speedup = before / after if after > 0 else float("inf")
+            print(f"  {name:>12}: before {before:8.2f} ms, after {after:8.2f} ms ({speedup:.1f}x)")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Promotion Detection Benchmark
+
+Times discount detection on ROWS synthetic parsed rows, comparing a
+PromotionDetectionService.detect_discount_in_item call per row (the old
+parser loop) with the chunked detect_discounts used by CSVParser, and
+checks that both give identical results.
+
+Rows cover every detection method: explicit discounts, negative prices
+(comps/voids) and discount keywords in item names.
+
+Usage:
+    python scripts/benchmark_promotions.py [ROWS]
+"""
+import sys
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.csv_parser import ParsedRow
+from src.services.promotion_detection import PromotionDetectionService
+
+
+NAMES = ["Burger", "Lunch Special", "Happy Hour Beer", "Promotion Combo", "Fries", "Comp Dessert"]
+
+
+def synthetic_rows(count: int):
+    """Parsed rows with periodic comps and explicit discounts."""
+    rows = []
+    for i in range(count):
+        price = Decimal("-4.00") if i % 11 == 0 else Decimal("8.00")
+        rows.append(ParsedRow(
+            row_number=i + 2,
+            date=datetime(2024, 12, 15),
+            item_name=NAMES[i % len(NAMES)].lower(),
+            raw_item_name=NAMES[i % len(NAMES)],
+            quantity=1,
+            unit_price=price,
+            total=price,
+            discount_amount=Decimal("1.50") if i % 13 == 0 else None,
+        ))
+    return rows
+
+
+def best_of(fn, repeats: int = 3):
+    """Best wall-clock time of `repeats` runs, and the last result."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rows = synthetic_rows(num_rows)
+    print(f"Benchmarking promotion detection on {num_rows:,} rows")
+
+    def per_row():
+        return [
+            PromotionDetectionService(db=None).detect_discount_in_item(
+                item_name=row.raw_item_name,
+                unit_price=row.unit_price,
+                total=row.total,
+                discount_amount=row.discount_amount
+            )
+            for row in rows
+        ]
+
+    def batched():
+        return PromotionDetectionService(db=None).detect_discounts(rows)
+
+    expected, per_row_secs = best_of(per_row)
+    actual, batch_secs = best_of(batched)
+    assert actual == expected, "batch detection differs"
+    print(f"  per-row: {per_row_secs:.2f}s, batch: {batch_secs:.2f}s, speedup x{per_row_secs / batch_secs:.1f}")
+
+
+if __name__ == "__main__":
+    main()
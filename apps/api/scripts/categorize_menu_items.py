@@ -0,0 +1,48 @@
+"""
+Deferred Menu Item Categorization
+
+Background pass for CATEGORIZATION_MODE=deferred: LLM-categorizes
+auto-created menu items that have no category_path yet. Results go
+through the shared categorization cache, so names categorized before
+(for any restaurant) cost no API calls.
+
+Set CATEGORIZATION_CLIENT=fake to run offline with the keyword categorizer.
+
+Usage:
+    python scripts/categorize_menu_items.py [RESTAURANT_ID] [LIMIT]
+"""
+import sys
+import os
+import time
+from uuid import UUID
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.db.session import SessionLocal
+from src.services.menu_extraction import MenuItemExtractionService
+
+
+def main():
+    restaurant_id = UUID(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1] != "all" else None
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    db = SessionLocal()
+    try:
+        service = MenuItemExtractionService(db, categorization_mode="deferred")
+        if not service.categorization_service.client:
+            print("No categorization client configured (set OPENAI_API_KEY or CATEGORIZATION_CLIENT=fake)")
+            return
+
+        scope = f"restaurant {restaurant_id}" if restaurant_id else "all restaurants"
+        print(f"Categorizing uncategorized menu items for {scope}")
+
+        start = time.perf_counter()
+        categorized = service.categorize_pending_items(restaurant_id, limit=limit)
+        elapsed = time.perf_counter() - start
+        print(f"  {categorized} items categorized in {elapsed:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
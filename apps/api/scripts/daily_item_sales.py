@@ -0,0 +1,85 @@
+"""
+Daily Item Sales Rollup Maintenance
+
+backfill: rebuild daily_item_sales from transaction_items (one restaurant
+          or all), e.g. after migration 018 or after writing raw rows
+          outside the ingestion service
+check:    compare the rollup with a fresh aggregation and list mismatches;
+          with --repair, rebuild the mismatched dates
+
+Usage:
+    python scripts/daily_item_sales.py backfill [RESTAURANT_ID]
+    python scripts/daily_item_sales.py check [RESTAURANT_ID] [--repair]
+"""
+import sys
+import os
+import time
+from uuid import UUID
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import select
+
+from src.db.session import SessionLocal
+from src.models.restaurant import Restaurant
+from src.services.daily_sales import DailySalesRollupService
+
+
+def backfill(service: DailySalesRollupService, restaurant_id):
+    start = time.perf_counter()
+    written = service.backfill(restaurant_id)
+    elapsed = time.perf_counter() - start
+    for rid, rows in written.items():
+        print(f"  {rid}: {rows} rollup rows")
+    print(f"Backfilled {len(written)} restaurants in {elapsed:.1f}s")
+
+
+def check(service: DailySalesRollupService, restaurant_id, repair: bool) -> int:
+    if restaurant_id is not None:
+        restaurant_ids = [restaurant_id]
+    else:
+        restaurant_ids = service.db.execute(select(Restaurant.id)).scalars().all()
+
+    total_mismatches = 0
+    for rid in restaurant_ids:
+        mismatches = service.check_consistency(rid)
+        if not mismatches:
+            continue
+
+        total_mismatches += len(mismatches)
+        print(f"  {rid}: {len(mismatches)} mismatches")
+        for m in mismatches[:20]:
+            print(f"    {m.business_date} {m.menu_item_name!r} {m.field}: expected {m.expected}, found {m.actual}")
+
+        if repair:
+            dates = {m.business_date for m in mismatches}
+            service.refresh(rid, business_dates=dates)
+            service.db.commit()
+            print(f"    rebuilt {len(dates)} dates")
+
+    print(f"Checked {len(restaurant_ids)} restaurants: {total_mismatches} mismatches")
+    return total_mismatches
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args or args[0] not in ("backfill", "check"):
+        print(__doc__)
+        sys.exit(2)
+
+    command = args[0]
+    restaurant_id = UUID(args[1]) if len(args) > 1 and args[1] != "all" else None
+
+    db = SessionLocal()
+    try:
+        service = DailySalesRollupService(db)
+        if command == "backfill":
+            backfill(service, restaurant_id)
+        elif check(service, restaurant_id, repair="--repair" in sys.argv) and "--repair" not in sys.argv:
+            sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,7 @@ from src.models.inventory import InventorySnapshot
 from src.models.promotion import Promotion
 from src.models.data_upload import DataUpload
 from src.core.security import hash_password
+from src.services.daily_sales import DailySalesRollupService
 
 
 class SyntheticDataGenerator:
@@ -285,6 +286,8 @@ class SyntheticDataGenerator:
                 for item in day_items:
                     ti = TransactionItem(
                         transaction_id=tx.id,
+                        restaurant_id=tx.restaurant_id,
+                        business_date=tx.transaction_date,
                         menu_item_name=item["name"],
                         quantity=item["qty"],
                         unit_price=Decimal(str(item["price"])),
@@ -295,6 +298,8 @@ class SyntheticDataGenerator:
                 transactions_created += 1
 
         self.db.commit()
+        DailySalesRollupService(self.db).refresh(restaurant.id)
+        self.db.commit()
 
         # 6. Create Upload Record (so dashboard recognizes the data)
         print("\nCreating upload record...")
@@ -328,6 +333,72 @@ class SyntheticDataGenerator:
             "upload_id": upload.id
         }
 
+    def write_transactions_csv(self, path, num_rows=1_000_000, days=365):
+        """
+        Write a Toast-style line-item CSV export (no database access).
+
+        Uses the same weekday seasonality as generate_restaurant_data but
+        emits one row per order line, for benchmarking CSV upload and
+        ingestion at realistic file sizes.
+
+        Args:
+            path: Output file path
+            num_rows: Number of line-item rows to write
+            days: Days of history the rows are spread over
+
+        Returns:
+            Number of rows written
+        """
+        import csv
+
+        # (name, base_mean, price)
+        menu = [
+            ("Burger", 35, 14.99),
+            ("Caesar Salad", 25, 11.99),
+            ("French Fries", 50, 5.99),
+            ("Margherita Pizza", 30, 16.50),
+            ("Chicken Wings", 28, 12.99),
+            ("Fish Tacos", 18, 13.50),
+            ("Iced Tea", 40, 3.50),
+            ("Chocolate Cake", 12, 7.99),
+        ]
+        names = [m[0] for m in menu]
+        weights = np.array([m[1] for m in menu], dtype=float)
+        weights /= weights.sum()
+        prices = {m[0]: m[2] for m in menu}
+
+        # Weekday demand multipliers (Fri bump, weekend peak)
+        dow_mult = np.array([1.0, 1.0, 1.0, 1.0, 1.4, 1.8, 1.8])
+        start_date = date.today() - timedelta(days=days)
+        day_weights = np.array([
+            dow_mult[(start_date + timedelta(days=i)).weekday()] for i in range(days)
+        ])
+        rows_per_day = np.random.multinomial(num_rows, day_weights / day_weights.sum())
+
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Order Date", "Menu Item", "Qty", "Price", "Total"])
+
+            for i, day_rows in enumerate(rows_per_day):
+                current_date = start_date + timedelta(days=i)
+                item_idx = np.random.choice(len(names), size=day_rows, p=weights)
+                # Service from 11:00 to 22:59, seconds resolution
+                seconds = np.sort(np.random.randint(11 * 3600, 23 * 3600, size=day_rows))
+                qtys = np.random.choice([1, 1, 1, 2, 2, 3], size=day_rows)
+
+                for idx, sec, qty in zip(item_idx, seconds, qtys):
+                    name = names[idx]
+                    price = prices[name]
+                    writer.writerow([
+                        f"{current_date.isoformat()} {sec // 3600:02d}:{sec % 3600 // 60:02d}:{sec % 60:02d}",
+                        name,
+                        int(qty),
+                        f"{price:.2f}",
+                        f"{price * qty:.2f}",
+                    ])
+
+        return int(rows_per_day.sum())
+
     def _generate_promotions(self, restaurant, items, days, num_promotions):
         """Generate promotion periods with known start/end dates."""
         promotions = []
@@ -379,6 +450,14 @@ class SyntheticDataGenerator:
 
 def main():
     """Generate synthetic data for testing."""
+    # --csv PATH [ROWS]: write a line-item CSV export instead of seeding the DB
+    if len(sys.argv) > 2 and sys.argv[1] == "--csv":
+        num_rows = int(sys.argv[3]) if len(sys.argv) > 3 else 1_000_000
+        generator = SyntheticDataGenerator(db=None, random_seed=42)
+        written = generator.write_transactions_csv(sys.argv[2], num_rows=num_rows)
+        print(f"✅ Wrote {written} rows to {sys.argv[2]}")
+        return
+
     db = SessionLocal()
 
     try:
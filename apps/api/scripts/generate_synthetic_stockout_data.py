@@ -27,6 +27,7 @@ from src.models.restaurant import Restaurant
 from src.models.transaction import Transaction, TransactionItem
 from src.models.menu import MenuItem
 from src.models.inventory import InventorySnapshot
+from src.services.daily_sales import DailySalesRollupService
 
 
 # Seed for reproducibility
@@ -167,6 +168,8 @@ class SyntheticDataGenerator:
                     self.db.add(snapshot)
 
         self.db.commit()
+        DailySalesRollupService(self.db).refresh(restaurant.id)
+        self.db.commit()
 
         print(f"✅ Generated {days_history} days of data for '{restaurant.name}'")
         print(f"   Menu items: {len(created_items)}")
@@ -239,6 +242,8 @@ class SyntheticDataGenerator:
             for item_data in transaction_items:
                 tx_item = TransactionItem(
                     transaction_id=transaction.id,
+                    restaurant_id=transaction.restaurant_id,
+                    business_date=transaction.transaction_date,
                     menu_item_name=item_data["menu_item_name"],
                     quantity=item_data["quantity"],
                     unit_price=item_data["unit_price"],
@@ -14,6 +14,7 @@ from src.models.menu import MenuItem
 from src.models.transaction import Transaction, TransactionItem
 from src.models.data_health import DataHealthScore
 from src.services.forecast import ForecastService
+from src.services.daily_sales import DailySalesRollupService
 from src.core.security import hash_password
 
 def seed_forecast_data(email="chef@laboqueria.es"):
@@ -124,6 +125,8 @@ def seed_forecast_data(email="chef@laboqueria.es"):
                 for line in day_items:
                     ti = TransactionItem(
                         transaction_id=txn.id,
+                        restaurant_id=txn.restaurant_id,
+                        business_date=txn.transaction_date,
                         menu_item_name=line["name"],
                         quantity=line["qty"],
                         unit_price=line["unit"],
@@ -131,6 +134,8 @@ def seed_forecast_data(email="chef@laboqueria.es"):
                     )
                     db.add(ti)
 
+        db.commit()
+        DailySalesRollupService(db).refresh(restaurant.id)
         db.commit()
         print("History seeded.")
 
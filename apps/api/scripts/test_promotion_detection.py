@@ -24,6 +24,7 @@ from src.models.menu import MenuItem, MenuCategory
 from src.models.transaction import Transaction, TransactionItem
 from src.models.promotion import Promotion
 from src.models.user import User
+from src.services.daily_sales import DailySalesRollupService
 from src.services.promotion_detection import PromotionDetectionService
 
 
@@ -192,6 +193,8 @@ def generate_synthetic_promotion_data(db: SessionLocal):
             tx_item = TransactionItem(
                 id=uuid4(),
                 transaction_id=transaction.id,
+                restaurant_id=transaction.restaurant_id,
+                business_date=transaction.transaction_date,
                 menu_item_name=item_name,
                 quantity=qty,
                 unit_price=unit_price,
@@ -203,6 +206,8 @@ def generate_synthetic_promotion_data(db: SessionLocal):
         transaction.total_amount = total_amount
 
     db.commit()
+    DailySalesRollupService(db).refresh(restaurant.id)
+    db.commit()
 
     print(f"✓ Generated 90 days of sales data")
     print(f"✓ Embedded {len(ground_truth_promotions)} promotion periods")
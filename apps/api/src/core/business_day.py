@@ -8,7 +8,9 @@ Example: A transaction at 2:00 AM on Jan 2nd belongs to Jan 1st business day
          (assuming the restaurant opened Jan 1st evening and stayed open past midnight).
 """
 from datetime import datetime, date, time, timedelta
-from typing import Optional
+from typing import Iterable, Optional
+
+import numpy as np
 import pytz
 
 
@@ -127,3 +129,33 @@ def calculate_hours_open(first_order: Optional[time], last_order: Optional[time]
 
     # Sanity check: at least 1 hour, at most 24 hours
     return max(1.0, min(hours, 24.0))
+
+
+def calculate_hours_open_array(
+    first_orders: Iterable[Optional[time]],
+    last_orders: Iterable[Optional[time]]
+) -> np.ndarray:
+    """
+    Vectorized calculate_hours_open over parallel sequences of order times.
+
+    Missing times (None/NaN) give the 12.0 default, like the scalar version.
+
+    Returns:
+        Float array of hours open, one per pair
+    """
+    first_mins = _offset_minutes_array(first_orders)
+    last_mins = _offset_minutes_array(last_orders)
+
+    hours = np.clip((last_mins - first_mins) / 60.0, 1.0, 24.0)
+    return np.where(np.isnan(hours), 12.0, hours)
+
+
+def _offset_minutes_array(times: Iterable[Optional[time]]) -> np.ndarray:
+    """time_to_offset_minutes per element as floats, NaN where the time is missing."""
+    minutes = np.array(
+        [t.hour * 60 + t.minute if isinstance(t, time) else np.nan for t in times],
+        dtype=float
+    )
+    start = BUSINESS_DAY_START_HOUR * 60
+    # Times before 4 AM belong to the end of the business day
+    return np.where(minutes < start, minutes + 24 * 60, minutes) - start
@@ -36,10 +36,29 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Background CSV upload processing
+    UPLOAD_JOB_BACKEND: str = "thread"  # "thread" or "inline" (synchronous, for tests)
+    UPLOAD_JOB_WORKERS: int = 2
+    CSV_PARSE_BACKEND: str = "rows"  # "rows" or "columnar" (pandas, vectorized)
+    UPLOAD_CHECKPOINT_ROWS: int = 50000  # Commit ingestion every N rows so failed uploads can resume
+    UPLOAD_STALE_SECONDS: int = 900  # A PROCESSING upload without progress for this long counts as dead (resumable)
+
+    # Forecasting
+    FORECAST_WORKERS: int = 1  # Threads predicting items concurrently in bulk forecasts (1 = sequential)
+    FEATURE_STORE_DIR: str | None = None  # Cache training frames as Arrow files here (None = disabled)
+    FEATURE_STORE_MAX_MB: int = 512  # Least recently used frames are evicted above this total size
+    CATEGORY_PROFILE_TTL_SECONDS: int = 300  # In-memory lifetime of category seasonality/prior profiles
+
     # Optional API Keys (for LLM categorization in future stories)
     OPENAI_API_KEY: str | None = None
     ANTHROPIC_API_KEY: str | None = None
 
+    # LLM menu item categorization
+    CATEGORIZATION_MODE: str = "inline"  # "inline" (during ingestion) or "deferred" (background pass)
+    CATEGORIZATION_CLIENT: str = "openai"  # "openai" or "fake" (offline keyword categorizer)
+    CATEGORIZATION_CONCURRENCY: int = 8  # Parallel LLM requests per batch
+    CATEGORIZATION_MAX_RETRIES: int = 4  # Retries on rate limits and transient API errors
+
     @field_validator("JWT_SECRET_KEY")
     @classmethod
     def validate_jwt_secret(cls, v: str) -> str:
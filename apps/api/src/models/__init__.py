@@ -5,7 +5,7 @@ SQLAlchemy models for Flux.
 from src.models.user import User
 from src.models.restaurant import Restaurant
 from src.models.data_upload import DataUpload
-from src.models.transaction import Transaction, TransactionItem
+from src.models.transaction import Transaction, TransactionItem, DailyItemSales
 
 # Menu
 from src.models.menu import MenuCategory, MenuItem
@@ -34,7 +34,7 @@ from src.models.employee import (
 )
 
 # Forecasting
-from src.models.forecast import DemandForecast, StaffingForecast
+from src.models.forecast import DemandForecast, StaffingForecast, CategoryProfile
 
 # Promotions
 from src.models.promotion import Promotion, PriceElasticity
@@ -65,6 +65,7 @@ __all__ = [
     "DataUpload",
     "Transaction",
     "TransactionItem",
+    "DailyItemSales",
     # Menu
     "MenuCategory",
     "MenuItem",
@@ -90,6 +91,7 @@ __all__ = [
     # Forecasting
     "DemandForecast",
     "StaffingForecast",
+    "CategoryProfile",
     # Promotions
     "Promotion",
     "PriceElasticity",
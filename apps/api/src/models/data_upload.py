@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, func, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, func, ForeignKey, JSON, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from src.db.base import Base
@@ -12,6 +12,14 @@ class DataUpload(Base):
     status = Column(String, nullable=False, default="PENDING")
     file_hash = Column(String(64), nullable=True)
     errors = Column(JSON)
+    # Live progress, updated by the background upload job while ingesting
+    rows_processed = Column(Integer, nullable=False, default=0, server_default="0")
+    rows_inserted = Column(Integer, nullable=False, default=0, server_default="0")
+    rows_failed = Column(Integer, nullable=False, default=0, server_default="0")
+    # Checkpointed ingestion: last CSV row whose effects are committed, and
+    # the ingestion counters as of that row (see TransactionIngestionService)
+    checkpoint_row = Column(Integer, nullable=False, default=0, server_default="0")
+    checkpoint = Column(JSON)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
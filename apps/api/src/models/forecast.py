@@ -1,6 +1,6 @@
 
 import uuid
-from sqlalchemy import Column, String, Date, Numeric, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, Date, Numeric, DateTime, ForeignKey, Integer, Float, JSON, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -36,3 +36,26 @@ class StaffingForecast(Base):
     created_at = Column(DateTime, server_default=func.now())
 
     restaurant = relationship("Restaurant")
+
+
+class CategoryProfile(Base):
+    """
+    Sales aggregates behind a category's seasonality and prior.
+
+    One row per (restaurant, category context), computed over the window_days
+    before as_of by CategoryProfileService and deleted whenever the
+    restaurant's daily_item_sales rows are refreshed.
+    """
+    __tablename__ = "category_profiles"
+
+    restaurant_id = Column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String, primary_key=True)
+    as_of = Column(Date, nullable=False)
+    window_days = Column(Integer, nullable=False)
+    # Per weekday (Monday first): dates with sales and their summed quantity
+    dow_dates = Column(JSON, nullable=False)
+    dow_quantity = Column(JSON, nullable=False)
+    # Item-day observations and their total quantity, for the Gamma prior
+    sample_count = Column(Integer, nullable=False)
+    sample_sum = Column(Float, nullable=False)
+    computed_at = Column(DateTime, server_default=func.now())
@@ -78,6 +78,8 @@ class InventorySnapshot(Base):
     source = Column(String(50), nullable=False, default="manual")  # 'manual', 'inferred', 'pos_import'
 
     created_at = Column(DateTime, server_default=func.now())
+    # Snapshots are edited in place (e.g. stockout_flag flips); feature store watermark
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
     # Relationships
     restaurant = relationship("Restaurant")
@@ -2,7 +2,7 @@
 Menu-related models: categories, menu items, and price history.
 """
 import uuid
-from sqlalchemy import Column, String, Text, Integer, Boolean, Numeric, DateTime, Date, ForeignKey, func
+from sqlalchemy import Column, String, Text, Integer, Boolean, Numeric, DateTime, Date, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -54,6 +54,15 @@ class MenuItem(Base):
     promotions = relationship("Promotion", back_populates="menu_item")
     price_history = relationship("MenuItemPriceHistory", back_populates="menu_item", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Category subtree scans: category_path LIKE 'Entrees > %' per restaurant
+        Index(
+            'idx_menu_items_restaurant_category_path',
+            'restaurant_id', 'category_path',
+            postgresql_ops={'category_path': 'varchar_pattern_ops'},
+        ),
+    )
+
 
 class MenuItemPriceHistory(Base):
     """
@@ -72,3 +81,20 @@ class MenuItemPriceHistory(Base):
     created_at = Column(DateTime, server_default=func.now())
 
     menu_item = relationship("MenuItem", back_populates="price_history")
+
+
+class MenuCategorizationCache(Base):
+    """
+    LLM categorization results keyed by normalized item name.
+
+    Shared across restaurants: the same dish name gets the same category
+    path, so each distinct name is sent to the LLM at most once.
+    """
+    __tablename__ = "menu_categorization_cache"
+
+    normalized_name = Column(String(255), primary_key=True)
+    category_path = Column(String(255), nullable=False)
+    confidence = Column(Numeric(3, 2), nullable=True)
+    reasoning = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
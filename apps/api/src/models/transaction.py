@@ -42,7 +42,13 @@ class TransactionItem(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False)
+    # Denormalized from Transaction: row hashes are unique per restaurant, and
+    # per-item queries filter on these without joining transactions
+    restaurant_id = Column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False)
+    business_date = Column(Date, nullable=False)
     menu_item_name = Column(String, nullable=False)
+    # Menu item the name resolved to at ingest (NULL when not yet matched)
+    menu_item_id = Column(UUID(as_uuid=True), ForeignKey("menu_items.id", ondelete="SET NULL"), nullable=True)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Numeric(10, 2), nullable=False)
     total = Column(Numeric(10, 2), nullable=False)
@@ -52,3 +58,50 @@ class TransactionItem(Base):
 
     transaction = relationship("Transaction", back_populates="items")
     promotion = relationship("Promotion", back_populates="transaction_items")
+
+    __table_args__ = (
+        # Row-level dedup: ingestion inserts with ON CONFLICT DO NOTHING on this index
+        Index('uq_transaction_items_restaurant_hash', 'restaurant_id', 'source_hash', unique=True),
+        # Covering indexes for join-free per-item and per-date scans
+        Index(
+            'idx_transaction_items_restaurant_item_date',
+            'restaurant_id', 'menu_item_id', 'business_date',
+            postgresql_include=['quantity', 'unit_price', 'total'],
+        ),
+        Index(
+            'idx_transaction_items_restaurant_date_name',
+            'restaurant_id', 'business_date', 'menu_item_name',
+            postgresql_include=['quantity', 'unit_price', 'total', 'transaction_id'],
+        ),
+    )
+
+
+class DailyItemSales(Base):
+    """
+    Daily per-item sales rollup of transaction_items.
+
+    One row per (restaurant, business date, item name), maintained by
+    DailySalesRollupService when uploads are ingested. Flags and order
+    times come from the transactions the item was sold in.
+    """
+    __tablename__ = "daily_item_sales"
+
+    restaurant_id = Column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    business_date = Column(Date, primary_key=True)
+    menu_item_name = Column(String, primary_key=True)
+    quantity = Column(Integer, nullable=False)
+    revenue = Column(Numeric(12, 2), nullable=False)
+    line_count = Column(Integer, nullable=False)
+    # Mean unit price over line items (not quantity-weighted)
+    avg_price = Column(Numeric(12, 4), nullable=False)
+    min_price = Column(Numeric(10, 2), nullable=False)
+    max_price = Column(Numeric(10, 2), nullable=False)
+    is_promo = Column(Boolean, nullable=False, default=False)
+    stockout_occurred = Column(Boolean, nullable=True)
+    first_order_time = Column(Time, nullable=True)
+    last_order_time = Column(Time, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_daily_item_sales_item_date', 'restaurant_id', 'menu_item_name', 'business_date'),
+    )
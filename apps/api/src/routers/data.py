@@ -1,11 +1,16 @@
 """
 Data upload router for CSV ingestion.
 """
+import shutil
+import tempfile
+from datetime import timedelta
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy import and_, func, or_, update
 from sqlalchemy.orm import Session
 
+from src.core.config import get_settings
 from src.core.deps import get_current_user
 from src.db.session import get_db
 from src.models.data_upload import DataUpload
@@ -19,7 +24,7 @@ from src.schemas.data import (
     UploadStatus,
 )
 from src.services.csv_parser import CSVParser
-from src.services.ingestion import TransactionIngestionService
+from src.services.upload_jobs import UploadJobRunner, get_upload_job_runner
 
 router = APIRouter(prefix="/data", tags=["data"])
 
@@ -95,7 +100,8 @@ async def preview_csv(
             errors=preview_errors,
             warnings=result.warnings,
             success_rate=result.success_rate,
-            schema_detected=schema_detected
+            schema_detected=schema_detected,
+            date_format=result.date_format
         )
 
     except Exception as e:
@@ -106,14 +112,18 @@ async def preview_csv(
 
 
 @router.post("/upload", response_model=UploadResponse)
-async def upload_csv(
+def upload_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    runner: UploadJobRunner = Depends(get_upload_job_runner),
 ):
     """
     Upload a CSV file with transaction data.
 
+    The file is spooled to disk and processed by a background job; poll
+    GET /data/uploads/{upload_id} for progress and the final result.
+
     Uses intelligent CSV parser to detect POS format and validate data.
     Includes file-level and row-level deduplication to prevent duplicate imports.
 
@@ -125,7 +135,7 @@ async def upload_csv(
     - Generic: date, item, quantity, unit_price, total
 
     Returns:
-        Upload status with statistics on rows processed, inserted, and skipped
+        Upload ID and current status (PENDING until the job picks it up)
     """
     # Validate file type
     if not file.filename or not file.filename.endswith('.csv'):
@@ -145,133 +155,98 @@ async def upload_csv(
     # Create upload record
     upload = DataUpload(
         restaurant_id=restaurant.id,
-        status=UploadStatus.PROCESSING.value,
+        status=UploadStatus.PENDING.value,
     )
     db.add(upload)
     db.commit()
     db.refresh(upload)
 
-    # Process CSV
-    try:
-        # Read file bytes
-        content = await file.read()
+    # Spool to disk so the job can stream the file after the request ends
+    spool_path = _spool_upload(file, upload, db)
+    runner.submit(upload.id, restaurant.id, spool_path)
 
-        # Parse CSV using intelligent parser
-        parser = CSVParser()
-        parse_result = parser.parse_csv(content, preview_mode=False)
-
-        # Check for critical parsing errors (missing columns, etc.)
-        if parse_result.errors and any(e.field == "headers" for e in parse_result.errors):
-            upload.status = UploadStatus.FAILED.value
-            upload.errors = {
-                "message": "Failed to detect CSV format or missing required columns",
-                "errors": [{"field": e.field, "message": e.message} for e in parse_result.errors]
-            }
-            db.commit()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid CSV format: missing required columns"
-            )
+    return _job_response(upload, db)
 
-        # Ingest transactions with deduplication
-        ingestion_service = TransactionIngestionService(db)
-        ingestion_result = ingestion_service.ingest_transactions(
-            restaurant_id=restaurant.id,
-            upload_id=upload.id,
-            parse_result=parse_result,
-            file_bytes=content
-        )
 
-        # Check for file-level duplicate
-        if ingestion_result.errors and any(e.get("type") == "duplicate_file" for e in ingestion_result.errors):
-            upload.status = UploadStatus.FAILED.value
-            upload.errors = ingestion_result.to_dict()
-            db.commit()
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="This file has already been uploaded"
-            )
+@router.post("/uploads/{upload_id}/resume", response_model=UploadResponse)
+def resume_upload(
+    upload_id: UUID,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    runner: UploadJobRunner = Depends(get_upload_job_runner),
+):
+    """
+    Resume a failed or interrupted upload from its last checkpoint.
 
-        # Update upload status
-        success_rate = (ingestion_result.rows_inserted / ingestion_result.rows_processed
-                       if ingestion_result.rows_processed > 0 else 0)
+    Large uploads are committed in batches; rows up to the upload's
+    checkpoint are already stored and are skipped, so the same file can be
+    sent again without duplicating rows.
 
-        if success_rate == 1.0:
-            upload.status = UploadStatus.COMPLETED.value
-        elif success_rate > 0.5:
-            upload.status = UploadStatus.COMPLETED.value  # Partial success still counts as completed
-        else:
-            upload.status = UploadStatus.FAILED.value
+    A PROCESSING upload can only be resumed once its job has reported no
+    progress for UPLOAD_STALE_SECONDS, so two jobs never ingest it at once.
 
-        upload.errors = ingestion_result.to_dict()
-        db.commit()
+    Returns:
+        Upload ID and current status
+    """
+    restaurant = db.query(Restaurant).filter(Restaurant.owner_id == current_user.id).first()
+    if not restaurant:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
 
-        # Automatically run stockout detection after successful upload
-        stockouts_detected = 0
-        if upload.status == UploadStatus.COMPLETED.value and ingestion_result.rows_inserted > 0:
-            try:
-                from src.services.stockout_detection import StockoutDetectionService
-                detection_service = StockoutDetectionService(db)
-
-                # Analyze last 30 days for stockouts
-                stockout_results = detection_service.detect_likely_stockouts(
-                    restaurant_id=restaurant.id,
-                    days_to_analyze=30
-                )
+    upload = db.query(DataUpload).filter(
+        DataUpload.id == upload_id,
+        DataUpload.restaurant_id == restaurant.id
+    ).first()
 
-                # Auto-save high-confidence stockouts (>= 0.8)
-                from src.models.inventory import InventorySnapshot
-                for result in stockout_results:
-                    if result.confidence >= 0.8 and result.menu_item_id:
-                        # Check if already exists
-                        existing = db.query(InventorySnapshot).filter(
-                            InventorySnapshot.restaurant_id == restaurant.id,
-                            InventorySnapshot.menu_item_id == result.menu_item_id,
-                            InventorySnapshot.date == result.detected_date
-                        ).first()
-
-                        if not existing:
-                            new_snapshot = InventorySnapshot(
-                                restaurant_id=restaurant.id,
-                                menu_item_id=result.menu_item_id,
-                                date=result.detected_date,
-                                stockout_flag='Y',
-                                source='auto_detected'
-                            )
-                            db.add(new_snapshot)
-                            stockouts_detected += 1
-                        elif existing.stockout_flag != 'Y':
-                            existing.stockout_flag = 'Y'
-                            existing.source = 'auto_detected'
-                            stockouts_detected += 1
-
-                if stockouts_detected > 0:
-                    db.commit()
-            except Exception as e:
-                # Don't fail the upload if stockout detection fails
-                # Just log the error
-                import logging
-                logging.warning(f"Stockout detection failed after upload {upload.id}: {str(e)}")
-
-        # Build response message
-        message_parts = []
-        message_parts.append(f"Processed {ingestion_result.rows_processed} rows")
-        message_parts.append(f"{ingestion_result.rows_inserted} inserted")
-        if ingestion_result.rows_skipped_duplicate > 0:
-            message_parts.append(f"{ingestion_result.rows_skipped_duplicate} duplicates skipped")
-        if ingestion_result.rows_failed > 0:
-            message_parts.append(f"{ingestion_result.rows_failed} failed")
-        if stockouts_detected > 0:
-            message_parts.append(f"{stockouts_detected} stockouts auto-detected")
-
-        return UploadResponse(
-            upload_id=upload.id,
-            status=UploadStatus(upload.status),
-            message=", ".join(message_parts)
+    if not upload:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+
+    # Claim the upload atomically: failed, or processing by a job that has
+    # stopped reporting progress (its heartbeat is updated_at). Concurrent
+    # resumes and live jobs lose the race and get a 409.
+    stale_before = func.now() - timedelta(seconds=get_settings().UPLOAD_STALE_SECONDS)
+    claimed = db.execute(
+        update(DataUpload)
+        .where(
+            DataUpload.id == upload.id,
+            or_(
+                DataUpload.status == UploadStatus.FAILED.value,
+                and_(
+                    DataUpload.status == UploadStatus.PROCESSING.value,
+                    func.coalesce(DataUpload.updated_at, DataUpload.created_at) < stale_before
+                )
+            )
+        )
+        .values(status=UploadStatus.PENDING.value)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if not claimed:
+        db.refresh(upload)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                "Only failed uploads, or processing uploads whose job has stopped, "
+                f"can be resumed (status: {upload.status})"
+            )
         )
 
-    except HTTPException:
-        raise  # Re-raise HTTP exceptions
+    spool_path = _spool_upload(file, upload, db)
+    runner.submit(upload.id, restaurant.id, spool_path, resume=True)
+
+    return _job_response(upload, db)
+
+
+def _spool_upload(file: UploadFile, upload: DataUpload, db: Session) -> str:
+    """
+    Copy the uploaded file to a temp file the job can stream; returns its path.
+
+    Blocking - callers are plain `def` endpoints, which FastAPI runs in its
+    threadpool rather than on the event loop.
+    """
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as spool:
+            shutil.copyfileobj(file.file, spool)
     except Exception as e:
         upload.status = UploadStatus.FAILED.value
         upload.errors = {"error": str(e)}
@@ -280,6 +255,61 @@ async def upload_csv(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process CSV: {str(e)}"
         )
+    return spool.name
+
+
+def _job_response(upload: DataUpload, db: Session) -> UploadResponse:
+    """Build the upload response; inline jobs have already finished, so surface their failures."""
+    db.refresh(upload)
+    errors_data = upload.errors or {}
+    if upload.status == UploadStatus.FAILED.value:
+        failure = errors_data.get("failure")
+        if failure == "invalid_format":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid CSV format: missing required columns"
+            )
+        if failure == "file_mismatch":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=errors_data.get("message")
+            )
+        if failure == "duplicate_file":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This file has already been uploaded"
+            )
+        if failure == "resumable_upload":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=errors_data.get("message")
+            )
+        if failure == "error":
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=errors_data.get("message")
+            )
+
+    return UploadResponse(
+        upload_id=upload.id,
+        status=UploadStatus(upload.status),
+        message=errors_data.get("message") or "Upload accepted, processing in background"
+    )
+
+
+def _upload_status(upload: DataUpload) -> DataUploadStatus:
+    """Build the status payload; counters come from the live progress columns."""
+    errors_data = upload.errors or {}
+    return DataUploadStatus(
+        id=upload.id,
+        status=UploadStatus(upload.status),
+        rows_processed=upload.rows_processed or errors_data.get("rows_processed", upload.rows_processed),
+        rows_inserted=upload.rows_inserted or errors_data.get("rows_inserted", upload.rows_inserted),
+        rows_failed=upload.rows_failed or errors_data.get("rows_failed", upload.rows_failed),
+        checkpoint_row=upload.checkpoint_row,
+        message=errors_data.get("message"),
+        errors=errors_data.get("errors"),
+    )
 
 
 @router.get("/uploads/{upload_id}", response_model=DataUploadStatus)
@@ -302,14 +332,7 @@ def get_upload_status(
     if not upload:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
 
-    errors_data = upload.errors or {}
-    return DataUploadStatus(
-        id=upload.id,
-        status=UploadStatus(upload.status),
-        rows_processed=errors_data.get("rows_processed"),
-        rows_failed=errors_data.get("rows_failed"),
-        errors=errors_data.get("errors"),
-    )
+    return _upload_status(upload)
 
 
 @router.get("/uploads", response_model=DataUploadList)
@@ -326,18 +349,7 @@ def list_uploads(
         DataUpload.restaurant_id == restaurant.id
     ).order_by(DataUpload.created_at.desc()).limit(20).all()
 
-    result = []
-    for upload in uploads:
-        errors_data = upload.errors or {}
-        result.append(DataUploadStatus(
-            id=upload.id,
-            status=UploadStatus(upload.status),
-            rows_processed=errors_data.get("rows_processed"),
-            rows_failed=errors_data.get("rows_failed"),
-            errors=errors_data.get("errors"),
-        ))
-
-    return DataUploadList(uploads=result)
+    return DataUploadList(uploads=[_upload_status(upload) for upload in uploads])
 
 from src.services.data_health import DataHealthService
 from src.schemas.data import DataHealthScoreResponse
@@ -21,6 +21,11 @@ class GenerateForecastRequest(BaseModel):
     days_ahead: int = 7
     category: Optional[str] = None
 
+class GenerateBulkForecastRequest(BaseModel):
+    menu_item_names: Optional[List[str]] = None  # Default: all active menu items
+    days_ahead: int = 7
+    category: Optional[str] = None
+
 class ForecastPoint(BaseModel):
     date: date
     mean: float
@@ -37,6 +42,22 @@ class ForecastResponse(BaseModel):
     history: List[HistoryPoint]
     forecast: List[ForecastPoint]
 
+class ItemForecast(BaseModel):
+    menu_item_name: str
+    forecast: List[ForecastPoint]
+
+def _to_points(results: List[DemandForecast]) -> List[ForecastPoint]:
+    return [
+        ForecastPoint(
+            date=r.forecast_date,
+            mean=float(r.predicted_quantity),
+            p10=float(r.p10_quantity or r.predicted_quantity),
+            p50=float(r.p50_quantity or r.predicted_quantity),
+            p90=float(r.p90_quantity or r.predicted_quantity)
+        )
+        for r in results
+    ]
+
 @router.post("/generate", response_model=List[ForecastPoint])
 def generate_forecast(
     req: GenerateForecastRequest,
@@ -61,15 +82,33 @@ def generate_forecast(
         category=req.category
     )
 
+    return _to_points(results)
+
+@router.post("/generate/bulk", response_model=List[ItemForecast])
+def generate_bulk_forecast(
+    req: GenerateBulkForecastRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Generate forecasts for many (by default all active) menu items at once.
+    """
+    from src.models.restaurant import Restaurant
+    restaurant = db.execute(select(Restaurant).where(Restaurant.owner_id == current_user.id)).scalar_one_or_none()
+    if not restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found for user")
+
+    service = ForecastService(db)
+    results = service.generate_bulk_forecasts(
+        restaurant_id=restaurant.id,
+        menu_item_names=req.menu_item_names,
+        days_ahead=req.days_ahead,
+        category=req.category
+    )
+
     return [
-        ForecastPoint(
-            date=r.forecast_date,
-            mean=float(r.predicted_quantity),
-            p10=float(r.p10_quantity or r.predicted_quantity),
-            p50=float(r.p50_quantity or r.predicted_quantity),
-            p90=float(r.p90_quantity or r.predicted_quantity)
-        )
-        for r in results
+        ItemForecast(menu_item_name=name, forecast=_to_points(records))
+        for name, records in results.items()
     ]
 
 @router.get("/", response_model=ForecastResponse)
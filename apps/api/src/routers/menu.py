@@ -23,6 +23,7 @@ from src.schemas.menu import (
     MenuItemResponse,
     MenuItemUpdate,
 )
+from src.services.daily_sales import DailySalesRollupService
 from src.services.menu_categorization import MenuCategorizationService
 
 router = APIRouter(prefix="/menu-items", tags=["menu-items"])
@@ -215,16 +216,28 @@ def merge_menu_items(
         )
 
     # Update transaction items to reference target
-    # Note: TransactionItem uses menu_item_name string, not FK
-    # So we update items with matching name
     update_stmt = (
         update(TransactionItem)
-        .where(TransactionItem.menu_item_name == source_item.name)
-        .values(menu_item_name=target_item.name)
+        .where(
+            TransactionItem.restaurant_id == restaurant.id,
+            TransactionItem.menu_item_name == source_item.name
+        )
+        .values(menu_item_name=target_item.name, menu_item_id=target_item.id)
     )
     result = db.execute(update_stmt)
     transactions_updated = result.rowcount
 
+    # Rows under other names that resolved to the source keep their name
+    db.execute(
+        update(TransactionItem)
+        .where(
+            TransactionItem.restaurant_id == restaurant.id,
+            TransactionItem.menu_item_id == source_item.id
+        )
+        .values(menu_item_id=target_item.id)
+    )
+    DailySalesRollupService(db).refresh(restaurant.id, item_names=[source_item.name, target_item.name])
+
     # Update target's first_seen if source is older
     if source_item.first_seen and target_item.first_seen:
         if source_item.first_seen < target_item.first_seen:
@@ -18,12 +18,16 @@ from src.db.session import get_db
 from src.models.user import User
 from src.routers.auth import get_current_user
 from src.services.cogs_calculator import COGSCalculator
+from src.services.daily_sales import DailySalesRollupService
 from src.services.recipe_explosion import RecipeExplosionService
 from src.services.menu_ocr import MenuOCRService
 
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
+# Weeks of sales history behind the BCG volume split
+BCG_VOLUME_WEEKS = 12
+
 
 # Helper to get restaurant
 def get_user_restaurant(db: Session, current_user: User):
@@ -190,6 +194,11 @@ def get_menu_profitability(
     margins = [r.margin_percentage for r in results]
     median_margin = sorted(margins)[len(margins) // 2] if margins else Decimal(25)
 
+    # Volume: average weekly units over recent weeks, split at the median
+    weekly_volumes = DailySalesRollupService(db).average_weekly_quantity(restaurant.id, weeks=BCG_VOLUME_WEEKS)
+    volumes = sorted(weekly_volumes.get(r.menu_item_name, 0.0) for r in results)
+    median_volume = volumes[len(volumes) // 2]
+
     # Convert to response format with BCG quadrant
     items = []
     low_margin_count = 0
@@ -198,9 +207,8 @@ def get_menu_profitability(
         if result.margin_percentage < 20:
             low_margin_count += 1
 
-        # TODO: Get actual volume data for proper BCG categorization
-        # For now, assume all items are "medium" volume
-        bcg = calculator.categorize_bcg(result, median_margin, is_high_volume=False)
+        is_high_volume = weekly_volumes.get(result.menu_item_name, 0.0) > median_volume
+        bcg = calculator.categorize_bcg(result, median_margin, is_high_volume=is_high_volume)
 
         items.append(ProfitabilityResponse(
             menu_item_id=result.menu_item_id,
@@ -44,6 +44,7 @@ class CSVPreviewResponse(BaseModel):
     warnings: List[str] = Field(default_factory=list, description="General warnings")
     success_rate: float = Field(description="Percentage of rows parsed successfully")
     schema_detected: bool = Field(description="Whether required columns were found")
+    date_format: Optional[str] = Field(None, description="Date format inferred for the file, if any")
 
     class Config:
         json_encoders = {
@@ -48,11 +48,14 @@ class UploadResponse(BaseModel):
 
 
 class DataUploadStatus(BaseModel):
-    """Status of a data upload."""
+    """Status of a data upload, including live progress while processing."""
     id: UUID
     status: UploadStatus
     rows_processed: Optional[int] = None
+    rows_inserted: Optional[int] = None
     rows_failed: Optional[int] = None
+    checkpoint_row: Optional[int] = None  # Last committed CSV row (resume point)
+    message: Optional[str] = None
     errors: Optional[list] = None
 
     class Config:
@@ -0,0 +1,319 @@
+"""
+Cached seasonality and prior profiles per category context.
+
+Forecasts derive day-of-week seasonality and a Gamma prior from the last
+90 days of a category's sales. Both only need a few aggregates: for each
+weekday, the number of dates with sales and their summed quantity, plus
+the number of item-day observations and their total. CategoryProfileService
+computes these in one SQL aggregate and keeps them:
+- in memory per process, for CATEGORY_PROFILE_TTL_SECONDS
+- in category_profiles, valid for the day they were computed on
+
+Category contexts are "Global" (every linked item of the restaurant) or a
+category_path prefix such as "Entrees > Beef": items whose path is that
+category or lies below it. A category is profiled with its ancestors
+(e.g. "Entrees" and "Entrees > Beef") in one grouped query over the
+top-level category's items, for hierarchical priors.
+
+DailySalesRollupService.refresh and categorization passes delete a
+restaurant's stored profiles and, once their transaction commits, drop its
+in-memory entries, so every ingestion that touches a restaurant
+invalidates them; other processes pick the change up once their in-memory
+entries expire.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import and_, delete, event, extract, func, or_, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from src.core.config import get_settings
+from src.models.forecast import CategoryProfile
+from src.models.menu import MenuItem
+from src.models.transaction import DailyItemSales
+
+
+def seasonality_multipliers(dow_dates: List[int], dow_quantity: List[float]) -> Dict[int, float]:
+    """
+    Day-of-week multipliers from per-weekday date counts and quantity sums.
+
+    Each weekday's mean daily quantity over the overall mean, shrunk toward
+    1.0 for weekdays seen on fewer than 4 (strong) or 8 (moderate) dates and
+    capped to [0.3, 3.0].
+    """
+    total_dates = sum(dow_dates)
+    if total_dates == 0:
+        return {i: 1.0 for i in range(7)}
+
+    global_mean = sum(dow_quantity) / total_dates
+    if global_mean == 0:
+        return {i: 1.0 for i in range(7)}
+
+    multipliers = {}
+    for i in range(7):
+        day_count = dow_dates[i]
+        # Raw multiplier = observed mean / global mean (1.0 for unseen weekdays)
+        m = (dow_quantity[i] / day_count) / global_mean if day_count else 1.0
+        if np.isnan(m):
+            m = 1.0
+
+        # Apply shrinkage toward 1.0 for days with limited data
+        if day_count < 4:
+            m = 0.7 * m + 0.3 * 1.0
+        elif day_count < 8:
+            m = 0.85 * m + 0.15 * 1.0
+
+        # Conservative capping to prevent extreme outliers
+        m = max(0.3, min(m, 3.0))
+
+        multipliers[i] = float(m)
+
+    return multipliers
+
+
+GLOBAL_CATEGORY = "Global"
+
+# Separator between levels of MenuItem.category_path
+CATEGORY_SEPARATOR = " > "
+
+
+def category_levels(category: str) -> List[str]:
+    """
+    A category context and its ancestors, top level first.
+
+    "Entrees>Beef > Steaks" -> ["Entrees", "Entrees > Beef", "Entrees > Beef > Steaks"];
+    "Global" -> ["Global"].
+    """
+    parts = [part.strip() for part in category.split(">") if part.strip()]
+    if not parts or category == GLOBAL_CATEGORY:
+        return [GLOBAL_CATEGORY]
+    return [CATEGORY_SEPARATOR.join(parts[:i + 1]) for i in range(len(parts))]
+
+
+def category_filter(category: str):
+    """
+    SQL condition selecting MenuItem rows in a category context.
+
+    Matches the category itself and its subcategories, as prefix scans of
+    idx_menu_items_restaurant_category_path; "Global" matches every item.
+    """
+    if category == GLOBAL_CATEGORY:
+        return true()
+    escaped = category.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return or_(
+        MenuItem.category_path == category,
+        MenuItem.category_path.like(escaped + CATEGORY_SEPARATOR + "%", escape="\\")
+    )
+
+
+@dataclass(frozen=True)
+class CategoryStats:
+    """Aggregates of a category's daily sales over a window."""
+    as_of: date
+    window_days: int
+    dow_dates: Tuple[int, ...]
+    dow_quantity: Tuple[float, ...]
+    sample_count: int
+    sample_sum: float
+
+    @property
+    def seasonality(self) -> Dict[int, float]:
+        """DOW -> multiplier (see seasonality_multipliers)."""
+        return seasonality_multipliers(list(self.dow_dates), list(self.dow_quantity))
+
+
+# (restaurant_id, category, window_days) -> (expiry on time.monotonic(), stats)
+_memory: Dict[Tuple[UUID, str, int], Tuple[float, CategoryStats]] = {}
+_memory_lock = threading.Lock()
+
+
+class CategoryProfileService:
+    """Loads, computes and invalidates category profiles."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, restaurant_id: UUID, category: str, days: int = 90) -> CategoryStats:
+        """Profile of a category context over the last `days` days (see get_hierarchy)."""
+        return self.get_hierarchy(restaurant_id, category, days)[-1][1]
+
+    def get_hierarchy(
+        self,
+        restaurant_id: UUID,
+        category: str,
+        days: int = 90
+    ) -> List[Tuple[str, CategoryStats]]:
+        """
+        Profiles of a category context and its ancestors, top level first.
+
+        Served from memory, then from category_profiles; computed only
+        when some level has no profile for today. Computed profiles are
+        written in the caller's transaction and persist once it commits.
+
+        Returns:
+            [(category, stats)] for each of category_levels(category)
+        """
+        today = date.today()
+        levels = category_levels(category)
+
+        found: Dict[str, CategoryStats] = {}
+        with _memory_lock:
+            now = time.monotonic()
+            for level in levels:
+                cached = _memory.get((restaurant_id, level, days))
+                if cached is not None and cached[0] > now and cached[1].as_of == today:
+                    found[level] = cached[1]
+
+        missing = [level for level in levels if level not in found]
+        if missing:
+            for level in missing:
+                stats = self._load(restaurant_id, level, days, today)
+                if stats is not None:
+                    found[level] = stats
+            if any(level not in found for level in levels):
+                computed = self.compute_hierarchy(restaurant_id, category, days, today)
+                for level, stats in computed.items():
+                    self._store(restaurant_id, level, stats)
+                found.update(computed)
+
+            expires = time.monotonic() + get_settings().CATEGORY_PROFILE_TTL_SECONDS
+            with _memory_lock:
+                for level in levels:
+                    _memory[(restaurant_id, level, days)] = (expires, found[level])
+
+        return [(level, found[level]) for level in levels]
+
+    def compute(self, restaurant_id: UUID, category: str, days: int, as_of: date) -> CategoryStats:
+        """Aggregate one category context's profile from daily_item_sales."""
+        return self.compute_hierarchy(restaurant_id, category, days, as_of)[category_levels(category)[-1]]
+
+    def compute_hierarchy(
+        self,
+        restaurant_id: UUID,
+        category: str,
+        days: int,
+        as_of: date
+    ) -> Dict[str, CategoryStats]:
+        """
+        Aggregate the profiles of a category context and its ancestors in one query.
+
+        Only the top-level category's items are read; each level's totals
+        are FILTERed aggregates over them.
+
+        Returns:
+            Dict of category level -> stats, for each of category_levels(category)
+        """
+        start_date = as_of - timedelta(days=days)
+        levels = category_levels(category)
+
+        # Per date: each level's total quantity and item-day count
+        daily_columns = [DailyItemSales.business_date]
+        for i, level in enumerate(levels):
+            in_level = category_filter(level)
+            daily_columns.append(func.sum(DailyItemSales.quantity).filter(in_level).label(f"quantity_{i}"))
+            daily_columns.append(func.count().filter(in_level).label(f"samples_{i}"))
+
+        daily = (
+            select(*daily_columns)
+            .join(MenuItem, and_(
+                MenuItem.name == DailyItemSales.menu_item_name,
+                MenuItem.restaurant_id == restaurant_id
+            ))
+            .where(
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.business_date >= start_date,
+                category_filter(levels[0])
+            )
+            .group_by(DailyItemSales.business_date)
+            .subquery()
+        )
+
+        # Per weekday: each level's dates with sales, quantity and samples
+        isodow = extract("isodow", daily.c.business_date)
+        weekday_columns = [isodow.label("isodow")]
+        for i in range(len(levels)):
+            samples = daily.c[f"samples_{i}"]
+            weekday_columns.append(func.count().filter(samples > 0).label(f"dates_{i}"))
+            weekday_columns.append(func.coalesce(func.sum(daily.c[f"quantity_{i}"]), 0).label(f"quantity_{i}"))
+            weekday_columns.append(func.coalesce(func.sum(samples), 0).label(f"samples_{i}"))
+
+        rows = self.db.execute(select(*weekday_columns).group_by(isodow)).all()
+
+        profiles = {}
+        for i, level in enumerate(levels):
+            dow_dates = [0] * 7
+            dow_quantity = [0.0] * 7
+            sample_count = 0
+            for row in rows:
+                dow = int(row.isodow) - 1  # ISO Monday=1 -> pandas dayofweek Monday=0
+                dow_dates[dow] = int(row._mapping[f"dates_{i}"])
+                dow_quantity[dow] = float(row._mapping[f"quantity_{i}"])
+                sample_count += int(row._mapping[f"samples_{i}"])
+
+            profiles[level] = CategoryStats(
+                as_of=as_of,
+                window_days=days,
+                dow_dates=tuple(dow_dates),
+                dow_quantity=tuple(dow_quantity),
+                sample_count=sample_count,
+                sample_sum=float(sum(dow_quantity)),
+            )
+        return profiles
+
+    def invalidate(self, restaurant_id: UUID):
+        """
+        Delete a restaurant's stored profiles in the caller's transaction.
+
+        Its in-memory profiles are dropped once that transaction commits;
+        dropping them earlier would let a concurrent forecast re-cache
+        profiles of the data being replaced.
+        """
+        self.db.execute(delete(CategoryProfile).where(CategoryProfile.restaurant_id == restaurant_id))
+        event.listen(self.db, "after_commit", lambda session: clear_memory(restaurant_id), once=True)
+
+    def _load(self, restaurant_id: UUID, category: str, days: int, as_of: date) -> Optional[CategoryStats]:
+        """Stored profile computed today over the same window, if any."""
+        row = self.db.get(CategoryProfile, (restaurant_id, category))
+        if row is None or row.as_of != as_of or row.window_days != days:
+            return None
+        return CategoryStats(
+            as_of=row.as_of,
+            window_days=row.window_days,
+            dow_dates=tuple(row.dow_dates),
+            dow_quantity=tuple(row.dow_quantity),
+            sample_count=row.sample_count,
+            sample_sum=row.sample_sum,
+        )
+
+    def _store(self, restaurant_id: UUID, category: str, stats: CategoryStats):
+        """Upsert a computed profile (committed by the caller)."""
+        values = {
+            "restaurant_id": restaurant_id,
+            "category": category,
+            "as_of": stats.as_of,
+            "window_days": stats.window_days,
+            "dow_dates": list(stats.dow_dates),
+            "dow_quantity": list(stats.dow_quantity),
+            "sample_count": stats.sample_count,
+            "sample_sum": stats.sample_sum,
+        }
+        stmt = pg_insert(CategoryProfile).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CategoryProfile.restaurant_id, CategoryProfile.category],
+            set_={**{k: v for k, v in values.items() if k not in ("restaurant_id", "category")},
+                  "computed_at": func.now()}
+        )
+        self.db.execute(stmt)
+
+
+def clear_memory(restaurant_id: Optional[UUID] = None):
+    """Drop in-memory profiles of one restaurant (or all)."""
+    with _memory_lock:
+        for key in [k for k in _memory if restaurant_id is None or k[0] == restaurant_id]:
+            del _memory[key]
@@ -0,0 +1,432 @@
+"""
+Columnar CSV parsing backend built on pandas/NumPy.
+
+Instead of building a Pydantic ParsedRow per record, a whole chunk of
+records is turned into typed columns and validated with vectorized string
+and numeric operations. Rows that are clean in the common, simple shapes
+(plain decimal prices, integer quantities, the file's inferred date
+format) never leave the columnar path; every other row is handed to
+CSVParser.parse_row, so errors and edge cases behave exactly as in the
+row-at-a-time parser.
+
+Output is a ParsedBatch: a DataFrame of clean rows plus the row-level
+ValidationErrors. Batches expose `parsed_rows` as lightweight
+ParsedRecord tuples, so TransactionIngestionService.ingest_stream
+consumes a ColumnarCSVStream exactly like a CSVStream.
+"""
+import io
+import itertools
+from functools import cached_property
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.services.csv_parser import (
+    CSVParser,
+    CSVStream,
+    FileDateParser,
+    ParsedRow,
+    ValidationError,
+)
+from src.services.promotion_detection import PromotionDetectionService
+
+# Records per batch yielded by ColumnarCSVStream
+COLUMNAR_CHUNK_SIZE = 50000
+
+
+class ParsedRecord(NamedTuple):
+    """Plain-tuple twin of ParsedRow, materialized from a ParsedBatch."""
+    date: object
+    item_name: str
+    quantity: int
+    unit_price: Decimal
+    total: Decimal
+    raw_item_name: str
+    row_number: int
+    warnings: List[str]
+    discount_amount: Optional[Decimal]
+    is_promotion: bool
+    promotion_type: Optional[str]
+
+
+class ParsedBatch:
+    """
+    A chunk of parsed records in columnar form.
+
+    `frame` holds one column per ParsedRow field for the rows that parsed
+    cleanly, ordered by row number; `errors` holds the rows that failed.
+    """
+
+    def __init__(self, frame: pd.DataFrame, errors: List[ValidationError]):
+        self.frame = frame
+        self.errors = errors
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @cached_property
+    def parsed_rows(self) -> List[ParsedRecord]:
+        """Clean rows as ParsedRecord tuples, in file order."""
+        return list(map(ParsedRecord._make, zip(*(self.frame[f].tolist() for f in ParsedRecord._fields))))
+
+
+class ColumnarCSVParser(CSVParser):
+    """
+    CSVParser whose streaming mode parses chunks of records column-wise.
+
+    Only stream_csv changes; parse_csv and parse_row behave as in CSVParser.
+    """
+
+    # Values the vectorized path accepts as-is; anything else (exponents,
+    # signs, very long numbers, ...) goes through parse_row
+    SIMPLE_QUANTITY = r"[0-9]{1,9}(?:\.[0-9]*)?"
+    SIMPLE_DECIMAL = r"-?[0-9]{1,12}(?:\.[0-9]{1,8})?"
+    SIMPLE_EMBEDDED_QUANTITY = r"[0-9]{1,9}"
+
+    def stream_csv(
+        self,
+        file_obj: BinaryIO,
+        chunk_size: int = COLUMNAR_CHUNK_SIZE
+    ) -> "ColumnarCSVStream":
+        """
+        Open a columnar streaming parse over a binary file object.
+
+        Args:
+            file_obj: Seekable binary file object (e.g. a spooled upload)
+            chunk_size: Maximum number of records per yielded batch
+
+        Returns:
+            ColumnarCSVStream whose result already reflects header validation
+        """
+        encoding = self.detect_stream_encoding(file_obj)
+
+        text = io.TextIOWrapper(file_obj, encoding=encoding, newline="")
+        return ColumnarCSVStream(self, text, encoding, chunk_size=chunk_size)
+
+    def parse_records(
+        self,
+        headers: List[str],
+        columns: Dict[str, Optional[str]],
+        records: List[List[str]],
+        first_row: int,
+        dates: FileDateParser
+    ) -> ParsedBatch:
+        """
+        Parse a chunk of raw csv.reader records column-wise.
+
+        Args:
+            headers: CSV column headers
+            columns: Column mapping from resolve_columns
+            records: Non-blank records, in file order
+            first_row: Row number of the first record
+            dates: Per-file date parser (see create_date_parser)
+
+        Returns:
+            ParsedBatch of clean rows and row-level errors
+        """
+        count = len(records)
+        row_numbers = np.arange(first_row, first_row + count)
+        width = len(headers)
+
+        # Ragged records are left to parse_row (csv.DictReader semantics)
+        ok = np.fromiter((len(r) == width for r in records), dtype=bool, count=count)
+
+        def column(field: str) -> Optional[_Column]:
+            name = columns[field]
+            if not name:
+                return None
+            # Duplicate header names resolve to the last column, like DictReader
+            idx = width - 1 - headers[::-1].index(name)
+            return _Column([r[idx] if idx < len(r) else "" for r in records])
+
+        # Dates
+        date_col = column("date")
+        date_values = self._parse_dates(date_col.values, dates)
+        ok &= date_col.take(
+            date_values.notna() & (date_values <= dates.now) & (date_values.dt.year >= dates.min_year)
+        )
+
+        # Item names: embedded quantities, normalization and promo keywords
+        item_col = column("item")
+        items = item_col.values
+        embedded, clean_item, item_ok = self._extract_quantities(items)
+        ok &= item_col.take(item_ok & (items.str.len() > 0))
+        item_name = self._normalize_names(clean_item)
+        has_keyword = items.str.lower().str.contains(PromotionDetectionService.KEYWORD_PATTERN, regex=True)
+
+        # Quantity: int(float(value)) for plain non-negative numbers
+        qty_col = column("quantity")
+        qty_ok = qty_col.values.str.fullmatch(self.SIMPLE_QUANTITY).fillna(False).astype(bool)
+        base_qty = qty_col.values.where(qty_ok, "0").str.split(".").str[0].astype(np.int64)
+        ok &= qty_col.take(qty_ok & (base_qty > 0))
+        quantity = qty_col.take(base_qty) * item_col.take(embedded)
+
+        # Prices, totals and discounts
+        price_col = column("unit_price")
+        total_col = column("total")
+        price_num = self._decimal_values(price_col, ok, count)
+        total_num = self._decimal_values(total_col, ok, count)
+
+        discount_col = column("discount")
+        if discount_col is not None:
+            has_discount = discount_col.values.str.len() > 0
+            discount_ok = discount_col.values.str.fullmatch(self.SIMPLE_DECIMAL).fillna(False).astype(bool)
+            ok &= discount_col.take(~has_discount | discount_ok)
+            discount_num = discount_col.take(
+                pd.to_numeric(discount_col.values.where(has_discount & discount_ok), errors="coerce").abs()
+            )
+        else:
+            discount_num = np.full(count, np.nan)
+
+        # Promotion detection, in PromotionDetectionService order
+        explicit = discount_num > 0
+        comp_void = ~explicit & ((np.nan_to_num(price_num) < 0) | (np.nan_to_num(total_num) < 0))
+        keyword = ~explicit & ~comp_void & item_col.take(has_keyword)
+
+        # Assemble the clean rows
+        clean = np.flatnonzero(ok)
+        quantities = quantity[clean]
+        frame = pd.DataFrame({
+            "date": date_col.take(np.asarray(date_values.dt.to_pydatetime(), dtype=object))[clean],
+            "item_name": item_col.take(item_name.to_numpy(dtype=object))[clean],
+            "quantity": quantities,
+            "raw_item_name": item_col.take(items.to_numpy(dtype=object))[clean],
+            "row_number": row_numbers[clean],
+            "is_promotion": (explicit | comp_void | keyword)[clean],
+            "promotion_type": np.select(
+                [explicit[clean], comp_void[clean], keyword[clean]],
+                ["explicit", "comp_void", "keyword"],
+                default="none"
+            ).astype(object),
+        })
+
+        # Decimals are built once per distinct value, and only for clean rows
+        prices = price_col.take(price_col.decimals())[clean] if price_col is not None else None
+        totals = total_col.take(total_col.decimals())[clean] if total_col is not None else None
+        if prices is None:
+            prices = [t / int(q) for t, q in zip(totals, quantities)]
+        if totals is None:
+            totals = [p * int(q) for p, q in zip(prices, quantities)]
+        frame["unit_price"] = pd.Series(list(prices), dtype=object)
+        frame["total"] = pd.Series(list(totals), dtype=object)
+
+        discounts = np.full(len(clean), None, dtype=object)
+        explicit_rows = np.flatnonzero(explicit[clean])
+        if len(explicit_rows):
+            discounts[explicit_rows] = [abs(d) for d in discount_col.take(discount_col.decimals())[clean][explicit_rows]]
+        for pos in np.flatnonzero(comp_void[clean]):
+            # Detection sees the line total as read from the file (0 if absent)
+            total_value = Decimal(total_col.values.iat[total_col.codes[clean[pos]]]) if total_col is not None else None
+            discounts[pos] = abs(total_value if total_value else Decimal(0))
+        frame["discount_amount"] = discounts
+
+        frame["warnings"] = pd.Series(self._row_warnings(
+            item_col.take(embedded)[clean],
+            price_num[clean] if price_col is not None else None,
+            total_num[clean] if total_col is not None else None,
+        ), dtype=object)
+
+        # Everything else takes the row-at-a-time path
+        slow_parsed: List[ParsedRow] = []
+        errors: List[ValidationError] = []
+        for pos in np.flatnonzero(~ok):
+            row_num = int(row_numbers[pos])
+            parsed, error = self.parse_row(_record_to_row(headers, records[pos]), row_num, columns, dates)
+            if error:
+                errors.append(error)
+            else:
+                slow_parsed.append(parsed)
+        self.classify_promotions(slow_parsed, has_total=columns["total"] is not None)
+        slow_rows = [_to_record(parsed) for parsed in slow_parsed]
+
+        frame = frame[list(ParsedRecord._fields)]
+        if slow_rows:
+            slow_frame = pd.DataFrame(slow_rows, columns=list(ParsedRecord._fields)).astype(object)
+            frame = pd.concat([frame.astype(object), slow_frame], ignore_index=True)
+            frame = frame.sort_values("row_number", kind="stable", ignore_index=True)
+
+        return ParsedBatch(frame, errors)
+
+    def _parse_dates(self, values: pd.Series, dates: FileDateParser) -> pd.Series:
+        """Parse with the file's locked-in format; NaT where it doesn't apply."""
+        date_format = dates.date_format
+        if date_format is None:
+            return pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+
+        try:
+            parsed = pd.to_datetime(
+                values,
+                format="ISO8601" if date_format == FileDateParser.ISO else date_format,
+                errors="coerce"
+            )
+        except (ValueError, TypeError):
+            parsed = None
+
+        if parsed is None or isinstance(parsed.dtype, pd.DatetimeTZDtype):
+            # Mixed or timezone-aware values - parse each one with the fast path
+            parsed = pd.to_datetime(
+                values.map(lambda value: FileDateParser.parse_with_format(value, date_format)),
+                errors="coerce"
+            )
+
+        return parsed
+
+    def _extract_quantities(self, items: pd.Series):
+        """Vectorized extract_quantity_from_name; returns (qty, name, ok mask)."""
+        embedded = pd.Series(1, index=items.index, dtype=np.int64)
+        clean_item = items.copy()
+        ok = pd.Series(True, index=items.index)
+        unmatched = pd.Series(True, index=items.index)
+
+        for pattern in self.QUANTITY_PATTERNS:
+            if not unmatched.any():
+                break
+            groups = items[unmatched].str.extract(pattern)
+            groups = groups[groups[0].notna()]
+            if groups.empty:
+                continue
+            qty_first = groups[0].str.isdigit().astype(bool)
+            qty_str = groups[0].where(qty_first, groups[1])
+            name = groups[1].where(qty_first, groups[0]).str.strip()
+
+            simple = qty_str.str.fullmatch(self.SIMPLE_EMBEDDED_QUANTITY).fillna(False).astype(bool)
+            ok.loc[groups.index] = simple
+            embedded.loc[groups.index] = qty_str.where(simple, "1").astype(np.int64)
+            clean_item.loc[groups.index] = name
+            unmatched.loc[groups.index] = False
+
+        return embedded, clean_item, ok
+
+    @staticmethod
+    def _normalize_names(names: pd.Series) -> pd.Series:
+        """Vectorized normalize_item_name."""
+        normalized = names.str.strip().str.lower()
+        normalized = normalized.str.replace(r'\s+', ' ', regex=True)
+        normalized = normalized.str.replace(r'[^a-z0-9\s\-\'&]', '', regex=True)
+        return normalized.str.strip()
+
+    def _decimal_values(self, col: Optional["_Column"], ok: np.ndarray, count: int) -> np.ndarray:
+        """Validate a price-like column (clearing `ok` in place); returns floats per row."""
+        if col is None:
+            return np.full(count, np.nan)
+        simple = col.values.str.fullmatch(self.SIMPLE_DECIMAL).fillna(False).astype(bool)
+        ok &= col.take(simple)
+        return col.take(pd.to_numeric(col.values.where(simple), errors="coerce"))
+
+    @staticmethod
+    def _row_warnings(
+        embedded: np.ndarray,
+        price: Optional[np.ndarray],
+        total: Optional[np.ndarray]
+    ) -> List[List[str]]:
+        """Per-row warnings in parse_row order."""
+        count = len(embedded)
+        no_values = np.full(count, np.nan)
+        price = no_values if price is None else price
+        total = no_values if total is None else total
+
+        warnings = [[] for _ in range(count)]
+        for pos in np.flatnonzero((embedded > 1) | (price <= 0) | (total < 0)):
+            row_warnings = warnings[pos]
+            if embedded[pos] > 1:
+                row_warnings.append(f"Extracted quantity {embedded[pos]} from item name")
+            if price[pos] < 0:
+                row_warnings.append("Negative unit price (possible refund/discount)")
+            elif price[pos] == 0:
+                row_warnings.append("Zero unit price (comp/staff meal)")
+            if total[pos] < 0:
+                row_warnings.append("Negative total (possible refund)")
+        return warnings
+
+
+class _Column:
+    """
+    Dictionary-encoded string column.
+
+    POS exports repeat the same item names, prices and timestamps many
+    times, so every check runs once per distinct value and is broadcast
+    back to rows through the codes.
+    """
+
+    def __init__(self, values: List[str]):
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        self.codes = codes
+        self.values = pd.Series(uniques, dtype=object).str.strip()
+
+    def take(self, per_value) -> np.ndarray:
+        """Broadcast a per-distinct-value result to rows."""
+        return np.asarray(per_value)[self.codes]
+
+    def decimals(self) -> np.ndarray:
+        """Decimal per distinct value (None where not a valid Decimal)."""
+        out = np.full(len(self.values), None, dtype=object)
+        for i, value in enumerate(self.values):
+            try:
+                out[i] = Decimal(value)
+            except InvalidOperation:
+                pass
+        return out
+
+
+class ColumnarCSVStream(CSVStream):
+    """
+    CSVStream that yields ParsedBatches of up to chunk_size records.
+
+    Shares header handling and running totals with CSVStream; rows are
+    read as raw records and parsed by ColumnarCSVParser.parse_records.
+    """
+
+    def __iter__(self) -> Iterator[ParsedBatch]:
+        if self._reader is None:
+            return
+
+        result = self.result
+        headers = self._reader.fieldnames
+        records = (record for record in self._reader.reader if record)  # DictReader skips blank lines
+        records = itertools.islice(records, self.skip_rows, None)
+        first_row = 2 + self.skip_rows  # Header is row 1
+        dates = None
+
+        try:
+            while True:
+                chunk = list(itertools.islice(records, self.chunk_size))
+                if not chunk:
+                    break
+
+                if dates is None:
+                    # Infer the file's date format from its leading rows
+                    date_col = self.columns["date"]
+                    samples = [
+                        dict(zip(headers, record)).get(date_col, "")
+                        for record in chunk[:self.parser.DATE_SAMPLE_SIZE]
+                    ]
+                    dates = self.parser.create_date_parser(samples)
+                    result.date_format = dates.date_format
+
+                batch = self.parser.parse_records(headers, self.columns, chunk, first_row, dates)
+                first_row += len(chunk)
+                self.last_row = first_row - 1
+
+                result.total_rows += len(chunk)
+                result.parsed_count += len(batch)
+                result.error_count += len(batch.errors)
+                yield batch
+        finally:
+            self.close()
+
+
+def _record_to_row(headers: List[str], record: List[str]) -> Dict:
+    """Build the dict csv.DictReader would produce for a record."""
+    row = dict(zip(headers, record))
+    if len(record) > len(headers):
+        row[None] = record[len(headers):]
+    elif len(record) < len(headers):
+        for key in headers[len(record):]:
+            row[key] = None
+    return row
+
+
+def _to_record(row: ParsedRow) -> ParsedRecord:
+    return ParsedRecord(*(getattr(row, field) for field in ParsedRecord._fields))
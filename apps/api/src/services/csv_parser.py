@@ -3,18 +3,24 @@ CSV Parser service for detecting POS formats and parsing transaction data.
 
 Supports major POS systems: Toast, Square, Lightspeed, Clover, and generic formats.
 """
+import codecs
 import csv
 import io
+import itertools
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple
 
 import chardet
 from dateutil import parser as date_parser
 from pydantic import BaseModel, Field
 
+from src.services.promotion_detection import PromotionDetectionService
+
 
 class POSVendor(str, Enum):
     """Supported POS vendors."""
@@ -61,13 +67,31 @@ class ParseResult(BaseModel):
     errors: List[ValidationError]
     warnings: List[str] = Field(default_factory=list)
     encoding: str = "utf-8"
+    # Running counters, maintained while parsing. Streaming parses leave
+    # parsed_rows/errors empty and rely on these alone.
+    parsed_count: int = 0
+    error_count: int = 0
+    # Date format locked in for the file ("iso" or a strptime pattern);
+    # None means every row goes through dateutil
+    date_format: Optional[str] = None
+    # Item name cache lookups during this parse (see resolve_item_name)
+    item_name_cache_hits: int = 0
+    item_name_cache_misses: int = 0
 
     @property
     def success_rate(self) -> float:
         """Calculate parse success rate."""
         if self.total_rows == 0:
             return 0.0
-        return len(self.parsed_rows) / self.total_rows
+        return (self.parsed_count or len(self.parsed_rows)) / self.total_rows
+
+
+class ParseChunk(BaseModel):
+    """A bounded batch of rows produced by a streaming parse."""
+    parsed_rows: List[ParsedRow] = Field(default_factory=list)
+    errors: List[ValidationError] = Field(default_factory=list)
+    item_name_cache_hits: int = 0
+    item_name_cache_misses: int = 0
 
 
 class ColumnMapping(BaseModel):
@@ -80,6 +104,85 @@ class ColumnMapping(BaseModel):
     discount: List[str] = Field(default_factory=list, description="Optional discount column names")
 
 
+# Records per chunk yielded by CSVStream
+STREAM_CHUNK_SIZE = 1000
+
+
+class FileDateParser:
+    """
+    Date parsing for one file: a locked-in format with a dateutil fallback.
+
+    Rows matching the inferred format skip dateutil entirely; the rest are
+    parsed exactly as before. The future/5-year bounds are computed once
+    when the parser is created instead of on every row.
+    """
+
+    ISO = "iso"
+
+    def __init__(self, date_format: Optional[str] = None, now: Optional[datetime] = None):
+        self.date_format = date_format
+        self.now = now or datetime.now()
+        self.min_year = self.now.year - 5
+
+    @classmethod
+    def parse_with_format(cls, date_str: str, date_format: str) -> Optional[datetime]:
+        """Parse with a single format; None if the value doesn't match it."""
+        try:
+            if date_format == cls.ISO:
+                dt = datetime.fromisoformat(date_str.strip())
+                # Leave timezone-aware values to dateutil
+                return dt if dt.tzinfo is None else None
+            return datetime.strptime(date_str.strip(), date_format)
+        except ValueError:
+            return None
+
+    def parse(self, date_str: str, row_number: int) -> Tuple[Optional[datetime], Optional[ValidationError]]:
+        """
+        Parse and range-check a date value.
+
+        Args:
+            date_str: Date string to parse
+            row_number: Row number for error reporting
+
+        Returns:
+            Tuple of (parsed_datetime, error)
+        """
+        try:
+            dt = None
+            if self.date_format and date_str:
+                dt = self.parse_with_format(date_str, self.date_format)
+            if dt is None:
+                dt = date_parser.parse(date_str)
+
+            # Validate date is not in future
+            if dt > self.now:
+                return None, ValidationError(
+                    row_number=row_number,
+                    field="date",
+                    message="Date is in the future",
+                    raw_value=date_str
+                )
+
+            # Validate date is not too old (>5 years)
+            if dt.year < self.min_year:
+                return None, ValidationError(
+                    row_number=row_number,
+                    field="date",
+                    message="Date is more than 5 years old",
+                    raw_value=date_str
+                )
+
+            return dt, None
+
+        except (ValueError, TypeError) as e:
+            return None, ValidationError(
+                row_number=row_number,
+                field="date",
+                message=f"Invalid date format: {str(e)}",
+                raw_value=date_str
+            )
+
+
 class CSVParser:
     """
     Intelligent CSV parser with POS vendor detection and data normalization.
@@ -90,8 +193,40 @@ class CSVParser:
     - Normalizes item names (case, whitespace, embedded quantities)
     - Validates prices, quantities, dates
     - Supports multiple character encodings
+    - Streaming mode (stream_csv) for constant-memory parsing of large files
+    - Parallel mode (parse_csv with workers > 1) for large in-memory files
     """
 
+    # Bytes read from the head of a stream for encoding detection
+    ENCODING_SAMPLE_BYTES = 64 * 1024
+
+    # Records per process-pool task in parallel parses
+    PARALLEL_CHUNK_SIZE = 20000
+
+    # Leading date values sampled to infer a file's date format
+    DATE_SAMPLE_SIZE = 50
+
+    # Distinct raw item names memoized by resolve_item_name
+    ITEM_NAME_CACHE_SIZE = 4096
+
+    # Fast-path formats tried in order. Only formats dateutil reads the same
+    # way (month-first or unambiguous) are listed, so results never change.
+    DATE_FORMATS = [
+        FileDateParser.ISO,  # 2024-12-15, 2024-12-15 14:30:00, 2024-12-15T14:30
+        "%m/%d/%Y",  # 12/15/2024
+        "%m/%d/%Y %H:%M",  # 12/15/2024 14:30
+        "%m/%d/%Y %H:%M:%S",  # 12/15/2024 14:30:00
+        "%m/%d/%Y %I:%M %p",  # 12/15/2024 2:30 PM
+        "%m/%d/%y",  # 12/15/24
+        "%m/%d/%y %H:%M",  # 12/15/24 14:30
+        "%Y/%m/%d",  # 2024/12/15
+        "%Y/%m/%d %H:%M:%S",  # 2024/12/15 14:30:00
+        "%b %d, %Y",  # Dec 15, 2024
+        "%B %d, %Y",  # December 15, 2024
+        "%d %b %Y",  # 15 Dec 2024
+        "%d-%b-%Y",  # 15-Dec-2024
+    ]
+
     # Discount indicator keywords (case-insensitive)
     DISCOUNT_KEYWORDS = [
         'discount', 'promo', 'promotion', 'comp', 'void',
@@ -159,6 +294,9 @@ class CSVParser:
             max_preview_rows: Maximum number of rows to parse for preview
         """
         self.max_preview_rows = max_preview_rows
+        # Stateless without a DB - one instance serves the whole parse
+        self.promotion_detector = PromotionDetectionService(db=None)
+        self._item_name_cache = lru_cache(maxsize=self.ITEM_NAME_CACHE_SIZE)(self._resolve_item_name)
 
     def detect_encoding(self, file_bytes: bytes) -> str:
         """
@@ -184,6 +322,50 @@ class CSVParser:
 
         return encoding
 
+    def detect_stream_encoding(self, file_obj: BinaryIO) -> str:
+        """
+        Pick an encoding that decodes a whole seekable file without errors.
+
+        UTF-8 (which covers ASCII) is tried first over the full file, so a
+        plain-ASCII head does not hide UTF-8 names further down. Otherwise
+        the encoding chardet detects on the first ENCODING_SAMPLE_BYTES is
+        used if it decodes the file, else ISO-8859-1, which decodes any
+        byte. The file is left at position 0.
+
+        Args:
+            file_obj: Seekable binary file object
+
+        Returns:
+            Encoding name for a strict decode of the file
+        """
+        if self._decodes(file_obj, 'utf-8'):
+            return 'utf-8'
+
+        sample = file_obj.read(self.ENCODING_SAMPLE_BYTES)
+        file_obj.seek(0)
+        encoding = self.detect_encoding(sample)
+        if encoding != 'utf-8' and self._decodes(file_obj, encoding):
+            return encoding
+        return 'iso-8859-1'
+
+    def _decodes(self, file_obj: BinaryIO, encoding: str) -> bool:
+        """Whether the whole file decodes strictly; rewinds it afterwards."""
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+        except LookupError:
+            return False
+        try:
+            while True:
+                block = file_obj.read(self.ENCODING_SAMPLE_BYTES)
+                if not block:
+                    decoder.decode(b"", final=True)
+                    return True
+                decoder.decode(block)
+        except UnicodeDecodeError:
+            return False
+        finally:
+            file_obj.seek(0)
+
     def detect_vendor(self, headers: List[str]) -> POSVendor:
         """
         Detect POS vendor from CSV column headers.
@@ -294,6 +476,29 @@ class CSVParser:
 
         return normalized.strip()
 
+    def resolve_item_name(self, raw_item_name: str) -> Tuple[int, str, str]:
+        """
+        Extract the embedded quantity and normalize a raw item name.
+
+        POS exports repeat a few hundred names across millions of rows, so
+        results are memoized per parser in a bounded LRU cache.
+
+        Args:
+            raw_item_name: Stripped item name as it appears in the file
+
+        Returns:
+            Tuple of (embedded_qty, clean_name, normalized_name)
+        """
+        return self._item_name_cache(raw_item_name)
+
+    def item_name_cache_info(self):
+        """Hit/miss statistics of the item name cache (functools CacheInfo)."""
+        return self._item_name_cache.cache_info()
+
+    def _resolve_item_name(self, raw_item_name: str) -> Tuple[int, str, str]:
+        embedded_qty, clean_item_name = self.extract_quantity_from_name(raw_item_name)
+        return embedded_qty, clean_item_name, self.normalize_item_name(clean_item_name)
+
     def parse_date(self, date_str: str, row_number: int) -> Tuple[Optional[datetime], Optional[ValidationError]]:
         """
         Parse date string using python-dateutil (handles 15+ formats).
@@ -305,66 +510,57 @@ class CSVParser:
         Returns:
             Tuple of (parsed_datetime, error)
         """
-        try:
-            dt = date_parser.parse(date_str)
+        return FileDateParser().parse(date_str, row_number)
 
-            # Validate date is not in future
-            if dt > datetime.now():
-                return None, ValidationError(
-                    row_number=row_number,
-                    field="date",
-                    message="Date is in the future",
-                    raw_value=date_str
-                )
+    def infer_date_format(self, samples: List[str]) -> Optional[str]:
+        """
+        Pick the first fast-path format that reproduces dateutil on every sample.
 
-            # Validate date is not too old (>5 years)
-            if dt.year < datetime.now().year - 5:
-                return None, ValidationError(
-                    row_number=row_number,
-                    field="date",
-                    message="Date is more than 5 years old",
-                    raw_value=date_str
-                )
+        Args:
+            samples: Leading date values of a file
 
-            return dt, None
+        Returns:
+            Entry of DATE_FORMATS, or None if no format fits
+        """
+        expected = []
+        for value in samples:
+            if not value or not value.strip():
+                continue
+            try:
+                expected.append((value, date_parser.parse(value)))
+            except (ValueError, TypeError, OverflowError):
+                continue  # Invalid rows are reported later, not used for inference
 
-        except (ValueError, TypeError) as e:
-            return None, ValidationError(
-                row_number=row_number,
-                field="date",
-                message=f"Invalid date format: {str(e)}",
-                raw_value=date_str
-            )
+        if not expected:
+            return None
 
-    def parse_csv(
+        for date_format in self.DATE_FORMATS:
+            if all(
+                FileDateParser.parse_with_format(value, date_format) == dt
+                for value, dt in expected
+            ):
+                return date_format
+
+        return None
+
+    def create_date_parser(self, samples: List[str]) -> FileDateParser:
+        """Date parser for a file, using the format inferred from its samples."""
+        return FileDateParser(self.infer_date_format(samples))
+
+
+    def resolve_columns(
         self,
-        file_bytes: bytes,
-        preview_mode: bool = False
-    ) -> ParseResult:
+        headers: List[str]
+    ) -> Tuple[POSVendor, Dict[str, Optional[str]], List[str]]:
         """
-        Parse CSV file with vendor detection and validation.
+        Detect vendor and map logical fields to actual CSV column names.
 
         Args:
-            file_bytes: Raw CSV file bytes
-            preview_mode: If True, parse only first N rows for preview
+            headers: CSV column headers
 
         Returns:
-            ParseResult with parsed data and errors
+            Tuple of (vendor, columns by field name, missing required fields)
         """
-        # Detect encoding
-        encoding = self.detect_encoding(file_bytes)
-
-        try:
-            decoded = file_bytes.decode(encoding)
-        except UnicodeDecodeError:
-            # Fallback to utf-8 with error replacement
-            decoded = file_bytes.decode('utf-8', errors='replace')
-            encoding = 'utf-8'
-
-        # Parse CSV
-        reader = csv.DictReader(io.StringIO(decoded))
-        headers = reader.fieldnames or []
-
         # Detect vendor
         vendor = self.detect_vendor(headers)
 
@@ -376,186 +572,513 @@ class CSVParser:
         mapping = self.VENDOR_MAPPINGS[vendor]
 
         # Find actual column names
-        date_col = self.find_column(headers, mapping.date)
-        item_col = self.find_column(headers, mapping.item)
-        qty_col = self.find_column(headers, mapping.quantity)
-        price_col = self.find_column(headers, mapping.unit_price)
-        total_col = self.find_column(headers, mapping.total)
-        discount_col = self.find_column(headers, mapping.discount)  # Optional
+        columns = {
+            "date": self.find_column(headers, mapping.date),
+            "item": self.find_column(headers, mapping.item),
+            "quantity": self.find_column(headers, mapping.quantity),
+            "unit_price": self.find_column(headers, mapping.unit_price),
+            "total": self.find_column(headers, mapping.total),
+            "discount": self.find_column(headers, mapping.discount),  # Optional
+        }
 
         # Validate required columns found
         missing_columns = []
-        if not date_col:
+        if not columns["date"]:
             missing_columns.append("date")
-        if not item_col:
+        if not columns["item"]:
             missing_columns.append("item")
-        if not qty_col:
+        if not columns["quantity"]:
             missing_columns.append("quantity")
-        if not price_col and not total_col:
+        if not columns["unit_price"] and not columns["total"]:
             missing_columns.append("price or total")
 
-        if missing_columns:
-            return ParseResult(
-                vendor=vendor,
-                total_rows=0,
-                parsed_rows=[],
-                errors=[ValidationError(
-                    row_number=0,
-                    field="headers",
-                    message=f"Missing required columns: {', '.join(missing_columns)}"
-                )],
-                encoding=encoding
-            )
+        return vendor, columns, missing_columns
 
-        # Parse rows
-        parsed_rows: List[ParsedRow] = []
-        errors: List[ValidationError] = []
-        warnings: List[str] = []
-        total_rows = 0
+    def header_result(
+        self,
+        headers: List[str],
+        encoding: str
+    ) -> Tuple[ParseResult, Dict[str, Optional[str]]]:
+        """
+        Start a ParseResult from the CSV headers.
 
-        for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
-            total_rows += 1
+        Args:
+            headers: CSV column headers
+            encoding: Detected file encoding
 
-            # Preview mode: stop after max_preview_rows
-            if preview_mode and total_rows > self.max_preview_rows:
-                warnings.append(f"Preview limited to {self.max_preview_rows} rows")
-                break
+        Returns:
+            Tuple of (empty result carrying any header error, column mapping)
+        """
+        vendor, columns, missing_columns = self.resolve_columns(headers)
 
-            row_warnings = []
+        result = ParseResult(
+            vendor=vendor,
+            total_rows=0,
+            parsed_rows=[],
+            errors=[],
+            encoding=encoding
+        )
 
-            # Parse date
-            date_value, date_error = self.parse_date(row.get(date_col, ""), row_num)
-            if date_error:
-                errors.append(date_error)
-                continue
+        if missing_columns:
+            result.errors.append(ValidationError(
+                row_number=0,
+                field="headers",
+                message=f"Missing required columns: {', '.join(missing_columns)}"
+            ))
+            result.error_count = 1
 
-            # Parse item name
-            raw_item_name = row.get(item_col, "").strip()
-            if not raw_item_name:
-                errors.append(ValidationError(
-                    row_number=row_num,
-                    field="item",
-                    message="Item name is empty"
-                ))
-                continue
+        return result, columns
+
+    def parse_row(
+        self,
+        row: Dict[str, str],
+        row_num: int,
+        columns: Dict[str, Optional[str]],
+        dates: Optional[FileDateParser] = None
+    ) -> Tuple[Optional[ParsedRow], Optional[ValidationError]]:
+        """
+        Parse and validate a single CSV record.
+
+        Args:
+            row: Record as returned by csv.DictReader
+            row_num: Row number in the file (header is row 1)
+            columns: Column mapping from resolve_columns
+            dates: Per-file date parser (see create_date_parser); defaults
+                to plain dateutil parsing
+
+        Returns:
+            Tuple of (parsed_row, error) - exactly one is set
+        """
+        date_col = columns["date"]
+        item_col = columns["item"]
+        qty_col = columns["quantity"]
+        price_col = columns["unit_price"]
+        total_col = columns["total"]
+        discount_col = columns["discount"]
+
+        row_warnings = []
+
+        # Parse date
+        if dates is None:
+            dates = FileDateParser()
+        date_value, date_error = dates.parse(row.get(date_col, ""), row_num)
+        if date_error:
+            return None, date_error
+
+        # Parse item name
+        raw_item_name = row.get(item_col, "").strip()
+        if not raw_item_name:
+            return None, ValidationError(
+                row_number=row_num,
+                field="item",
+                message="Item name is empty"
+            )
 
-            # Extract embedded quantity
-            embedded_qty, clean_item_name = self.extract_quantity_from_name(raw_item_name)
-            if embedded_qty > 1:
-                row_warnings.append(f"Extracted quantity {embedded_qty} from item name")
+        # Extract embedded quantity and normalize item name (memoized)
+        embedded_qty, clean_item_name, normalized_name = self.resolve_item_name(raw_item_name)
+        if embedded_qty > 1:
+            row_warnings.append(f"Extracted quantity {embedded_qty} from item name")
 
-            # Normalize item name
-            normalized_name = self.normalize_item_name(clean_item_name)
+        # Parse quantity
+        qty_str = row.get(qty_col, "1").strip()
+        try:
+            base_quantity = int(float(qty_str))  # Handle "2.0" → 2
+            if base_quantity <= 0:
+                raise ValueError("Quantity must be positive")
+            # Multiply by embedded quantity
+            final_quantity = base_quantity * embedded_qty
+        except (ValueError, InvalidOperation) as e:
+            return None, ValidationError(
+                row_number=row_num,
+                field="quantity",
+                message=f"Invalid quantity: {str(e)}",
+                raw_value=qty_str
+            )
 
-            # Parse quantity
-            qty_str = row.get(qty_col, "1").strip()
+        # Parse unit price
+        unit_price: Optional[Decimal] = None
+        if price_col:
+            price_str = row.get(price_col, "").strip()
             try:
-                base_quantity = int(float(qty_str))  # Handle "2.0" → 2
-                if base_quantity <= 0:
-                    raise ValueError("Quantity must be positive")
-                # Multiply by embedded quantity
-                final_quantity = base_quantity * embedded_qty
+                unit_price = Decimal(price_str)
+                if unit_price < 0:
+                    row_warnings.append("Negative unit price (possible refund/discount)")
+                elif unit_price == 0:
+                    row_warnings.append("Zero unit price (comp/staff meal)")
             except (ValueError, InvalidOperation) as e:
-                errors.append(ValidationError(
+                return None, ValidationError(
                     row_number=row_num,
-                    field="quantity",
-                    message=f"Invalid quantity: {str(e)}",
-                    raw_value=qty_str
-                ))
-                continue
+                    field="unit_price",
+                    message=f"Invalid unit price: {str(e)}",
+                    raw_value=price_str
+                )
 
-            # Parse unit price
-            unit_price: Optional[Decimal] = None
-            if price_col:
-                price_str = row.get(price_col, "").strip()
-                try:
-                    unit_price = Decimal(price_str)
-                    if unit_price < 0:
-                        row_warnings.append("Negative unit price (possible refund/discount)")
-                    elif unit_price == 0:
-                        row_warnings.append("Zero unit price (comp/staff meal)")
-                except (ValueError, InvalidOperation) as e:
-                    errors.append(ValidationError(
-                        row_number=row_num,
-                        field="unit_price",
-                        message=f"Invalid unit price: {str(e)}",
-                        raw_value=price_str
-                    ))
-                    continue
+        # Parse total
+        total_value: Optional[Decimal] = None
+        if total_col:
+            total_str = row.get(total_col, "").strip()
+            try:
+                total_value = Decimal(total_str)
+                if total_value < 0:
+                    row_warnings.append("Negative total (possible refund)")
+            except (ValueError, InvalidOperation) as e:
+                return None, ValidationError(
+                    row_number=row_num,
+                    field="total",
+                    message=f"Invalid total: {str(e)}",
+                    raw_value=total_str
+                )
 
-            # Parse total
-            total_value: Optional[Decimal] = None
-            if total_col:
-                total_str = row.get(total_col, "").strip()
+        # Parse discount (optional)
+        discount_amount: Optional[Decimal] = None
+        if discount_col:
+            discount_str = row.get(discount_col, "").strip()
+            if discount_str:
                 try:
-                    total_value = Decimal(total_str)
-                    if total_value < 0:
-                        row_warnings.append("Negative total (possible refund)")
-                except (ValueError, InvalidOperation) as e:
-                    errors.append(ValidationError(
-                        row_number=row_num,
-                        field="total",
-                        message=f"Invalid total: {str(e)}",
-                        raw_value=total_str
-                    ))
-                    continue
-
-            # Parse discount (optional)
-            discount_amount: Optional[Decimal] = None
-            if discount_col:
-                discount_str = row.get(discount_col, "").strip()
-                if discount_str:
-                    try:
-                        discount_amount = Decimal(discount_str)
-                        if discount_amount < 0:
-                            discount_amount = abs(discount_amount)  # Normalize to positive
-                    except (ValueError, InvalidOperation):
-                        # Discount column exists but invalid value, ignore
-                        pass
-
-            # Detect promotion using multi-method approach
-            from src.services.promotion_detection import PromotionDetectionService
-            detection_service = PromotionDetectionService(db=None)  # No DB needed for detection
-            detection = detection_service.detect_discount_in_item(
-                item_name=raw_item_name,
-                unit_price=unit_price if unit_price else Decimal(0),
-                total=total_value if total_value else Decimal(0),
-                discount_amount=discount_amount
+                    discount_amount = Decimal(discount_str)
+                    if discount_amount < 0:
+                        discount_amount = abs(discount_amount)  # Normalize to positive
+                except (ValueError, InvalidOperation):
+                    # Discount column exists but invalid value, ignore
+                    pass
+
+        # Calculate missing values
+        if unit_price is None and total_value is not None:
+            unit_price = total_value / final_quantity
+        elif total_value is None and unit_price is not None:
+            total_value = unit_price * final_quantity
+        elif unit_price is None and total_value is None:
+            return None, ValidationError(
+                row_number=row_num,
+                field="price",
+                message="Both unit_price and total are missing"
             )
 
-            # Calculate missing values
-            if unit_price is None and total_value is not None:
-                unit_price = total_value / final_quantity
-            elif total_value is None and unit_price is not None:
-                total_value = unit_price * final_quantity
-            elif unit_price is None and total_value is None:
-                errors.append(ValidationError(
-                    row_number=row_num,
-                    field="price",
-                    message="Both unit_price and total are missing"
-                ))
+        # Create parsed row
+        return ParsedRow(
+            date=date_value,
+            item_name=normalized_name,
+            quantity=final_quantity,
+            unit_price=unit_price,
+            total=total_value,
+            raw_item_name=raw_item_name,
+            row_number=row_num,
+            warnings=row_warnings,
+            # Explicit discount only; classify_promotions sets the promo fields
+            discount_amount=discount_amount
+        ), None
+
+    def classify_promotions(self, rows: List[ParsedRow], has_total: bool = True):
+        """
+        Detect promotions on a chunk of rows from parse_row, in place.
+
+        Runs PromotionDetectionService.detect_discounts over the whole chunk
+        and sets discount_amount, is_promotion and promotion_type.
+
+        Args:
+            rows: Parsed rows carrying their explicit discount, if any
+            has_total: Whether the file has a total column; detection sees
+                the line total as read from the file (0 if absent)
+        """
+        detections = self.promotion_detector.detect_discounts(rows)
+        for row, detection in zip(rows, detections):
+            row.discount_amount = detection.discount_amount
+            if detection.discount_type == 'comp_void' and not has_total:
+                row.discount_amount = Decimal(0)
+            row.is_promotion = detection.is_promo
+            row.promotion_type = detection.discount_type
+
+    def stream_csv(
+        self,
+        file_obj: BinaryIO,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        preview_mode: bool = False
+    ) -> "CSVStream":
+        """
+        Open a streaming parse over a binary file object.
+
+        The file is decoded incrementally, strictly, in the encoding
+        picked by detect_stream_encoding (one extra read of the file).
+
+        Args:
+            file_obj: Seekable binary file object (e.g. a spooled upload)
+            chunk_size: Maximum number of records per yielded chunk
+            preview_mode: If True, stop after max_preview_rows
+
+        Returns:
+            CSVStream whose result already reflects header validation
+        """
+        encoding = self.detect_stream_encoding(file_obj)
+
+        text = io.TextIOWrapper(file_obj, encoding=encoding, newline="")
+        return CSVStream(self, text, encoding, chunk_size=chunk_size, preview_mode=preview_mode)
+
+    def parse_csv(
+        self,
+        file_bytes: bytes,
+        preview_mode: bool = False,
+        workers: int = 1
+    ) -> ParseResult:
+        """
+        Parse CSV file with vendor detection and validation.
+
+        Args:
+            file_bytes: Raw CSV file bytes
+            preview_mode: If True, parse only first N rows for preview
+            workers: Number of processes to parse with; files of more than
+                PARALLEL_CHUNK_SIZE records are split across a process pool
+                when > 1 (ignored in preview mode)
+
+        Returns:
+            ParseResult with parsed data and errors
+        """
+        # Strict UTF-8 first; chardet guesses only for files that aren't UTF-8
+        try:
+            decoded = file_bytes.decode('utf-8')
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = self.detect_encoding(file_bytes)
+            try:
+                decoded = file_bytes.decode(encoding)
+            except (UnicodeDecodeError, LookupError):
+                # ISO-8859-1 decodes any byte
+                decoded = file_bytes.decode('iso-8859-1')
+                encoding = 'iso-8859-1'
+
+        if workers > 1 and not preview_mode:
+            return self._parse_parallel(decoded, encoding, workers)
+
+        stream = CSVStream(self, io.StringIO(decoded), encoding, preview_mode=preview_mode)
+        result = stream.result
+        for chunk in stream:
+            result.parsed_rows.extend(chunk.parsed_rows)
+            result.errors.extend(chunk.errors)
+
+        return result
+
+    def _parse_chunk(
+        self,
+        headers: List[str],
+        columns: Dict[str, Optional[str]],
+        dates: FileDateParser,
+        text: str,
+        first_row: int
+    ) -> ParseChunk:
+        """Parse one slice of records of a parallel parse (see _parse_parallel)."""
+        cache_before = self.item_name_cache_info()
+        chunk = ParseChunk()
+        reader = csv.DictReader(io.StringIO(text), fieldnames=headers)
+        for row_num, row in enumerate(reader, start=first_row):
+            parsed, error = self.parse_row(row, row_num, columns, dates)
+            if error:
+                chunk.errors.append(error)
+            else:
+                chunk.parsed_rows.append(parsed)
+        self.classify_promotions(chunk.parsed_rows, has_total=columns["total"] is not None)
+
+        cache_after = self.item_name_cache_info()
+        chunk.item_name_cache_hits = cache_after.hits - cache_before.hits
+        chunk.item_name_cache_misses = cache_after.misses - cache_before.misses
+        return chunk
+
+    def _parse_parallel(self, decoded: str, encoding: str, workers: int) -> ParseResult:
+        """
+        Parse decoded CSV text across a process pool.
+
+        The text is cut at record boundaries found by the C csv reader (so
+        quoted newlines never split a record) and each slice is parsed by
+        parse_row in a worker. Slices carry their first row number and are
+        merged in file order, so rows and errors match a serial parse.
+        """
+        buffer = io.StringIO(decoded)
+        reader = csv.reader(buffer)
+        headers = next(reader, [])
+
+        result, columns = self.header_result(headers, encoding)
+        if result.errors:
+            return result
+
+        # (text slice, row number of its first record); row numbers count
+        # records like csv.DictReader does, skipping blank lines
+        tasks: List[Tuple[str, int]] = []
+        chunk_start = buffer.tell()
+        first_row = 2  # Header is row 1
+        records = 0
+        date_samples: List[str] = []
+        for record in reader:
+            if not record:
                 continue
+            if len(date_samples) < self.DATE_SAMPLE_SIZE:
+                date_samples.append(dict(zip(headers, record)).get(columns["date"], ""))
+            records += 1
+            if records == self.PARALLEL_CHUNK_SIZE:
+                chunk_end = buffer.tell()
+                tasks.append((decoded[chunk_start:chunk_end], first_row))
+                chunk_start, first_row, records = chunk_end, first_row + records, 0
+        if records:
+            tasks.append((decoded[chunk_start:], first_row))
+
+        dates = self.create_date_parser(date_samples)
+        result.date_format = dates.date_format
+
+        if len(tasks) <= 1:
+            chunks = [self._parse_chunk(headers, columns, dates, *task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                chunks = list(executor.map(
+                    _parse_records,
+                    [headers] * len(tasks),
+                    [columns] * len(tasks),
+                    [dates] * len(tasks),
+                    *zip(*tasks)
+                ))
 
-            # Create parsed row
-            parsed_rows.append(ParsedRow(
-                date=date_value,
-                item_name=normalized_name,
-                quantity=final_quantity,
-                unit_price=unit_price,
-                total=total_value,
-                raw_item_name=raw_item_name,
-                row_number=row_num,
-                warnings=row_warnings,
-                discount_amount=detection.discount_amount,
-                is_promotion=detection.is_promo,
-                promotion_type=detection.discount_type
-            ))
+        for chunk in chunks:
+            result.parsed_rows.extend(chunk.parsed_rows)
+            result.errors.extend(chunk.errors)
+            result.item_name_cache_hits += chunk.item_name_cache_hits
+            result.item_name_cache_misses += chunk.item_name_cache_misses
+        result.parsed_count = len(result.parsed_rows)
+        result.error_count = len(result.errors)
+        result.total_rows = result.parsed_count + result.error_count
 
-        return ParseResult(
-            vendor=vendor,
-            total_rows=total_rows,
-            parsed_rows=parsed_rows,
-            errors=errors,
-            warnings=warnings,
-            encoding=encoding
-        )
+        return result
+
+
+def _parse_records(
+    headers: List[str],
+    columns: Dict[str, Optional[str]],
+    dates: FileDateParser,
+    text: str,
+    first_row: int
+) -> ParseChunk:
+    """Parse one slice of records in a pool worker; module-level so process pools can pickle it."""
+    global _worker_parser
+    if _worker_parser is None:
+        # One parser per process, so the item name cache spans its slices
+        _worker_parser = CSVParser()
+    return _worker_parser._parse_chunk(headers, columns, dates, text, first_row)
+
+
+_worker_parser: Optional[CSVParser] = None
+
+
+class CSVStream:
+    """
+    Incremental CSV parse that yields bounded chunks of rows and errors.
+
+    Headers are read and validated on construction, so `result` carries
+    the vendor, encoding and any header errors before iteration starts.
+    While iterating, `result` only keeps running totals - parsed rows and
+    row errors are handed out in ParseChunks and never accumulated here.
+    The file's date format is inferred from its first DATE_SAMPLE_SIZE
+    records when iteration starts and recorded in `result.date_format`.
+
+    `last_row` is the row number of the last record handed out in a chunk,
+    which ingestion uses as its checkpoint; skip_through() resumes a parse
+    after such a checkpoint.
+    """
+
+    def __init__(
+        self,
+        parser: CSVParser,
+        text: TextIO,
+        encoding: str,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        preview_mode: bool = False
+    ):
+        self.parser = parser
+        self.chunk_size = chunk_size
+        self.preview_mode = preview_mode
+        self._text = text
+        self._reader = csv.DictReader(text)
+        self.skip_rows = 0
+        self.last_row = 1  # Header is row 1
+
+        headers = self._reader.fieldnames or []
+        self.result, self.columns = parser.header_result(headers, encoding)
+
+        if self.result.errors:
+            self.close()
+
+    @property
+    def has_header_errors(self) -> bool:
+        """True if required columns are missing and no rows will be parsed."""
+        return any(e.field == "headers" for e in self.result.errors)
+
+    def skip_through(self, row_number: int):
+        """
+        Skip records up to and including a row number without parsing them.
+
+        Must be called before iteration starts. Skipped rows are not counted
+        in the result totals.
+
+        Args:
+            row_number: Last row number to skip (header is row 1)
+        """
+        self.skip_rows = max(row_number - 1, 0)
+        self.last_row = max(self.last_row, row_number)
+
+    def close(self):
+        """Release the text wrapper without closing the caller's file object."""
+        if isinstance(self._text, io.TextIOWrapper) and self._text.buffer is not None:
+            self._text.detach()
+        self._reader = None
+
+    def __iter__(self) -> Iterator[ParseChunk]:
+        if self._reader is None:
+            return
+
+        result = self.result
+        has_total = self.columns["total"] is not None
+        chunk = ParseChunk()
+        cache_mark = self.parser.item_name_cache_info()
+
+        def count_cache_lookups(chunk: ParseChunk):
+            nonlocal cache_mark
+            cache_now = self.parser.item_name_cache_info()
+            chunk.item_name_cache_hits = cache_now.hits - cache_mark.hits
+            chunk.item_name_cache_misses = cache_now.misses - cache_mark.misses
+            result.item_name_cache_hits += chunk.item_name_cache_hits
+            result.item_name_cache_misses += chunk.item_name_cache_misses
+            cache_mark = cache_now
+
+        try:
+            # Infer the file's date format from its leading rows
+            records = iter(self._reader)
+            head = list(itertools.islice(records, self.parser.DATE_SAMPLE_SIZE))
+            dates = self.parser.create_date_parser([row.get(self.columns["date"], "") for row in head])
+            result.date_format = dates.date_format
+
+            for row_num, row in enumerate(itertools.chain(head, records), start=2):  # Start at 2 (header is row 1)
+                if row_num <= self.skip_rows + 1:
+                    continue
+                result.total_rows += 1
+
+                # Preview mode: stop after max_preview_rows
+                if self.preview_mode and result.total_rows > self.parser.max_preview_rows:
+                    result.warnings.append(f"Preview limited to {self.parser.max_preview_rows} rows")
+                    break
+
+                parsed, error = self.parser.parse_row(row, row_num, self.columns, dates)
+                if error:
+                    chunk.errors.append(error)
+                    result.error_count += 1
+                else:
+                    chunk.parsed_rows.append(parsed)
+                    result.parsed_count += 1
+
+                if len(chunk.parsed_rows) + len(chunk.errors) >= self.chunk_size:
+                    self.parser.classify_promotions(chunk.parsed_rows, has_total)
+                    count_cache_lookups(chunk)
+                    self.last_row = row_num
+                    yield chunk
+                    chunk = ParseChunk()
+
+            if chunk.parsed_rows or chunk.errors:
+                self.parser.classify_promotions(chunk.parsed_rows, has_total)
+                count_cache_lookups(chunk)
+                self.last_row = row_num
+                yield chunk
+        finally:
+            self.close()
@@ -0,0 +1,330 @@
+"""
+Daily item sales rollup maintenance.
+
+daily_item_sales holds one row per (restaurant, business date, item name)
+with the aggregates analytics used to compute on the fly from
+transaction_items: quantity, revenue, line count, avg/min/max unit price,
+plus the promo/stockout flags and first/last order times of the
+transactions the item was sold in.
+
+Rows are rebuilt from the raw line items for a set of dates and/or item
+names (refresh). Ingestion refreshes the business dates each upload
+touched in the same transaction as the rows themselves; code that writes
+or rewrites transaction_items elsewhere (merges, seed scripts) refreshes
+what it changed. check_consistency compares the rollup against a fresh
+aggregation, and scripts/daily_item_sales.py runs backfills and checks.
+
+Weekly totals (weekly_sales) come from the weekly_item_sales continuous
+aggregate when the database runs TimescaleDB (migration 019), and are
+aggregated from daily_item_sales on the fly otherwise.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Date, Interval, cast, column, delete, func, insert, literal, select, table, text
+from sqlalchemy.orm import Session
+
+from src.core.business_day import BUSINESS_DAY_START_HOUR
+from src.models.restaurant import Restaurant
+from src.models.transaction import DailyItemSales, Transaction, TransactionItem
+from src.services.category_profiles import CategoryProfileService
+
+# Rollup columns filled from _aggregate_query, in select order
+ROLLUP_COLUMNS = [
+    "restaurant_id",
+    "business_date",
+    "menu_item_name",
+    "quantity",
+    "revenue",
+    "line_count",
+    "avg_price",
+    "min_price",
+    "max_price",
+    "is_promo",
+    "stockout_occurred",
+    "first_order_time",
+    "last_order_time",
+]
+
+# Shift that puts order times in business-day order before min/max
+BUSINESS_DAY_START = literal(timedelta(hours=BUSINESS_DAY_START_HOUR), Interval)
+
+# Aggregates compared by check_consistency
+CHECKED_COLUMNS = ROLLUP_COLUMNS[3:]
+
+# Continuous aggregate created by migration 019 in Timescale mode
+weekly_item_sales = table(
+    "weekly_item_sales",
+    column("restaurant_id"),
+    column("menu_item_name"),
+    column("week_start"),
+    column("quantity"),
+    column("revenue"),
+    column("active_days"),
+    column("is_promo"),
+)
+
+# Database URL -> whether weekly_item_sales exists
+_weekly_aggregate_available: Dict[str, bool] = {}
+
+
+def weekly_aggregate_available(db: Session) -> bool:
+    """Whether the weekly_item_sales continuous aggregate exists (checked once per database)."""
+    url = str(db.get_bind().url)
+    if url not in _weekly_aggregate_available:
+        _weekly_aggregate_available[url] = db.execute(
+            text("SELECT to_regclass('weekly_item_sales') IS NOT NULL")
+        ).scalar()
+    return _weekly_aggregate_available[url]
+
+
+@dataclass
+class RollupMismatch:
+    """A rollup row that differs from the raw line items."""
+    business_date: date
+    menu_item_name: str
+    field: str  # column name, or "row" when the row is missing/stale
+    expected: Any
+    actual: Any
+
+
+class DailySalesRollupService:
+    """Rebuilds and verifies daily_item_sales rows."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(
+        self,
+        restaurant_id: UUID,
+        business_dates: Optional[Iterable[date]] = None,
+        item_names: Optional[Iterable[str]] = None
+    ) -> int:
+        """
+        Rebuild rollup rows from transaction_items.
+
+        Rows matching the filters are deleted and re-aggregated, so items
+        that no longer have sales on a date disappear as well. Refresh
+        whole dates after ingesting: promo flags and order times come from
+        the transactions an item was sold in, and later rows of an upload
+        update its transaction for every item already on it. Also
+        invalidates the restaurant's category profiles. Does not commit.
+
+        Args:
+            restaurant_id: Restaurant UUID
+            business_dates: Only these dates (default: all)
+            item_names: Only these items (default: all)
+
+        Returns:
+            Number of rollup rows written
+        """
+        business_dates = list(business_dates) if business_dates is not None else None
+        item_names = list(item_names) if item_names is not None else None
+        if business_dates == [] or item_names == []:
+            return 0
+
+        stmt = delete(DailyItemSales).where(DailyItemSales.restaurant_id == restaurant_id)
+        if business_dates is not None:
+            stmt = stmt.where(DailyItemSales.business_date.in_(business_dates))
+        if item_names is not None:
+            stmt = stmt.where(DailyItemSales.menu_item_name.in_(item_names))
+        self.db.execute(stmt)
+
+        source = self._aggregate_query(restaurant_id, business_dates, item_names)
+        result = self.db.execute(
+            insert(DailyItemSales).from_select(ROLLUP_COLUMNS, source)
+        )
+
+        # Seasonality and priors are aggregated from these rows
+        CategoryProfileService(self.db).invalidate(restaurant_id)
+        return result.rowcount
+
+    def backfill(self, restaurant_id: Optional[UUID] = None) -> Dict[UUID, int]:
+        """
+        Rebuild the whole rollup of one restaurant (or all), committing per restaurant.
+
+        Returns:
+            Rows written per restaurant
+        """
+        if restaurant_id is not None:
+            restaurant_ids = [restaurant_id]
+        else:
+            restaurant_ids = self.db.execute(select(Restaurant.id)).scalars().all()
+
+        written = {}
+        for rid in restaurant_ids:
+            written[rid] = self.refresh(rid)
+            self.db.commit()
+        return written
+
+    def weekly_sales(
+        self,
+        restaurant_id: UUID,
+        start_date: Optional[date] = None,
+        item_names: Optional[Iterable[str]] = None
+    ) -> List:
+        """
+        Weekly per-item totals (weeks start on Monday).
+
+        Args:
+            restaurant_id: Restaurant UUID
+            start_date: Only weeks containing or after this date
+            item_names: Only these items (default: all)
+
+        Returns:
+            Rows with menu_item_name, week_start, quantity, revenue,
+            active_days and is_promo, ordered by item and week
+        """
+        if weekly_aggregate_available(self.db):
+            source = weekly_item_sales
+            stmt = select(
+                source.c.menu_item_name,
+                source.c.week_start,
+                source.c.quantity,
+                source.c.revenue,
+                source.c.active_days,
+                source.c.is_promo,
+            ).where(source.c.restaurant_id == restaurant_id)
+        else:
+            week_start = cast(func.date_trunc("week", DailyItemSales.business_date), Date)
+            source = select(
+                DailyItemSales.restaurant_id,
+                DailyItemSales.menu_item_name,
+                week_start.label("week_start"),
+                func.sum(DailyItemSales.quantity).label("quantity"),
+                func.sum(DailyItemSales.revenue).label("revenue"),
+                func.count().label("active_days"),
+                func.bool_or(DailyItemSales.is_promo).label("is_promo"),
+            ).where(
+                DailyItemSales.restaurant_id == restaurant_id
+            ).group_by(
+                DailyItemSales.restaurant_id, DailyItemSales.menu_item_name, week_start
+            ).subquery()
+            stmt = select(
+                source.c.menu_item_name,
+                source.c.week_start,
+                source.c.quantity,
+                source.c.revenue,
+                source.c.active_days,
+                source.c.is_promo,
+            )
+
+        if start_date is not None:
+            stmt = stmt.where(source.c.week_start >= start_date - timedelta(days=start_date.weekday()))
+        if item_names is not None:
+            stmt = stmt.where(source.c.menu_item_name.in_(list(item_names)))
+
+        return self.db.execute(stmt.order_by(source.c.menu_item_name, source.c.week_start)).all()
+
+    def average_weekly_quantity(self, restaurant_id: UUID, weeks: int = 12) -> Dict[str, float]:
+        """Mean quantity sold per week over the last `weeks` full weeks, by item name."""
+        this_week = date.today() - timedelta(days=date.today().weekday())
+        start_date = this_week - timedelta(weeks=weeks)
+
+        totals: Dict[str, float] = {}
+        for row in self.weekly_sales(restaurant_id, start_date=start_date):
+            if row.week_start < this_week:
+                totals[row.menu_item_name] = totals.get(row.menu_item_name, 0.0) + float(row.quantity)
+        return {name: total / weeks for name, total in totals.items()}
+
+    def check_consistency(
+        self,
+        restaurant_id: UUID,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[RollupMismatch]:
+        """
+        Compare rollup rows against a fresh aggregation of the line items.
+
+        Args:
+            restaurant_id: Restaurant UUID
+            start_date: First business date to check (default: unbounded)
+            end_date: Last business date to check (default: unbounded)
+
+        Returns:
+            Mismatches, empty when the rollup is consistent
+        """
+        source = self._aggregate_query(restaurant_id)
+        rollup = select(*[getattr(DailyItemSales, name) for name in ROLLUP_COLUMNS]).where(
+            DailyItemSales.restaurant_id == restaurant_id
+        )
+        if start_date is not None:
+            source = source.where(TransactionItem.business_date >= start_date)
+            rollup = rollup.where(DailyItemSales.business_date >= start_date)
+        if end_date is not None:
+            source = source.where(TransactionItem.business_date <= end_date)
+            rollup = rollup.where(DailyItemSales.business_date <= end_date)
+
+        expected = self._rows_by_key(source)
+        actual = self._rows_by_key(rollup)
+
+        mismatches = []
+        for key in sorted(expected.keys() | actual.keys()):
+            business_date, item_name = key
+            if key not in actual:
+                mismatches.append(RollupMismatch(business_date, item_name, "row", "present", None))
+                continue
+            if key not in expected:
+                mismatches.append(RollupMismatch(business_date, item_name, "row", None, "present"))
+                continue
+
+            for field in CHECKED_COLUMNS:
+                want, got = expected[key][field], actual[key][field]
+                if field == "avg_price":
+                    # Stored rounded to the column's scale
+                    want = Decimal(want).quantize(Decimal("0.0001"))
+                if want != got:
+                    mismatches.append(RollupMismatch(business_date, item_name, field, want, got))
+
+        return mismatches
+
+    def _aggregate_query(
+        self,
+        restaurant_id: UUID,
+        business_dates: Optional[List[date]] = None,
+        item_names: Optional[List[str]] = None
+    ):
+        """
+        Rollup rows aggregated from transaction_items, in ROLLUP_COLUMNS order.
+
+        Filters and groups on the item's own restaurant_id/business_date, so
+        the (restaurant, date, name) covering index drives the scan; the
+        parent transaction is only looked up by primary key for its flags.
+        """
+        stmt = (
+            select(
+                TransactionItem.restaurant_id,
+                TransactionItem.business_date,
+                TransactionItem.menu_item_name,
+                func.sum(TransactionItem.quantity),
+                func.sum(TransactionItem.total),
+                func.count(),
+                func.avg(TransactionItem.unit_price),
+                func.min(TransactionItem.unit_price),
+                func.max(TransactionItem.unit_price),
+                func.bool_or(Transaction.is_promo),
+                func.bool_or(Transaction.stockout_occurred),
+                # Order times compare in business-day order (4 AM first);
+                # PostgreSQL time arithmetic wraps around midnight
+                func.min(Transaction.first_order_time - BUSINESS_DAY_START) + BUSINESS_DAY_START,
+                func.max(Transaction.last_order_time - BUSINESS_DAY_START) + BUSINESS_DAY_START,
+            )
+            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
+            .where(TransactionItem.restaurant_id == restaurant_id)
+            .group_by(TransactionItem.restaurant_id, TransactionItem.business_date, TransactionItem.menu_item_name)
+        )
+        if business_dates is not None:
+            stmt = stmt.where(TransactionItem.business_date.in_(business_dates))
+        if item_names is not None:
+            stmt = stmt.where(TransactionItem.menu_item_name.in_(item_names))
+        return stmt
+
+    def _rows_by_key(self, stmt) -> Dict[Tuple[date, str], Dict[str, Any]]:
+        rows = {}
+        for row in self.db.execute(stmt).all():
+            values = dict(zip(ROLLUP_COLUMNS, row))
+            rows[(values["business_date"], values["menu_item_name"])] = values
+        return rows
@@ -1,9 +1,9 @@
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
 from decimal import Decimal
 
-from sqlalchemy import select, func, desc, distinct, case
+from sqlalchemy import select, func, desc, distinct, case, or_
 from sqlalchemy.orm import Session
 
 from src.models.data_health import DataHealthScore
@@ -26,12 +26,27 @@ class DataHealthService:
     def __init__(self, db: Session):
         self.db = db
 
-    def calculate_score(self, restaurant_id: UUID) -> DataHealthScore:
+    def calculate_score(
+        self,
+        restaurant_id: UUID,
+        upload_id: Optional[UUID] = None,
+        business_dates: Optional[Iterable[date]] = None
+    ) -> DataHealthScore:
         """
         Calculate comprehensive data health score for a restaurant.
+
+        After an upload, pass the upload and the business dates it wrote:
+        the transaction date range and active-day count are then carried
+        forward from the latest score instead of rescanning every
+        transaction (see _get_date_stats).
+
+        Args:
+            restaurant_id: Restaurant UUID
+            upload_id: Upload that just finished
+            business_dates: Business dates the upload added rows to
         """
         # Get data stats helper
-        stats = self._get_restaurant_stats(restaurant_id)
+        stats = self._get_restaurant_stats(restaurant_id, upload_id, business_dates)
 
         # Calculate sub-scores
         completeness, c_breakdown = self._calculate_completeness(stats)
@@ -66,7 +81,12 @@ class DataHealthService:
                 "completeness": c_breakdown,
                 "consistency": con_breakdown,
                 "timeliness": t_breakdown,
-                "accuracy": a_breakdown
+                "accuracy": a_breakdown,
+                "date_stats": {
+                    "min_date": stats["min_date"].isoformat() if stats["min_date"] else None,
+                    "max_date": stats["max_date"].isoformat() if stats["max_date"] else None,
+                    "active_days": stats["active_days"]
+                }
             },
             recommendations=recommendations
         )
@@ -85,20 +105,17 @@ class DataHealthService:
 
         return self.db.execute(stmt).scalar_one_or_none()
 
-    def _get_restaurant_stats(self, restaurant_id: UUID) -> Dict:
+    def _get_restaurant_stats(
+        self,
+        restaurant_id: UUID,
+        upload_id: Optional[UUID] = None,
+        business_dates: Optional[Iterable[date]] = None
+    ) -> Dict:
         """Fetch all necessary statistics for scoring."""
         now = datetime.now()
 
         # Transaction dates
-        date_range = self.db.execute(
-            select(
-                func.min(Transaction.transaction_date),
-                func.max(Transaction.transaction_date),
-                func.count(distinct(Transaction.transaction_date))
-            ).where(Transaction.restaurant_id == restaurant_id)
-        ).first()
-
-        min_date, max_date, distinct_dates = date_range
+        min_date, max_date, distinct_dates = self._get_date_stats(restaurant_id, upload_id, business_dates)
 
         # Menu stats
         menu_stats = self.db.execute(
@@ -124,6 +141,52 @@ class DataHealthService:
             "has_stockouts": self._has_stockout_data(restaurant_id)
         }
 
+    def _get_date_stats(
+        self,
+        restaurant_id: UUID,
+        upload_id: Optional[UUID] = None,
+        business_dates: Optional[Iterable[date]] = None
+    ) -> Tuple[Optional[date], Optional[date], int]:
+        """
+        (min date, max date, distinct active days) of the restaurant's transactions.
+
+        With an upload and its business dates, the latest score's stats are
+        extended: a date counts as a new active day unless another upload
+        already has a transaction on it. Falls back to a full scan when
+        there is no earlier score (or it predates stored date stats).
+        """
+        if upload_id is not None and business_dates is not None:
+            previous = self.get_latest_score(restaurant_id)
+            date_stats = (previous.component_breakdown or {}).get("date_stats") if previous else None
+            if date_stats is not None:
+                business_dates = set(business_dates)
+                min_date = date.fromisoformat(date_stats["min_date"]) if date_stats["min_date"] else None
+                max_date = date.fromisoformat(date_stats["max_date"]) if date_stats["max_date"] else None
+                if not business_dates:
+                    return min_date, max_date, date_stats["active_days"]
+
+                already_active = self.db.execute(
+                    select(distinct(Transaction.transaction_date)).where(
+                        Transaction.restaurant_id == restaurant_id,
+                        or_(Transaction.upload_id.is_(None), Transaction.upload_id != upload_id),
+                        Transaction.transaction_date.in_(business_dates)
+                    )
+                ).scalars().all()
+
+                return (
+                    min(business_dates | ({min_date} if min_date else set())),
+                    max(business_dates | ({max_date} if max_date else set())),
+                    date_stats["active_days"] + len(business_dates) - len(already_active)
+                )
+
+        return self.db.execute(
+            select(
+                func.min(Transaction.transaction_date),
+                func.max(Transaction.transaction_date),
+                func.count(distinct(Transaction.transaction_date))
+            ).where(Transaction.restaurant_id == restaurant_id)
+        ).first()
+
     def _has_inventory_data(self, restaurant_id: UUID) -> bool:
         stmt = select(InventorySnapshot).where(InventorySnapshot.restaurant_id == restaurant_id).limit(1)
         return self.db.execute(stmt).first() is not None
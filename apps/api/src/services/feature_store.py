@@ -0,0 +1,210 @@
+"""
+On-disk store of per-item forecast training frames.
+
+FeatureEngineeringService.create_training_dataset builds the same frame
+for an item on every forecast, history request and backtest. When a store
+is configured (FEATURE_STORE_DIR), built frames are kept as uncompressed
+Arrow IPC files keyed by (restaurant, item name, FEATURE_VERSION) and read
+back memory-mapped.
+
+Each file carries the watermark it was built at: the latest
+daily_item_sales.updated_at and inventory_snapshots.updated_at of the
+item. Ingestion rewrites the rollup rows of every date an upload touches,
+and snapshots are stamped whenever they are added or their stockout flag
+is edited, so a newer watermark means an upload (or a stockout flag)
+changed the item since; the service then rebuilds only the days from the
+earliest changed date onward (see FeatureEngineeringService).
+
+Files are evicted least recently used first once their total size
+exceeds the configured bound.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+import pandas as pd
+
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the columns or definitions of the training frame change;
+# files of other versions are never read
+FEATURE_VERSION = 1
+
+# Schema metadata keys of a stored frame
+_METADATA_SALES_MARK = b"flux.sales_watermark"
+_METADATA_SNAPSHOT_MARK = b"flux.snapshot_watermark"
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """Latest rollup and stockout snapshot writes a stored frame reflects."""
+    sales_updated_at: Optional[datetime] = None
+    snapshots_updated_at: Optional[datetime] = None
+
+
+@dataclass
+class FeatureStoreStats:
+    """Lookup and maintenance counters since the store was created."""
+    hits: int = 0
+    misses: int = 0
+    incremental_refreshes: int = 0
+    full_builds: int = 0
+    evictions: int = 0
+
+
+class FeatureStore:
+    """Size-bounded, file-backed cache of training frames."""
+
+    SUFFIX = ".arrow"
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: Where frames are stored (created if missing)
+            max_bytes: Total file size above which old frames are evicted
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = FeatureStoreStats()
+        self._lock = threading.Lock()
+        # Path -> file size, least recently used first
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+
+        os.makedirs(directory, exist_ok=True)
+        existing = []
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(self.SUFFIX):
+                    path = os.path.join(root, name)
+                    existing.append((os.path.getmtime(path), path, os.path.getsize(path)))
+        for _, path, size in sorted(existing):
+            self._sizes[path] = size
+
+    def path(self, restaurant_id: UUID, item_name: str) -> str:
+        """File of an item's frame at the current FEATURE_VERSION."""
+        digest = hashlib.sha1(item_name.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.directory, str(restaurant_id), f"{digest}_v{FEATURE_VERSION}{self.SUFFIX}")
+
+    def load(self, restaurant_id: UUID, item_name: str) -> Optional[Tuple[pd.DataFrame, Watermark]]:
+        """
+        Stored frame of an item and the watermark it was built at.
+
+        Returns:
+            (frame indexed by date, watermark), or None if nothing is stored
+        """
+        import pyarrow.feather as feather
+
+        path = self.path(restaurant_id, item_name)
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            if path in self._sizes:
+                self._sizes.move_to_end(path)
+
+        metadata = table.schema.metadata or {}
+        watermark = Watermark(
+            sales_updated_at=_parse_mark(metadata.get(_METADATA_SALES_MARK)),
+            snapshots_updated_at=_parse_mark(metadata.get(_METADATA_SNAPSHOT_MARK)),
+        )
+        frame = table.to_pandas().set_index("date")
+        frame.index.name = None
+        return frame, watermark
+
+    def save(self, restaurant_id: UUID, item_name: str, frame: pd.DataFrame, watermark: Watermark):
+        """Store an item's frame (indexed by date), replacing any previous one."""
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        table = pa.Table.from_pandas(frame.rename_axis("date").reset_index(), preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            _METADATA_SALES_MARK: _format_mark(watermark.sales_updated_at),
+            _METADATA_SNAPSHOT_MARK: _format_mark(watermark.snapshots_updated_at),
+        })
+
+        path = self.path(restaurant_id, item_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never map a partial file; memory
+        # mapping needs the file uncompressed
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._sizes[path] = os.path.getsize(path)
+            self._sizes.move_to_end(path)
+            self._evict()
+
+    def invalidate(self, restaurant_id: UUID, item_name: Optional[str] = None):
+        """Drop the stored frame of an item, or of every item of the restaurant."""
+        if item_name is not None:
+            paths = [self.path(restaurant_id, item_name)]
+        else:
+            prefix = os.path.join(self.directory, str(restaurant_id)) + os.sep
+            with self._lock:
+                paths = [path for path in self._sizes if path.startswith(prefix)]
+
+        with self._lock:
+            for path in paths:
+                self._remove(path)
+
+    def count(self, counter: str):
+        """Increment one of the FeatureStoreStats counters."""
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def _evict(self):
+        """Remove least recently used files until the size bound holds. Caller holds the lock."""
+        total = sum(self._sizes.values())
+        while total > self.max_bytes and len(self._sizes) > 1:
+            path, size = next(iter(self._sizes.items()))
+            self._remove(path)
+            total -= size
+            self.stats.evictions += 1
+            logger.debug("Evicted feature frame %s (%d bytes)", path, size)
+
+    def _remove(self, path: str):
+        self._sizes.pop(path, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _format_mark(mark: Optional[datetime]) -> bytes:
+    return mark.isoformat().encode() if mark is not None else b""
+
+
+def _parse_mark(raw: Optional[bytes]) -> Optional[datetime]:
+    return datetime.fromisoformat(raw.decode()) if raw else None
+
+
+_store: Optional[FeatureStore] = None
+_store_lock = threading.Lock()
+
+
+def get_feature_store() -> Optional[FeatureStore]:
+    """The process-wide feature store, or None if FEATURE_STORE_DIR is unset."""
+    global _store
+    settings = get_settings()
+    if not settings.FEATURE_STORE_DIR:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = FeatureStore(settings.FEATURE_STORE_DIR, settings.FEATURE_STORE_MAX_MB * 1024 * 1024)
+        return _store
@@ -1,5 +1,5 @@
 
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from datetime import date, timedelta
 from uuid import UUID
 
@@ -8,17 +8,130 @@ import numpy as np
 from sqlalchemy import select, func, and_
 from sqlalchemy.orm import Session
 
-from src.models.transaction import Transaction, TransactionItem
+from src.core.business_day import calculate_hours_open_array
+from src.services.feature_store import FeatureStore, Watermark, get_feature_store
+from src.models.transaction import DailyItemSales
 from src.models.menu import MenuItem
 
+# Columns of the daily sales rows a training frame is built from
+SALES_COLUMNS = ["date", "item_name", "quantity", "stockout", "is_promo", "first_order", "last_order"]
+
+# Stockout imputation: median of the same weekday over the previous
+# IMPUTATION_LOOKBACK_WEEKS non-stockout weeks, given at least
+# IMPUTATION_MIN_HISTORY of them; otherwise scale the observed quantity
+IMPUTATION_LOOKBACK_WEEKS = 8
+IMPUTATION_MIN_HISTORY = 2
+IMPUTATION_FALLBACK_MULTIPLIER = 1.3
+
+# Days of raw history one feature row depends on: lag_28/roll_28_mean reach
+# 28 days back, and the imputed quantity there looks back another 8 weeks
+FEATURE_CONTEXT_DAYS = 28 + 7 * IMPUTATION_LOOKBACK_WEEKS
+
+# History kept per item in the feature store
+FEATURE_STORE_HISTORY_DAYS = 365
+
+
+def impute_stockout_demand(df: pd.DataFrame) -> pd.Series:
+    """
+    Unconstrained demand for daily series with stockout flags.
+
+    Each stockout day gets max(observed, median of the same weekday over
+    the previous 8 weeks, skipping stockout days) - partial stockouts keep
+    what was actually sold. With fewer than 2 usable weeks the observed
+    quantity is scaled by 1.3 instead. Non-stockout days are unchanged.
+
+    Computed in one pass: quantities are masked on stockout days, grouped
+    by series and weekday, and each group takes a rolling median of the
+    preceding weeks, so the cost is linear in the number of rows.
+
+    Args:
+        df: Frame with "quantity" (float) and "stockout" (bool) columns,
+            indexed by a contiguous daily DatetimeIndex, or by a
+            (series, date) MultiIndex that is sorted and contiguous
+            within each series
+
+    Returns:
+        Adjusted quantities aligned with df
+    """
+    quantity = df["quantity"]
+    stockout = df["stockout"]
+
+    # Outer index levels identify the series; the last level is the date
+    dates = df.index.get_level_values(-1)
+    keys = [df.index.get_level_values(level) for level in range(df.index.nlevels - 1)]
+    keys.append(dates.dayofweek)
+
+    # Within a (series, weekday) group consecutive rows are consecutive
+    # weeks, so shift(1) starts the window one week back
+    observed = quantity.where(~stockout)
+    same_dow_median = observed.groupby(keys).transform(
+        lambda weeks: weeks.shift(1).rolling(
+            IMPUTATION_LOOKBACK_WEEKS, min_periods=IMPUTATION_MIN_HISTORY
+        ).median()
+    )
+
+    imputed = np.where(
+        same_dow_median.notna(),
+        np.maximum(quantity, same_dow_median),
+        quantity * IMPUTATION_FALLBACK_MULTIPLIER
+    )
+    return quantity.where(~stockout, pd.Series(imputed, index=df.index))
+
+
+def _impute_stockout_demand_iterative(df: pd.DataFrame) -> pd.Series:
+    """
+    Per-stockout-day reference implementation of impute_stockout_demand.
+
+    Builds full-length masks for every stockout day (O(days x stockouts));
+    kept to verify and benchmark the vectorized version.
+    """
+    adjusted = df["quantity"].copy()
+
+    # For each stockout day, impute using median of recent non-stockout days
+    # with same day-of-week (to preserve seasonality)
+    for idx in df[df["stockout"] == True].index:
+        dow = idx.dayofweek
+        # Look back 4-8 weeks for same DOW, excluding stockouts
+        lookback_start = idx - timedelta(days=56)  # 8 weeks
+        lookback_end = idx - timedelta(days=1)
+
+        # Get same-DOW historical values (non-stockout only)
+        historical_mask = (
+            (df.index >= lookback_start) &
+            (df.index < lookback_end) &
+            (df.index.dayofweek == dow) &
+            (df["stockout"] == False)
+        )
+        historical_values = df.loc[historical_mask, "quantity"]
+
+        if len(historical_values) >= 2:
+            # Use median of recent same-DOW non-stockout sales
+            imputed_value = historical_values.median()
+            # Take max of observed and imputed (could have partial stockout)
+            adjusted[idx] = max(df.loc[idx, "quantity"], imputed_value)
+        else:
+            # Fallback: if insufficient history, use conservative 1.3x multiplier
+            # (less aggressive than old 1.5x)
+            adjusted[idx] = df.loc[idx, "quantity"] * 1.3
+
+    return adjusted
+
+
 class FeatureEngineeringService:
     """
     Service for transforming raw transaction data into feature sets for forecasting.
     Handles demand unconstraining (imputation) and feature generation.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, store: Optional[FeatureStore] = None):
+        """
+        Args:
+            db: Database session
+            store: Feature store for single-item training frames
+                (default: the configured one, if any)
+        """
         self.db = db
+        self.store = store if store is not None else get_feature_store()
 
     def create_training_dataset(
         self,
@@ -38,27 +151,31 @@ class FeatureEngineeringService:
             DataFrame with index 'date' and columns:
             [quantity, imputed_quantity, lag_1, lag_7, roll_7_mean, dow, is_weekend, etc.]
         """
+        # Single items are served from the feature store when one is configured
+        if menu_item_id and self.store is not None and days_history <= FEATURE_STORE_HISTORY_DAYS:
+            item = self.db.get(MenuItem, menu_item_id)
+            if item is not None:
+                return self._stored_training_dataset(restaurant_id, item.name, days_history)
+
         # 1. Fetch raw daily sales data with hours open
         cutoff_date = date.today() - timedelta(days=days_history)
 
-        # Base query joining TransactionItem -> Transaction
-        # Include first/last order times to calculate hours_open
+        # Daily per-item sales from the rollup, including the day's
+        # first/last order times to calculate hours_open
         stmt = (
             select(
-                Transaction.transaction_date,
-                TransactionItem.menu_item_name,  # Fallback if menu_item_id linkage is weak
-                func.sum(TransactionItem.quantity).label("daily_qty"),
-                func.bool_or(Transaction.stockout_occurred).label("stockout_flag"),
-                func.bool_or(Transaction.is_promo).label("is_promo"),
-                func.min(Transaction.first_order_time).label("first_order"),
-                func.max(Transaction.last_order_time).label("last_order")
+                DailyItemSales.business_date,
+                DailyItemSales.menu_item_name,  # Fallback if menu_item_id linkage is weak
+                DailyItemSales.quantity.label("daily_qty"),
+                DailyItemSales.stockout_occurred.label("stockout_flag"),
+                DailyItemSales.is_promo,
+                DailyItemSales.first_order_time.label("first_order"),
+                DailyItemSales.last_order_time.label("last_order")
             )
-            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
             .where(
-                Transaction.restaurant_id == restaurant_id,
-                Transaction.transaction_date >= cutoff_date
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.business_date >= cutoff_date
             )
-            .group_by(Transaction.transaction_date, TransactionItem.menu_item_name)
         )
 
 
@@ -106,7 +223,7 @@ class FeatureEngineeringService:
 
 
         # Filter by menu item if provided
-        # Note: TransactionItems currently store 'menu_item_name'.
+        # Note: sales are keyed by 'menu_item_name'.
         # Ideally we join with MenuItem table, but mapping might be via name.
         # Epic 2.3 Auto-creation maps items. Let's assume we can filter by name if ID passed.
 
@@ -116,7 +233,7 @@ class FeatureEngineeringService:
             item = self.db.query(MenuItem).filter(MenuItem.id == menu_item_id).first()
             if item:
                 target_name = item.name
-                stmt = stmt.where(TransactionItem.menu_item_name == target_name)
+                stmt = stmt.where(DailyItemSales.menu_item_name == target_name)
             else:
                 return pd.DataFrame() # Item not found
 
@@ -126,29 +243,367 @@ class FeatureEngineeringService:
             return pd.DataFrame()
 
         # Convert to DataFrame
-        df = pd.DataFrame(results, columns=["date", "item_name", "quantity", "stockout", "is_promo", "first_order", "last_order"])
+        df = pd.DataFrame(results, columns=SALES_COLUMNS)
+
+        manual_stockout_dates = stockout_dates_by_item.get(target_name) if target_name else None
+        return self._build_features(df, manual_stockout_dates)
+
+    def create_training_datasets(
+        self,
+        restaurant_id: UUID,
+        item_names: Optional[List[str]] = None,
+        days_history: int = 365
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Training DataFrames for many items, loaded in one pass.
+
+        Equivalent to calling create_training_dataset once per item, but
+        sales and flagged stockouts are read with one query each for the
+        whole restaurant and features are built by create_panel_dataset.
+
+        Args:
+            restaurant_id: Restaurant UUID
+            item_names: Items to build (default: every item with sales)
+            days_history: How many days of history to retrieve
+
+        Returns:
+            Dict of item name -> DataFrame (same columns as
+            create_training_dataset, without item_name); items without
+            sales are absent
+        """
+        panel = self.create_panel_dataset(restaurant_id, item_names, days_history)
+        if panel.empty:
+            return {}
+        return {
+            item_name: item_frame.droplevel("item_name")
+            for item_name, item_frame in panel.groupby(level="item_name", sort=False)
+        }
+
+    def create_panel_dataset(
+        self,
+        restaurant_id: UUID,
+        item_names: Optional[List[str]] = None,
+        days_history: int = 365
+    ) -> pd.DataFrame:
+        """
+        Training features for many items as one long-format frame.
+
+        Same features as create_training_dataset, computed for all items
+        at once: each item is reindexed to its own full date range, and
+        imputation, lags and rolling means are grouped per item.
+
+        Args:
+            restaurant_id: Restaurant UUID
+            item_names: Items to build (default: every item with sales)
+            days_history: How many days of history to retrieve
+
+        Returns:
+            DataFrame indexed by (item_name, date), sorted by item then
+            date; empty if there are no sales
+        """
+        cutoff_date = date.today() - timedelta(days=days_history)
+        sales, stockout_dates_by_item = self._load_sales(restaurant_id, item_names, cutoff_date)
+        if sales.empty:
+            return pd.DataFrame()
+        return self._build_panel_features(sales, stockout_dates_by_item)
+
+    def _load_sales(
+        self,
+        restaurant_id: UUID,
+        item_names: Optional[List[str]],
+        cutoff_date: date
+    ) -> Tuple[pd.DataFrame, Dict[str, set]]:
+        """
+        Daily sales rows (SALES_COLUMNS) and InventorySnapshot stockout dates per item.
 
+        Args:
+            restaurant_id: Restaurant UUID
+            item_names: Items to load (default: all)
+            cutoff_date: First business date to load
+
+        Returns:
+            (sales frame, item name -> flagged dates); the frame is empty
+            if there are no sales
+        """
+        stmt = (
+            select(
+                DailyItemSales.business_date,
+                DailyItemSales.menu_item_name,
+                DailyItemSales.quantity,
+                DailyItemSales.stockout_occurred,
+                DailyItemSales.is_promo,
+                DailyItemSales.first_order_time,
+                DailyItemSales.last_order_time
+            )
+            .where(
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.business_date >= cutoff_date
+            )
+        )
+        if item_names is not None:
+            stmt = stmt.where(DailyItemSales.menu_item_name.in_(item_names))
+
+        results = self.db.execute(stmt).all()
+        if not results:
+            return pd.DataFrame(columns=SALES_COLUMNS), {}
+
+        from src.models.inventory import InventorySnapshot
+        stockout_stmt = (
+            select(MenuItem.name, InventorySnapshot.date)
+            .join(MenuItem, InventorySnapshot.menu_item_id == MenuItem.id)
+            .where(
+                InventorySnapshot.restaurant_id == restaurant_id,
+                InventorySnapshot.stockout_flag == 'Y',
+                InventorySnapshot.date >= cutoff_date
+            )
+        )
+        if item_names is not None:
+            stockout_stmt = stockout_stmt.where(MenuItem.name.in_(item_names))
+
+        stockout_dates_by_item: Dict[str, set] = {}
+        for item_name, stockout_date in self.db.execute(stockout_stmt).all():
+            stockout_dates_by_item.setdefault(item_name, set()).add(stockout_date)
+
+        return pd.DataFrame(results, columns=SALES_COLUMNS), stockout_dates_by_item
+
+    def _stored_training_dataset(self, restaurant_id: UUID, item_name: str, days_history: int) -> pd.DataFrame:
+        """
+        create_training_dataset for one item, through the feature store.
+
+        A stored frame is used as is while the item's watermark is
+        unchanged. Otherwise only the days from the earliest changed date
+        onward are rebuilt, from the stored raw series of the
+        FEATURE_CONTEXT_DAYS before it plus the newly loaded rows; the
+        frame is built from scratch when there is no stored frame or it
+        does not reach back far enough.
+
+        Rows are kept past the requested window, so the first days of the
+        returned frame can carry lags a fresh build would have dropped.
+        """
+        watermark = self._item_watermark(restaurant_id, item_name)
+        stored = self.store.load(restaurant_id, item_name)
+
+        if stored is not None and stored[1] == watermark:
+            self.store.count("hits")
+            frame = stored[0]
+        else:
+            self.store.count("misses")
+            frame = self._refresh_stored_frame(restaurant_id, item_name, stored)
+            if not frame.empty:
+                keep_from = pd.Timestamp(date.today() - timedelta(days=FEATURE_STORE_HISTORY_DAYS + FEATURE_CONTEXT_DAYS))
+                frame = frame[frame.index >= keep_from]
+                self.store.save(restaurant_id, item_name, frame, watermark)
+
+        if frame.empty:
+            return pd.DataFrame()
+        return frame[frame.index >= pd.Timestamp(date.today() - timedelta(days=days_history))]
+
+    def _refresh_stored_frame(
+        self,
+        restaurant_id: UUID,
+        item_name: str,
+        stored: Optional[Tuple[pd.DataFrame, Watermark]]
+    ) -> pd.DataFrame:
+        """Bring a stored frame up to date, incrementally when it reaches back far enough."""
+        if stored is not None:
+            cached, cached_mark = stored
+            changed_from = self._changed_since(restaurant_id, item_name, cached_mark)
+            if (
+                changed_from is not None
+                and not cached.empty
+                and self._rebuild_start(cached, changed_from) - pd.Timedelta(days=FEATURE_CONTEXT_DAYS)
+                >= cached.index.min()
+            ):
+                sales, stockout_dates_by_item = self._load_sales(restaurant_id, [item_name], changed_from)
+                self.store.count("incremental_refreshes")
+                return self._extend_features(cached, sales, stockout_dates_by_item.get(item_name), changed_from)
+
+        self.store.count("full_builds")
+        cutoff_date = date.today() - timedelta(days=FEATURE_STORE_HISTORY_DAYS)
+        sales, stockout_dates_by_item = self._load_sales(restaurant_id, [item_name], cutoff_date)
+        if sales.empty:
+            return pd.DataFrame()
+        return self._build_features(sales, stockout_dates_by_item.get(item_name))
+
+    def _extend_features(
+        self,
+        cached: pd.DataFrame,
+        sales: pd.DataFrame,
+        manual_stockout_dates: Optional[set],
+        changed_from: date
+    ) -> pd.DataFrame:
+        """
+        Replace the rows of a training frame from changed_from onward.
+
+        Rows from the day after the cached frame's end are rebuilt too, so
+        the sales-free days before changed_from are added (see _rebuild_start).
+
+        Args:
+            cached: Training frame of the item, reaching at least
+                FEATURE_CONTEXT_DAYS before _rebuild_start
+            sales: The item's daily sales rows (SALES_COLUMNS) from changed_from on
+            manual_stockout_dates: InventorySnapshot stockout dates from changed_from on
+            changed_from: Earliest date whose sales or stockout flags changed
+
+        Returns:
+            The frame _build_features gives for the full updated history,
+            rebuilt only from _rebuild_start onward
+        """
+        start = self._rebuild_start(cached, changed_from)
+        context_start = start - pd.Timedelta(days=FEATURE_CONTEXT_DAYS)
+
+        # Raw series before the rebuild start, as stored, plus the reloaded rows
+        series_columns = [c for c in SALES_COLUMNS if c != "date"] + ["hours_open"]
+        parts = [cached.loc[(cached.index >= context_start) & (cached.index < start), series_columns]]
+        if not sales.empty:
+            parts.append(self._prepare_series(sales.copy(), manual_stockout_dates))
+        series = pd.concat(parts)
+        if series.empty:
+            return cached[cached.index < start]
+
+        # Every day from context_start is part of the full series, so days
+        # missing from both parts are sales-free days
+        series = self._fill_missing_days(
+            series.reindex(pd.date_range(start=context_start, end=series.index.max(), freq="D"))
+        )
+        rebuilt = self._add_features(series)
+
+        return pd.concat([cached[cached.index < start], rebuilt[rebuilt.index >= start]])
+
+    @staticmethod
+    def _rebuild_start(cached: pd.DataFrame, changed_from: date) -> pd.Timestamp:
+        """
+        First day _extend_features rebuilds: changed_from, or the day after
+        the cached frame's last row if that is earlier. A frame ends at its
+        last day with sales, so the sales-free days up to changed_from are
+        not stored yet.
+        """
+        return min(pd.Timestamp(changed_from), cached.index.max() + pd.Timedelta(days=1))
+
+    def _item_watermark(self, restaurant_id: UUID, item_name: str) -> Watermark:
+        """Latest rollup write and stockout snapshot of an item."""
+        from src.models.inventory import InventorySnapshot
+
+        sales_updated_at = self.db.execute(
+            select(func.max(DailyItemSales.updated_at)).where(
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.menu_item_name == item_name
+            )
+        ).scalar()
+        snapshots_updated_at = self.db.execute(
+            select(func.max(InventorySnapshot.updated_at))
+            .join(MenuItem, InventorySnapshot.menu_item_id == MenuItem.id)
+            .where(InventorySnapshot.restaurant_id == restaurant_id, MenuItem.name == item_name)
+        ).scalar()
+        return Watermark(sales_updated_at=sales_updated_at, snapshots_updated_at=snapshots_updated_at)
+
+    def _changed_since(self, restaurant_id: UUID, item_name: str, watermark: Watermark) -> Optional[date]:
+        """Earliest date whose rollup row or stockout snapshot was written after the watermark."""
+        from src.models.inventory import InventorySnapshot
+
+        sales_stmt = select(func.min(DailyItemSales.business_date)).where(
+            DailyItemSales.restaurant_id == restaurant_id,
+            DailyItemSales.menu_item_name == item_name
+        )
+        if watermark.sales_updated_at is not None:
+            sales_stmt = sales_stmt.where(DailyItemSales.updated_at > watermark.sales_updated_at)
+
+        snapshot_stmt = (
+            select(func.min(InventorySnapshot.date))
+            .join(MenuItem, InventorySnapshot.menu_item_id == MenuItem.id)
+            .where(InventorySnapshot.restaurant_id == restaurant_id, MenuItem.name == item_name)
+        )
+        if watermark.snapshots_updated_at is not None:
+            snapshot_stmt = snapshot_stmt.where(InventorySnapshot.updated_at > watermark.snapshots_updated_at)
+
+        changed = [d for d in (self.db.execute(sales_stmt).scalar(), self.db.execute(snapshot_stmt).scalar()) if d]
+        return min(changed) if changed else None
+
+    def _build_panel_features(
+        self,
+        sales: pd.DataFrame,
+        stockout_dates_by_item: Optional[Dict[str, set]] = None
+    ) -> pd.DataFrame:
+        """
+        Panel version of _build_features over the daily sales rows of many items.
+
+        Args:
+            sales: Daily sales rows (SALES_COLUMNS), at most one per item and date
+            stockout_dates_by_item: Item name -> dates flagged in InventorySnapshot
+        """
+        df = sales.copy()
+        df["date"] = pd.to_datetime(df["date"])
+
+        # Merge in manually flagged stockouts from InventorySnapshot
+        if stockout_dates_by_item:
+            flagged = pd.MultiIndex.from_tuples(
+                [(name, pd.Timestamp(d)) for name, dates in stockout_dates_by_item.items() for d in dates]
+            )
+            manually_flagged = pd.MultiIndex.from_frame(df[["item_name", "date"]]).isin(flagged)
+            df["stockout"] = df["stockout"].fillna(False).astype(bool) | manually_flagged
+
+        df["hours_open"] = calculate_hours_open_array(df["first_order"], df["last_order"])
+
+        # Reindex every item to its own full date range (first to last sale)
+        spans = df.groupby("item_name")["date"].agg(["min", "max"])
+        lengths = ((spans["max"] - spans["min"]).dt.days + 1).to_numpy()
+        day_offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        full_idx = pd.MultiIndex.from_arrays(
+            [
+                np.repeat(spans.index.to_numpy(), lengths),
+                np.repeat(spans["min"].to_numpy(), lengths) + day_offsets.astype("timedelta64[D]")
+            ],
+            names=["item_name", "date"]
+        )
+        df = self._fill_missing_days(df.set_index(["item_name", "date"]).reindex(full_idx))
+
+        df["adjusted_quantity"] = impute_stockout_demand(df)
+
+        # Lags and rolling means never cross item boundaries
+        target = df.groupby(level="item_name", sort=False)["adjusted_quantity"]
+        df["lag_1"] = target.shift(1)
+        df["lag_7"] = target.shift(7)
+        df["lag_28"] = target.shift(28)
+        df["roll_7_mean"] = target.transform(lambda s: s.shift(1).rolling(window=7).mean())
+        df["roll_28_mean"] = target.transform(lambda s: s.shift(1).rolling(window=28).mean())
+
+        dates = df.index.get_level_values("date")
+        df["dow"] = dates.dayofweek
+        df["month"] = dates.month
+        df["is_weekend"] = df["dow"].isin([5, 6]).astype(int)
+
+        df.dropna(subset=["lag_1", "lag_7", "roll_7_mean"], inplace=True)
+
+        return df
+
+    def _build_features(self, df: pd.DataFrame, manual_stockout_dates: Optional[set] = None) -> pd.DataFrame:
+        """
+        Turn one series of daily sales rows (SALES_COLUMNS) into the training frame.
+
+        Args:
+            df: Daily sales rows of one item
+            manual_stockout_dates: Dates flagged as stockouts in InventorySnapshot
+        """
+        return self._add_features(self._prepare_series(df, manual_stockout_dates))
+
+    def _prepare_series(self, df: pd.DataFrame, manual_stockout_dates: Optional[set] = None) -> pd.DataFrame:
+        """
+        Daily sales rows of one item as a contiguous daily series with hours_open.
+
+        Days without sales are filled with zero quantity and no flags.
+        """
         # Convert date to datetime first, then merge stockouts
         df["date"] = pd.to_datetime(df["date"])
 
         # Merge in manually flagged stockouts from InventorySnapshot
         # If a date is flagged in InventorySnapshot, mark stockout=True
-        if target_name and target_name in stockout_dates_by_item:
-            manual_stockout_dates = stockout_dates_by_item[target_name]
-            df["stockout"] = df.apply(
-                lambda row: row["stockout"] or (row["date"].date() in manual_stockout_dates),
-                axis=1
-            )
+        if manual_stockout_dates:
+            manually_flagged = df["date"].isin(pd.to_datetime(list(manual_stockout_dates)))
+            df["stockout"] = df["stockout"].fillna(False).astype(bool) | manually_flagged
         df.sort_values("date", inplace=True)
 
         # Calculate hours_open from first/last order times
-        # Import centralized business day utility
-        from src.core.business_day import calculate_hours_open
-
-        df["hours_open"] = df.apply(
-            lambda row: calculate_hours_open(row["first_order"], row["last_order"]),
-            axis=1
-        )
+        df["hours_open"] = calculate_hours_open_array(df["first_order"], df["last_order"])
 
         # Handle multiple items (if no ID provided, we'd loop, but for now assuming single target flow)
         # If multiple items returned (no ID filter), we should pivot or group.
@@ -160,14 +615,23 @@ class FeatureEngineeringService:
         # Reindex to ensure full date range (fill missing days with 0)
         full_idx = pd.date_range(start=df["date"].min(), end=df["date"].max(), freq='D')
         df.set_index("date", inplace=True)
-        df = df.reindex(full_idx)
+        return self._fill_missing_days(df.reindex(full_idx))
 
-        # Fill missing values after reindex
+    @staticmethod
+    def _fill_missing_days(df: pd.DataFrame) -> pd.DataFrame:
+        """Fill the days a reindex added: no sales, no flags, default hours."""
         df["quantity"] = df["quantity"].fillna(0).astype(float)
         df["stockout"] = df["stockout"].fillna(False).infer_objects(copy=False).astype(bool)
         df["is_promo"] = df["is_promo"].fillna(False).infer_objects(copy=False).astype(bool)
         df["hours_open"] = df["hours_open"].fillna(12.0)  # Default 12 hours for missing days
+        return df
+
+    def _add_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Imputed demand, lags, rolling means and calendar columns for a _prepare_series frame.
 
+        Rows without the essential lags (the first week) are dropped.
+        """
         # 2. Demand Unconstraining (Imputation)
         # If stockout=True, quantity is likely lower than demand.
         # Impute with: max(current, rolling 7d median of NON-stockout days)
@@ -181,37 +645,7 @@ class FeatureEngineeringService:
 
         # Improved stockout imputation using recent non-stockout history
         # Instead of arbitrary 1.5x multiplier, use statistical approach
-        df["adjusted_quantity"] = df["quantity"].copy()
-
-        # For each stockout day, impute using median of recent non-stockout days
-        # with same day-of-week (to preserve seasonality)
-        for idx in df[df["stockout"] == True].index:
-            dow = idx.dayofweek
-            # Look back 4-8 weeks for same DOW, excluding stockouts
-            lookback_start = idx - timedelta(days=56)  # 8 weeks
-            lookback_end = idx - timedelta(days=1)
-
-            # Get same-DOW historical values (non-stockout only)
-            historical_mask = (
-                (df.index >= lookback_start) &
-                (df.index < lookback_end) &
-                (df.index.dayofweek == dow) &
-                (df["stockout"] == False)
-            )
-            historical_values = df.loc[historical_mask, "quantity"]
-
-            if len(historical_values) >= 2:
-                # Use median of recent same-DOW non-stockout sales
-                imputed_value = historical_values.median()
-                # Take max of observed and imputed (could have partial stockout)
-                df.loc[idx, "adjusted_quantity"] = max(
-                    df.loc[idx, "quantity"],
-                    imputed_value
-                )
-            else:
-                # Fallback: if insufficient history, use conservative 1.3x multiplier
-                # (less aggressive than old 1.5x)
-                df.loc[idx, "adjusted_quantity"] = df.loc[idx, "quantity"] * 1.3
+        df["adjusted_quantity"] = impute_stockout_demand(df)
 
         # 3. Feature Generation
         target = "adjusted_quantity"
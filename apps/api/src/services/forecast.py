@@ -1,84 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Tuple
 from datetime import timedelta, date
 from uuid import UUID
 from decimal import Decimal
 
 import pandas as pd
-import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, and_
+from sqlalchemy import select
 
+from src.core.config import get_settings
 from src.models.forecast import DemandForecast
 from src.models.menu import MenuItem
-from src.models.transaction import Transaction, TransactionItem
+from src.services.category_profiles import (
+    CategoryProfileService,
+    seasonality_multipliers,
+)
 from src.services.features import FeatureEngineeringService
 from src.services.forecasting.bayesian import BayesianForecaster
 
 class ForecastService:
     """
     Orchestrates demand forecasting using the Flux Probabilistic Engine (Bayesian).
+
+    Database access stays on the caller's thread. With max_workers > 1,
+    bulk forecasts split the prediction step across a thread pool; the
+    forecaster seeds its sampling per (restaurant, item, date), so results
+    do not depend on the number of workers.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, max_workers: Optional[int] = None):
+        """
+        Args:
+            db: Database session
+            max_workers: Prediction threads for bulk forecasts
+                (defaults to settings.FORECAST_WORKERS)
+        """
         self.db = db
         self.feature_service = FeatureEngineeringService(db)
         self.forecaster = BayesianForecaster()
-
-    def _get_category_data(self, restaurant_id: UUID, category_name: str, days: int = 90) -> Tuple[pd.DataFrame, Dict[str, List[float]]]:
-        """
-        Fetch category data.
-        Returns:
-            - df: Aggregated daily sales (Sum of all items) for Seasonality.
-            - priors_data: Dict[item_name -> list_of_daily_quantities] for Prior Learning.
-        """
-        start_date = date.today() - timedelta(days=days)
-
-        # Pull raw daily sales for every item in category (or all items)
-        stmt = (
-            select(
-                Transaction.transaction_date,
-                TransactionItem.menu_item_name,
-                TransactionItem.quantity
-            )
-            .join(TransactionItem, Transaction.id == TransactionItem.transaction_id)
-            .join(MenuItem, and_(
-                MenuItem.name == TransactionItem.menu_item_name,
-                MenuItem.restaurant_id == restaurant_id
-            ))
-            .where(
-                Transaction.restaurant_id == restaurant_id,
-                Transaction.transaction_date >= start_date
-            )
-        )
-
-        result = self.db.execute(stmt).all()
-
-        if not result:
-            return pd.DataFrame(columns=["date", "quantity"]), {}
-
-        # 1. Process for Priors (Individual Items)
-        priors_data = {}
-        for r in result:
-            name = r.menu_item_name
-            qty = float(r.quantity)
-            if name not in priors_data:
-                priors_data[name] = []
-            priors_data[name].append(qty)
-
-        # 2. Process for Seasonality (Aggregated)
-        # Sum all quantities per date
-        agg_data = {}
-        for r in result:
-            d = r.transaction_date
-            qty = float(r.quantity)
-            agg_data[d] = agg_data.get(d, 0.0) + qty
-
-        df = pd.DataFrame([{"date": k, "quantity": v} for k,v in agg_data.items()])
-        if not df.empty:
-            df["date"] = pd.to_datetime(df["date"])
-            df.set_index("date", inplace=True)
-
-        return df, priors_data
+        self.max_workers = max_workers or get_settings().FORECAST_WORKERS
 
     def _calculate_seasonality(self, df: pd.DataFrame) -> Dict[int, float]:
         """
@@ -87,45 +47,15 @@ class ForecastService:
         if df.empty:
             return {i: 1.0 for i in range(7)}
 
-        # 1. Add DOW
-        df["dow"] = df.index.dayofweek
-
-        # 2. Mean per DOW
-        dow_means = df.groupby("dow")["quantity"].mean()
-        global_mean = df["quantity"].mean()
-
-        if global_mean == 0:
-             return {i: 1.0 for i in range(7)}
-
-        # 3. Calculate Raw Multipliers with Conservative Shrinkage
-        multipliers = {}
-        for i in range(7):
-            # Raw multiplier = observed mean / global mean
-            m = dow_means.get(i, global_mean) / global_mean
-            if np.isnan(m): m = 1.0
-
-            # Apply shrinkage toward 1.0 for days with limited data
-            # This reduces overfitting while preserving true seasonal patterns
-            day_count = len(df[df["dow"] == i])
-            if day_count < 4:
-                # Strong shrinkage for <4 observations
-                m = 0.7 * m + 0.3 * 1.0
-            elif day_count < 8:
-                # Moderate shrinkage for <8 observations
-                m = 0.85 * m + 0.15 * 1.0
-
-            # Conservative capping to prevent extreme outliers
-            # Allow wider range [0.3, 3.0] to capture real variation
-            m = max(0.3, min(m, 3.0))
-
-            multipliers[i] = float(m)
+        # Per-DOW date counts and totals, as stored in category profiles
+        by_dow = df["quantity"].groupby(df.index.dayofweek).agg(["count", "sum"])
+        by_dow = by_dow.reindex(range(7), fill_value=0)
 
         # NOTE: We do NOT normalize to mean=1.0 because that introduces bias
         # If weekends truly have higher sales, forcing mean=1.0 will
         # underestimate weekend demand and overestimate weekday demand
         # The deseasonalization/reseasonalization process handles level correctly
-
-        return multipliers
+        return seasonality_multipliers(by_dow["count"].tolist(), by_dow["sum"].tolist())
 
     def generate_forecasts(
         self,
@@ -153,7 +83,92 @@ class ForecastService:
             days_history=365
         )
 
-        # 2. Get Context Data (Category/Global) for Seasonality & Priors
+        # 2-4. Category seasonality and priors
+        cat_context, seasonality_profile = self._prepare_category_context(restaurant_id, category)
+
+        # 5-7. Predict
+        saved = self._forecast_item(
+            restaurant_id, menu_item_name, df_item, days_ahead,
+            cat_context, seasonality_profile, today
+        )
+
+        # 8. Save
+        self.db.add_all(saved)
+        self.db.commit()
+        return saved
+
+    def generate_bulk_forecasts(
+        self,
+        restaurant_id: UUID,
+        menu_item_names: Optional[List[str]] = None,
+        days_ahead: int = 7,
+        category: Optional[str] = None
+    ) -> Dict[str, List[DemandForecast]]:
+        """
+        Forecast many items of a restaurant in one pass.
+
+        Matches calling generate_forecasts for each menu item,
+        but history for all items is loaded with one query, category
+        seasonality and priors are computed once per category context, and
+        all DemandForecast rows are written in one commit.
+
+        Args:
+            restaurant_id: Restaurant UUID
+            menu_item_names: Items to forecast (default: all active menu items)
+            days_ahead: Days to forecast per item
+            category: Category context applied to every item (default: Global)
+
+        Returns:
+            Dict of item name -> saved forecasts, in date order
+        """
+        today = date.today()
+
+        if menu_item_names is None:
+            menu_item_names = self.db.execute(
+                select(MenuItem.name)
+                .where(MenuItem.restaurant_id == restaurant_id, MenuItem.is_active.isnot(False))
+                .order_by(MenuItem.name)
+            ).scalars().all()
+        menu_item_names = list(dict.fromkeys(menu_item_names))
+        if not menu_item_names:
+            return {}
+
+        histories = self.feature_service.create_training_datasets(
+            restaurant_id=restaurant_id,
+            item_names=menu_item_names,
+            days_history=365
+        )
+
+        # Items grouped by category context; a single group until items
+        # carry their own category context
+        groups: Dict[Optional[str], List[str]] = {category: menu_item_names}
+
+        predicted: Dict[str, List[DemandForecast]] = {}
+        for context, names in groups.items():
+            cat_context, seasonality_profile = self._prepare_category_context(restaurant_id, context)
+            predicted.update(self._forecast_items(
+                restaurant_id,
+                {name: histories.get(name, pd.DataFrame()) for name in names},
+                days_ahead, cat_context, seasonality_profile, today
+            ))
+
+        forecasts = {name: predicted[name] for name in menu_item_names}
+        self.db.add_all([rec for recs in forecasts.values() for rec in recs])
+        self.db.commit()
+        return forecasts
+
+    def _prepare_category_context(
+        self,
+        restaurant_id: UUID,
+        category: Optional[str]
+    ) -> Tuple[str, Dict[int, float]]:
+        """
+        Seasonality profile and learned priors for a category context.
+
+        Returns:
+            (prior key for the forecaster, DOW -> multiplier)
+        """
+        # Get Context Data (Category/Global) for Seasonality & Priors
         # Usage strategy:
         # - If item has robust history (>28 days), use item's own seasonality?
         #   - No, individual item is noisy. Category is safer.
@@ -161,71 +176,137 @@ class ForecastService:
 
         # Determine effective category name (or fallback to 'Global')
         cat_context = category or "Global"
-        df_cat, priors_raw_data = self._get_category_data(restaurant_id, cat_context)
 
-        # 3. Calculate Seasonality Profile
-        # If Category data is sparse, maybe fallback to Global (Restaurant) is better.
-        seasonality_profile = self._calculate_seasonality(df_cat)
+        # Aggregates of the category and its ancestors over the last 90 days,
+        # cached per restaurant and category until the next upload
+        # (see CategoryProfileService)
+        hierarchy = CategoryProfileService(self.db).get_hierarchy(restaurant_id, cat_context)
+        cat_context, profile = hierarchy[-1]
 
+        # Calculate Seasonality Profile
+        # A subcategory without sales of its own falls back to its nearest
+        # ancestor that has some
+        seasonal = [stats for _, stats in hierarchy if stats.sample_count]
+        seasonality_profile = seasonal[-1].seasonality if seasonal else profile.seasonality
 
-        # 4. Learn Priors (Individual Item Data - Aggregated into one list of 'samples')
+        # Learn Priors
         # We treat every daily sale of every item in the category as a sample observation
-        # from the "Platonic Ideal Item" of that category.
+        # from the "Platonic Ideal Item" of that category, shrunk toward the
+        # parent category's prior (global -> top-level -> subcategory).
         # This gives us a strong prior for the *distribution* of sales.
+        if hierarchy[0][1].sample_count:
+            self.forecaster.learn_hierarchical_priors(
+                [(level, stats.sample_count, stats.sample_sum) for level, stats in hierarchy]
+            )
+
+        return cat_context, seasonality_profile
+
+    def _forecast_item(
+        self,
+        restaurant_id: UUID,
+        menu_item_name: str,
+        df_item: pd.DataFrame,
+        days_ahead: int,
+        cat_context: str,
+        seasonality_profile: Dict[int, float],
+        today: date
+    ) -> List[DemandForecast]:
+        """Predict one item from its training frame; returns unsaved forecast rows."""
+        return self._forecast_items(
+            restaurant_id, {menu_item_name: df_item}, days_ahead,
+            cat_context, seasonality_profile, today
+        )[menu_item_name]
+
+    def _forecast_items(
+        self,
+        restaurant_id: UUID,
+        item_frames: Dict[str, pd.DataFrame],
+        days_ahead: int,
+        cat_context: str,
+        seasonality_profile: Dict[int, float],
+        today: date
+    ) -> Dict[str, List[DemandForecast]]:
+        """
+        Predict items sharing a category context in one forecaster call.
 
-        all_item_sales_samples = []
-        for sales_list in priors_raw_data.values():
-            all_item_sales_samples.extend(sales_list)
-
-        if all_item_sales_samples:
-            self.forecaster.learn_priors({cat_context: all_item_sales_samples})
-
-        # 5. Prepare Prediction Inputs
-        if df_item.empty:
-            history = []
-            history_dows = []
-            last_date = today - timedelta(days=1)
-        else:
-            history = df_item["adjusted_quantity"].tolist()
-            history_dows = df_item.index.dayofweek.tolist()
-            last_date = df_item.index.max().date()
-
-        # 6. Prepare Future DOWs
-        future_dates_str = []
-        future_dows = []
-        curr = last_date + timedelta(days=1)
-        for _ in range(days_ahead):
-            future_dates_str.append(curr.isoformat())
-            future_dows.append(curr.weekday())
-            curr += timedelta(days=1)
-
-        # 7. Predict
-        forecast_dists = self.forecaster.predict_item(
-            item_history=history,
-            history_dows=history_dows,
-            future_dates=future_dates_str,
-            future_dows=future_dows,
-            category=cat_context,
-            seasonal_multipliers=seasonality_profile
+        Returns:
+            Dict of item name -> unsaved forecast rows
+        """
+        names = list(item_frames)
+        histories, history_dows, future_dates, future_dows, last_dates = [], [], [], [], []
+
+        for name in names:
+            df_item = item_frames[name]
+
+            # Prepare Prediction Inputs
+            if df_item.empty:
+                histories.append([])
+                history_dows.append([])
+                last_date = today - timedelta(days=1)
+            else:
+                histories.append(df_item["adjusted_quantity"].tolist())
+                history_dows.append(df_item.index.dayofweek.tolist())
+                last_date = df_item.index.max().date()
+            last_dates.append(last_date)
+
+            # Prepare Future DOWs
+            dates = [last_date + timedelta(days=i + 1) for i in range(days_ahead)]
+            future_dates.append([d.isoformat() for d in dates])
+            future_dows.append([d.weekday() for d in dates])
+
+        # Predict
+        seed_keys = [(restaurant_id, name) for name in names]
+        forecast_dists = self._predict(
+            histories, history_dows, future_dates, future_dows, seed_keys,
+            cat_context, seasonality_profile
         )
 
-        # 8. Save
-        saved = []
-        for i, f in enumerate(forecast_dists):
-            f_date = last_date + timedelta(days=i+1)
-
-            rec = DemandForecast(
-                restaurant_id=restaurant_id,
-                menu_item_name=menu_item_name,
-                forecast_date=f_date,
-                predicted_quantity=Decimal(f"{f.mean:.2f}"),
-                p10_quantity=Decimal(f"{f.p10:.2f}"),
-                p50_quantity=Decimal(f"{f.p50:.2f}"),
-                p90_quantity=Decimal(f"{f.p90:.2f}"),
-                model_name=f"BayesianSeasonal_v1 ({f.logic_trigger})"
+        records = {}
+        for name, last_date, dists in zip(names, last_dates, forecast_dists):
+            records[name] = [
+                DemandForecast(
+                    restaurant_id=restaurant_id,
+                    menu_item_name=name,
+                    forecast_date=last_date + timedelta(days=i+1),
+                    predicted_quantity=Decimal(f"{f.mean:.2f}"),
+                    p10_quantity=Decimal(f"{f.p10:.2f}"),
+                    p50_quantity=Decimal(f"{f.p50:.2f}"),
+                    p90_quantity=Decimal(f"{f.p90:.2f}"),
+                    model_name=f"BayesianSeasonal_v1 ({f.logic_trigger})"
+                )
+                for i, f in enumerate(dists)
+            ]
+
+        return records
+
+    def _predict(
+        self,
+        histories: List[List[float]],
+        history_dows: List[List[int]],
+        future_dates: List[List[str]],
+        future_dows: List[List[int]],
+        seed_keys: List[Tuple],
+        cat_context: str,
+        seasonality_profile: Dict[int, float]
+    ) -> List:
+        """Run the forecaster over items, split into chunks across max_workers threads."""
+        def predict(start: int, end: int):
+            return self.forecaster.predict_items(
+                item_histories=histories[start:end],
+                history_dows=history_dows[start:end],
+                future_dates=future_dates[start:end],
+                future_dows=future_dows[start:end],
+                category=cat_context,
+                seasonal_multipliers=seasonality_profile,
+                seed_keys=seed_keys[start:end]
             )
-            self.db.add(rec)
-            saved.append(rec)
 
-        self.db.commit()
-        return saved
+        workers = min(self.max_workers, len(histories))
+        if workers <= 1:
+            return predict(0, len(histories))
+
+        chunk = -(-len(histories) // workers)  # ceil
+        bounds = [(start, min(start + chunk, len(histories))) for start in range(0, len(histories), chunk)]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="forecast") as pool:
+            chunks = list(pool.map(lambda b: predict(*b), bounds))
+        return [dists for chunk_dists in chunks for dists in chunk_dists]
@@ -8,9 +8,21 @@ Prior: lambda ~ Gamma(alpha, beta)
 Likelihood: y ~ Poisson(lambda)
 Posterior: lambda | y ~ Gamma(alpha + sum(y), beta + n)
 Predictive: y_pred ~ NegBin(n=alpha_post, p=beta_post/(beta_post+1))
+
+Quantiles of the reseasonalized forecast m * y_pred are m times the
+quantiles of y_pred (scaling by m > 0 preserves order), so the default
+"analytic" mode takes them from nbinom.ppf once per item and scales them
+for every horizon. "monte_carlo" mode samples and scales instead; it is
+kept to validate the analytic results.
+
+Sampling never touches NumPy's global RNG: every forecast day draws from
+its own Generator seeded from (seed, restaurant, item, date), so results
+are reproducible regardless of call order and forecasters can run in
+concurrent threads.
 """
+import hashlib
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Dict
+from typing import Any, List, Optional, Sequence, Tuple, Dict
 import numpy as np
 from scipy import stats
 from decimal import Decimal
@@ -37,6 +49,17 @@ class GammaParams:
     def mean(self) -> float:
         return self.alpha / self.beta
 
+def seed_sequence(*key: Any) -> np.random.SeedSequence:
+    """
+    SeedSequence derived from a key such as (seed, restaurant_id, item, date).
+
+    Parts are hashed by their string form, so the same key gives the same
+    stream in every process (unlike hash(), which is salted per process).
+    """
+    digest = hashlib.sha256("|".join(str(part) for part in key).encode()).digest()
+    return np.random.SeedSequence(int.from_bytes(digest[:16], "big"))
+
+
 class BayesianForecaster:
     """
     Seasonal Hierarchical Bayesian Forecaster.
@@ -47,33 +70,93 @@ class BayesianForecaster:
     3. Reseasonalize Forecast: y_pred = NegBin(Posterior) * M_dow_future
     """
 
-    def __init__(self, global_alpha: float = 2.0, global_beta: float = 0.5):
+    QUANTILES = (0.10, 0.50, 0.90, 0.99)
+    # Most observations a parent category's prior counts as in a subcategory's
+    HIERARCHY_PRIOR_STRENGTH = 28.0
+    QUANTILE_METHODS = ("analytic", "monte_carlo")
+
+    def __init__(
+        self,
+        global_alpha: float = 2.0,
+        global_beta: float = 0.5,
+        quantile_method: str = "analytic",
+        n_samples: int = 10000,
+        seed: int = 42
+    ):
         """
         Initialize with weak global priors.
+
+        Args:
+            global_alpha: Global prior shape
+            global_beta: Global prior rate
+            quantile_method: "analytic" (nbinom.ppf) or "monte_carlo" (sampling)
+            n_samples: Samples per forecast day in monte_carlo mode
+            seed: Base seed mixed into every per-day sampling key
         """
+        if quantile_method not in self.QUANTILE_METHODS:
+            raise ValueError(f"Unknown quantile method: {quantile_method}")
+
         self.global_prior = GammaParams(alpha=global_alpha, beta=global_beta)
         self.category_priors: Dict[str, GammaParams] = {}
+        self.quantile_method = quantile_method
+        self.n_samples = n_samples
+        self.seed = seed
 
     def learn_priors(self, category_data: Dict[str, List[float]]):
         """
         Learn category-level priors from historical data (Aggregated/Normalized).
         """
+        # Ideally data here is also de-seasonalized?
+        # For simplicity, if we sum over many weeks, seasonality averages out roughly?
+        # Better: assume 'data' passed here is already 'base sales' or sum of 28 days.
         for cat, data in category_data.items():
-            if not data:
-                self.category_priors[cat] = self.global_prior
-                continue
+            self.learn_prior_totals(cat, len(data), sum(data))
 
-            # Update Global -> Category
-            # Ideally data here is also de-seasonalized?
-            # For simplicity, if we sum over many weeks, seasonality averages out roughly?
-            # Better: assume 'data' passed here is already 'base sales' or sum of 28 days.
+    def learn_prior_totals(self, category: str, n: int, sum_y: float):
+        """
+        Learn a category prior from the count and sum of its observations.
+
+        Same result as learn_priors on the observations themselves, which
+        only enter the conjugate update through n and sum(y).
+        """
+        if n == 0:
+            self.category_priors[category] = self.global_prior
+            return
+
+        # Update Global -> Category
+        cat_alpha = self.global_prior.alpha + sum_y
+        cat_beta = self.global_prior.beta + n
+        self.category_priors[category] = GammaParams(alpha=cat_alpha, beta=cat_beta)
+
+    def learn_hierarchical_priors(self, levels: Sequence[Tuple[str, int, float]]):
+        """
+        Learn priors down a category hierarchy (global -> top-level -> subcategory).
 
-            n = len(data)
-            sum_y = sum(data)
+        A level's parent is the longest earlier level its category_path
+        extends ("Entrees" for "Entrees > Fish"), so siblings share their
+        parent rather than inheriting from each other. Levels without one
+        are learned from the global prior as in learn_prior_totals. Every
+        other level starts from its parent's prior, shrunk to at most
+        HIERARCHY_PRIOR_STRENGTH pseudo-observations with the same mean,
+        and adds its own observations - sparse subcategories stay close to
+        their parent, busy ones follow their own data.
 
-            cat_alpha = self.global_prior.alpha + sum_y
-            cat_beta = self.global_prior.beta + n
-            self.category_priors[cat] = GammaParams(alpha=cat_alpha, beta=cat_beta)
+        Args:
+            levels: (category, n, sum_y) per level, parents before their children
+        """
+        learned: List[str] = []
+        for category, n, sum_y in levels:
+            ancestors = [level for level in learned if category.startswith(level + " > ")]
+            if not ancestors:
+                self.learn_prior_totals(category, n, sum_y)
+            else:
+                parent = self.category_priors[max(ancestors, key=len)]
+                weight = min(1.0, self.HIERARCHY_PRIOR_STRENGTH / parent.beta)
+                self.category_priors[category] = GammaParams(
+                    alpha=parent.alpha * weight + sum_y,
+                    beta=parent.beta * weight + n
+                )
+            learned.append(category)
 
     def predict_item(
         self,
@@ -82,11 +165,43 @@ class BayesianForecaster:
         future_dates: List[str], # Dates to forecast
         future_dows: List[int], # DOWs for forecast
         category: Optional[str] = None,
-        seasonal_multipliers: Optional[Dict[int, float]] = None # DOW -> Multiplier
+        seasonal_multipliers: Optional[Dict[int, float]] = None, # DOW -> Multiplier
+        seed_key: Sequence[Any] = () # e.g. (restaurant_id, item_name); keys sampling RNGs
     ) -> List[ForecastDistribution]:
         """
         Generate probabilistic forecast with De-seasonalization.
         """
+        return self.predict_items(
+            item_histories=[item_history],
+            history_dows=[history_dows],
+            future_dates=[future_dates],
+            future_dows=[future_dows],
+            category=category,
+            seasonal_multipliers=seasonal_multipliers,
+            seed_keys=[seed_key]
+        )[0]
+
+    def predict_items(
+        self,
+        item_histories: List[List[float]],
+        history_dows: List[List[int]],
+        future_dates: List[List[str]],
+        future_dows: List[List[int]],
+        category: Optional[str] = None,
+        seasonal_multipliers: Optional[Dict[int, float]] = None,
+        seed_keys: Optional[List[Sequence[Any]]] = None
+    ) -> List[List[ForecastDistribution]]:
+        """
+        Forecast several items sharing a prior and seasonality profile.
+
+        Arguments are per-item lists of predict_item's arguments
+        (seed_keys defaults to no key for every item). In
+        analytic mode the base quantiles of all items come from one
+        vectorized nbinom.ppf call and are scaled for every horizon at once.
+
+        Returns:
+            One forecast list per item, in input order
+        """
         # 1. Select Prior (Hierarchy)
         prior = self.global_prior
         prior_source = "Global"
@@ -95,10 +210,53 @@ class BayesianForecaster:
             prior = self.category_priors[category]
             prior_source = "Category"
 
-        # 2. De-seasonalize History
         # If no profile provided, assume flat (multiplier=1.0)
         multipliers = seasonal_multipliers or {i: 1.0 for i in range(7)}
 
+        # 2-3. De-seasonalize and update each item's posterior
+        posteriors = [
+            self._posterior(prior, history, dows, multipliers)
+            for history, dows in zip(item_histories, history_dows)
+        ]
+
+        # Base Predictive Dist (Negative Binomial)
+        # scipy nbinom: n=alpha_post, p=beta_post/(beta_post+1)
+        nb_n = np.array([alpha for alpha, _, _ in posteriors], dtype=float)
+        post_beta = np.array([beta for _, beta, _ in posteriors], dtype=float)
+        nb_p = post_beta / (post_beta + 1.0)
+
+        if self.quantile_method == "analytic":
+            # Rows: items; columns: mean then QUANTILES
+            base_stats = np.column_stack([
+                stats.nbinom.mean(nb_n, nb_p),
+                stats.nbinom.ppf(np.array(self.QUANTILES)[:, None], nb_n, nb_p).T
+            ])
+
+        results = []
+        for idx, (dates, dows) in enumerate(zip(future_dates, future_dows)):
+            n = posteriors[idx][2]
+            # 4. Re-seasonalize: multiplier per forecast day
+            m = np.array([multipliers.get(dow, 1.0) for dow in dows], dtype=float)
+
+            if self.quantile_method == "analytic":
+                # Quantiles scale with m; shape (days, mean + quantiles)
+                day_stats = m[:, None] * base_stats[idx]
+            else:
+                key = seed_keys[idx] if seed_keys is not None else ()
+                day_stats = self._monte_carlo_stats(nb_n[idx], nb_p[idx], m, dates, key)
+
+            results.append(self._distributions(dates, m, day_stats, n, prior_source))
+
+        return results
+
+    def _posterior(
+        self,
+        prior: GammaParams,
+        item_history: List[float],
+        history_dows: List[int],
+        multipliers: Dict[int, float]
+    ) -> Tuple[float, float, int]:
+        """Posterior (alpha, beta) and observation count from de-seasonalized history."""
         deseasonalized_history = []
         for y, dow in zip(item_history, history_dows):
             # Safe division - handle very small or zero multipliers
@@ -111,49 +269,52 @@ class BayesianForecaster:
             y_prime = y / m
             deseasonalized_history.append(y_prime)
 
-        # 3. Bayesian Update (on Base Sales)
+        # Bayesian Update (on Base Sales)
         n = len(deseasonalized_history)
         sum_y_prime = sum(deseasonalized_history)
 
-        post_alpha = prior.alpha + sum_y_prime
-        post_beta = prior.beta + n
+        return prior.alpha + sum_y_prime, prior.beta + n, n
 
-        # Calculate Base Predictive Dist (Negative Binomial)
-        # scipy nbinom: n=alpha_post, p=beta_post/(beta_post+1)
-        nb_n = post_alpha
-        nb_p = post_beta / (post_beta + 1.0)
+    def _monte_carlo_stats(
+        self,
+        nb_n: float,
+        nb_p: float,
+        m: np.ndarray,
+        dates: List[str],
+        seed_key: Sequence[Any]
+    ) -> np.ndarray:
+        """Mean and QUANTILES per forecast day from scaled samples; shape (days, 5)."""
+        rows = []
+        for multiplier, date_str in zip(m, dates):
+            # Own generator per (seed, key, date): reproducible and thread-safe
+            rng = np.random.default_rng(seed_sequence(self.seed, *seed_key, date_str))
+
+            # Sample from base distribution, scale, compute empirical quantiles
+            base_samples = stats.nbinom.rvs(nb_n, nb_p, size=self.n_samples, random_state=rng)
+            scaled_samples = base_samples * multiplier
+            rows.append([
+                np.mean(scaled_samples),
+                *np.percentile(scaled_samples, [q * 100 for q in self.QUANTILES])
+            ])
+        return np.array(rows, dtype=float).reshape(len(m), 1 + len(self.QUANTILES))
 
+    @staticmethod
+    def _distributions(
+        dates: List[str],
+        m: np.ndarray,
+        day_stats: np.ndarray,
+        n: int,
+        prior_source: str
+    ) -> List[ForecastDistribution]:
         # Confidence Score: Sigmoid of 'n' (observations)
         # n=0 -> low, n=30 -> high
         confidence = 1.0 / (1.0 + np.exp(-(n - 5.0) / 5.0))
 
         forecasts = []
-
-        # Use Monte Carlo sampling for correct reseasonalization
-        # This preserves the exact percentile meanings after scaling
-        n_samples = 10000
-        np.random.seed(42)  # For reproducibility
-
-        for i, (date_str, dow) in enumerate(zip(future_dates, future_dows)):
-            # 4. Re-seasonalize using Monte Carlo
-            m = multipliers.get(dow, 1.0)
-
-            # CORRECT METHOD: Sample from base distribution, scale, compute quantiles
-            # If we simply multiply quantiles by m, we lose percentile meaning
-            # Instead: sample -> scale -> empirical quantiles
-            base_samples = stats.nbinom.rvs(nb_n, nb_p, size=n_samples)
-            scaled_samples = base_samples * m
-
-            # Compute quantiles from scaled distribution
-            mean = float(np.mean(scaled_samples))
-            p10 = float(np.percentile(scaled_samples, 10))
-            p50 = float(np.percentile(scaled_samples, 50))
-            p90 = float(np.percentile(scaled_samples, 90))
-            p99 = float(np.percentile(scaled_samples, 99))
-
+        for date_str, multiplier, (mean, p10, p50, p90, p99) in zip(dates, m, day_stats):
             explanation = []
-            if abs(m - 1.0) > 0.1:
-                explanation.append(f"Seasonality {m:.2f}x")
+            if abs(multiplier - 1.0) > 0.1:
+                explanation.append(f"Seasonality {multiplier:.2f}x")
 
             if n < 5:
                 explanation.append(f"Cold Start ({prior_source} Prior)")
@@ -162,11 +323,11 @@ class BayesianForecaster:
 
             forecasts.append(ForecastDistribution(
                 date=date_str,
-                mean=mean,
-                p10=p10,
-                p50=p50,
-                p90=p90,
-                p99=p99,
+                mean=float(mean),
+                p10=float(p10),
+                p50=float(p50),
+                p90=float(p90),
+                p99=float(p99),
                 confidence_score=float(confidence),
                 logic_trigger=trigger
             ))
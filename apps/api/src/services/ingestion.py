@@ -2,20 +2,27 @@
 Transaction ingestion service with deduplication and batch processing.
 """
 import hashlib
-from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Callable, Dict, List, Optional, Set, Tuple
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from src.models.data_upload import DataUpload
 from src.models.ingestion_log import IngestionLog
-from src.models.transaction import Transaction, TransactionItem
-from src.services.csv_parser import ParsedRow, ParseResult
+from src.models.transaction import TransactionItem
+from src.services.csv_parser import CSVStream, ParsedRow, ParseResult, ValidationError
+from src.services.daily_sales import DailySalesRollupService
 from src.services.menu_extraction import MenuItemExtractionService
-from src.core.business_day import get_business_date, BUSINESS_DAY_START_HOUR
+from src.services.post_ingest import AffectedScope, PostIngestService
+from src.services.promotion_detection import PromotionDetectionService
+from src.services.transaction_writer import (
+    BulkTransactionWriter,
+    DaySummary,
+    create_transaction_writer,
+)
+from src.core.business_day import get_business_date
 
 
 class IngestionResult:
@@ -29,6 +36,8 @@ class IngestionResult:
         self.items_found = 0
         self.price_changes_detected = 0
         self.errors: List[Dict] = []
+        # Items/dates written by the upload, for post-ingest analytics
+        self.scope: Optional[AffectedScope] = None
 
     def to_dict(self) -> Dict:
         """Convert to dictionary for API response."""
@@ -43,6 +52,14 @@ class IngestionResult:
             "errors": self.errors[:10],  # Limit to first 10 errors
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "IngestionResult":
+        """Rebuild a result from to_dict() output (e.g. an upload checkpoint)."""
+        result = cls()
+        for key, value in data.items():
+            setattr(result, key, list(value) if key == "errors" else value)
+        return result
+
 
 class TransactionIngestionService:
     """
@@ -50,25 +67,39 @@ class TransactionIngestionService:
 
     Features:
     - File-level deduplication (hash entire file)
-    - Row-level deduplication (hash individual rows)
-    - Batch inserts for performance (1000 rows per batch)
+    - Row-level deduplication (hash individual rows, unique per restaurant)
+    - Batch inserts for performance (1000 rows per multi-row INSERT)
+    - Streaming ingestion (ingest_stream) with memory bounded by chunk size
+    - Optional checkpoint commits, so a failed stream can resume where the
+      last durable batch ended instead of starting over
+    - daily_item_sales rollup refreshed for the touched business dates in
+      the same transaction as the rows
     - Detailed error logging to IngestionLog table
     - Transaction atomicity (all-or-nothing per batch)
     """
 
-    BATCH_SIZE = 1000
+    BATCH_SIZE = BulkTransactionWriter.BATCH_SIZE
 
-    def __init__(self, db: Session, enable_menu_extraction: bool = True):
+    def __init__(
+        self,
+        db: Session,
+        enable_menu_extraction: bool = True,
+        bulk_insert: bool = True
+    ):
         """
         Initialize ingestion service.
 
         Args:
             db: SQLAlchemy database session
             enable_menu_extraction: Whether to auto-create menu items (default True)
+            bulk_insert: Write rows with multi-row INSERTs (default True);
+                False falls back to one ORM object per row
         """
         self.db = db
         self.enable_menu_extraction = enable_menu_extraction
+        self.bulk_insert = bulk_insert
         self.menu_extraction_service = MenuItemExtractionService(db) if enable_menu_extraction else None
+        self.promotion_detector = PromotionDetectionService(db)
 
     def compute_file_hash(self, file_bytes: bytes) -> str:
         """
@@ -121,6 +152,30 @@ class TransactionIngestionService:
         result = self.db.execute(stmt).scalar_one_or_none()
         return result
 
+    def find_resumable_upload(
+        self,
+        restaurant_id: UUID,
+        file_hash: str
+    ) -> Optional[UUID]:
+        """
+        Find an unfinished upload of the same file with committed checkpoints.
+
+        Args:
+            restaurant_id: Restaurant UUID
+            file_hash: SHA-256 hash of file content
+
+        Returns:
+            Upload ID of the most recent resumable upload, None otherwise
+        """
+        stmt = select(DataUpload.id).where(
+            DataUpload.restaurant_id == restaurant_id,
+            DataUpload.file_hash == file_hash,
+            DataUpload.status.in_(["PROCESSING", "FAILED"]),
+            DataUpload.checkpoint_row > 0
+        ).order_by(DataUpload.created_at.desc()).limit(1)
+
+        return self.db.execute(stmt).scalar_one_or_none()
+
     def get_existing_row_hashes(
         self,
         restaurant_id: UUID,
@@ -129,6 +184,9 @@ class TransactionIngestionService:
         """
         Get set of row hashes that already exist in database.
 
+        Only needed by the ORM fallback writer; the bulk writer relies on
+        ON CONFLICT DO NOTHING against the unique hash index instead.
+
         Args:
             restaurant_id: Restaurant UUID
             row_hashes: List of row hashes to check
@@ -136,14 +194,10 @@ class TransactionIngestionService:
         Returns:
             Set of existing row hashes
         """
-        # Query TransactionItem hashes by joining with Transaction to filter by restaurant
-        stmt = (
-            select(TransactionItem.source_hash)
-            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
-            .where(
-                Transaction.restaurant_id == restaurant_id,
-                TransactionItem.source_hash.in_(row_hashes)
-            )
+        # Served by the (restaurant_id, source_hash) unique index, no join needed
+        stmt = select(TransactionItem.source_hash).where(
+            TransactionItem.restaurant_id == restaurant_id,
+            TransactionItem.source_hash.in_(row_hashes)
         )
 
         results = self.db.execute(stmt).scalars().all()
@@ -179,6 +233,26 @@ class TransactionIngestionService:
         )
         self.db.add(log_entry)
 
+    def compute_stream_hash(self, file_obj: BinaryIO, block_size: int = 1024 * 1024) -> str:
+        """
+        Compute SHA-256 hash of a file object without loading it into memory.
+
+        The file is rewound afterwards so it can be parsed.
+
+        Args:
+            file_obj: Seekable binary file object
+            block_size: Bytes read per iteration
+
+        Returns:
+            Hexadecimal hash string (same as compute_file_hash on the full bytes)
+        """
+        digest = hashlib.sha256()
+        file_obj.seek(0)
+        for block in iter(lambda: file_obj.read(block_size), b""):
+            digest.update(block)
+        file_obj.seek(0)
+        return digest.hexdigest()
+
     def ingest_transactions(
         self,
         restaurant_id: UUID,
@@ -200,8 +274,164 @@ class TransactionIngestionService:
         """
         result = IngestionResult()
 
-        # Check file-level duplicate
         file_hash = self.compute_file_hash(file_bytes)
+        if self._reject_duplicate_file(restaurant_id, file_hash, result):
+            return result
+
+        state = self._new_state(restaurant_id, upload_id)
+        self._ingest_rows(restaurant_id, upload_id, parse_result.parsed_rows, state, result)
+        self._log_parse_errors(upload_id, parse_result.errors, result)
+        state.writer.finish()
+
+        self._record_file_hash(upload_id, file_hash)
+        self._commit(state, result)
+        return result
+
+    def ingest_stream(
+        self,
+        restaurant_id: UUID,
+        upload_id: UUID,
+        stream: CSVStream,
+        file_hash: str,
+        on_progress: Optional[Callable[[IngestionResult], None]] = None,
+        checkpoint_rows: Optional[int] = None,
+        resume: bool = False
+    ) -> IngestionResult:
+        """
+        Ingest a streaming CSV parse chunk by chunk.
+
+        Each chunk is flushed before the next one is read, so memory stays
+        bounded by the chunk size rather than the file size. Row dedup
+        against earlier chunks goes through the database (unique hash
+        index), which already sees the flushed rows inside this
+        transaction.
+
+        Without checkpoint_rows everything is committed once at the end.
+        With it, the rows ingested so far are committed whenever at least
+        that many rows have been read since the last checkpoint, and the
+        upload records the last committed row (checkpoint_row) together
+        with the running counters. A later call with resume=True on the
+        same file skips those rows, continues the upload's transactions
+        and picks up the counters, so nothing is ingested twice.
+
+        Args:
+            restaurant_id: Restaurant UUID
+            upload_id: Upload UUID
+            stream: Open CSVStream (see CSVParser.stream_csv and
+                ColumnarCSVParser.stream_csv)
+            file_hash: SHA-256 of the file (see compute_stream_hash)
+            on_progress: Optional callback invoked with the running result
+                after each chunk is flushed
+            checkpoint_rows: Commit every this many rows (None: commit once)
+            resume: Continue from the upload's last checkpoint
+
+        Returns:
+            IngestionResult with statistics and errors
+        """
+        result = IngestionResult()
+
+        if self._reject_duplicate_file(restaurant_id, file_hash, result):
+            stream.close()
+            return result
+
+        state = self._new_state(restaurant_id, upload_id)
+        if resume:
+            result = self._restore_checkpoint(upload_id, stream, state)
+
+        rows_since_checkpoint = 0
+        for chunk in stream:
+            self._ingest_rows(restaurant_id, upload_id, chunk.parsed_rows, state, result)
+            self._log_parse_errors(upload_id, chunk.errors, result)
+            self.db.flush()
+
+            rows_since_checkpoint += len(chunk.parsed_rows) + len(chunk.errors)
+            if checkpoint_rows and rows_since_checkpoint >= checkpoint_rows:
+                self._checkpoint(upload_id, file_hash, stream.last_row, state, result)
+                rows_since_checkpoint = 0
+
+            if on_progress:
+                on_progress(result)
+        state.writer.finish()
+
+        self._record_file_hash(upload_id, file_hash)
+        self._record_checkpoint(upload_id, stream.last_row, state, result)
+        self._commit(state, result)
+        return result
+
+    def _new_state(self, restaurant_id: UUID, upload_id: UUID) -> "_IngestionState":
+        return _IngestionState(
+            create_transaction_writer(self.db, restaurant_id, upload_id, bulk=self.bulk_insert),
+            AffectedScope(restaurant_id, upload_id)
+        )
+
+    def _checkpoint(
+        self,
+        upload_id: UUID,
+        file_hash: str,
+        last_row: int,
+        state: "_IngestionState",
+        result: IngestionResult
+    ):
+        """Durably commit everything ingested through last_row."""
+        state.writer.finish()
+        self._refresh_rollup(state)
+        self._record_file_hash(upload_id, file_hash)
+        self._record_checkpoint(upload_id, last_row, state, result)
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _record_checkpoint(
+        self,
+        upload_id: UUID,
+        last_row: int,
+        state: "_IngestionState",
+        result: IngestionResult
+    ):
+        """Record the last committed row, the counters and affected scope as of that row."""
+        upload = self.db.query(DataUpload).filter(DataUpload.id == upload_id).first()
+        if upload:
+            upload.checkpoint_row = last_row
+            upload.checkpoint = {**result.to_dict(), "scope": state.scope.to_dict()}
+
+    def _restore_checkpoint(
+        self,
+        upload_id: UUID,
+        stream: CSVStream,
+        state: "_IngestionState"
+    ) -> IngestionResult:
+        """Position stream and writer after the upload's last checkpoint."""
+        upload = self.db.query(DataUpload).filter(DataUpload.id == upload_id).first()
+        if upload is None or not upload.checkpoint_row:
+            return IngestionResult()
+
+        stream.skip_through(upload.checkpoint_row)
+        state.writer.load_existing()
+
+        checkpoint = dict(upload.checkpoint or {})
+        state.scope.merge(AffectedScope.from_dict(
+            state.scope.restaurant_id, upload_id, checkpoint.pop("scope", {})
+        ))
+
+        result = IngestionResult.from_dict(checkpoint)
+        state.items_created_before = result.items_created
+        state.items_found_before = result.items_found
+        return result
+
+    def _reject_duplicate_file(
+        self,
+        restaurant_id: UUID,
+        file_hash: str,
+        result: IngestionResult
+    ) -> bool:
+        """
+        Check for an already-ingested copy of the file.
+
+        Returns:
+            True if the file is a duplicate (error recorded on result)
+        """
         duplicate_upload_id = self.check_file_duplicate(restaurant_id, file_hash)
 
         if duplicate_upload_id:
@@ -209,31 +439,61 @@ class TransactionIngestionService:
                 "type": "duplicate_file",
                 "message": f"File already uploaded (upload_id: {duplicate_upload_id})"
             })
-            return result
+            return True
+
+        return False
 
-        # Update upload with file hash
+    def _record_file_hash(self, upload_id: UUID, file_hash: str):
+        """
+        Update upload with file hash.
+
+        Done right before commit so the upload row is not locked while
+        rows are ingested and progress can be written from another session.
+        """
         upload = self.db.query(DataUpload).filter(DataUpload.id == upload_id).first()
         if upload:
             upload.file_hash = file_hash
 
+    def _ingest_rows(
+        self,
+        restaurant_id: UUID,
+        upload_id: UUID,
+        rows: List[ParsedRow],
+        state: "_IngestionState",
+        result: IngestionResult
+    ):
+        """
+        Ingest one batch of parsed rows.
+
+        The writer in `state` keeps one transaction per business date, so a
+        date that spans several batches still maps to a single Transaction
+        whose totals and order times are merged across batches.
+        """
+        if not rows:
+            return
+
+        self._classify_promotions(rows)
+
         # Group rows by business date to create transactions
-        transactions_by_date: Dict[str, List[ParsedRow]] = {}
+        transactions_by_date: Dict[date, List[ParsedRow]] = {}
 
-        for row in parse_result.parsed_rows:
+        for row in rows:
             # Use centralized business day logic (handles 4 AM cutoff consistently)
             # TODO: Add restaurant timezone support - for now assumes UTC
             business_date = get_business_date(row.date, restaurant_timezone=None)
-
-            date_key = business_date.isoformat()
-            if date_key not in transactions_by_date:
-                transactions_by_date[date_key] = []
-            transactions_by_date[date_key].append(row)
-
-        # Compute row hashes for deduplication
-        all_row_hashes = [self.compute_row_hash(row) for row in parse_result.parsed_rows]
-        existing_hashes = self.get_existing_row_hashes(restaurant_id, all_row_hashes)
+            transactions_by_date.setdefault(business_date, []).append(row)
+
+        # Compute row hashes for deduplication. The bulk writer lets the
+        # unique (restaurant_id, source_hash) index reject known rows; the
+        # ORM fallback has to look them up first.
+        row_hashes = {id(row): self.compute_row_hash(row) for row in rows}
+        if state.writer.dedups_on_insert:
+            existing_hashes = set()
+        else:
+            existing_hashes = self.get_existing_row_hashes(restaurant_id, list(row_hashes.values()))
 
         # Extract and auto-create menu items if enabled
+        menu_items_map = {}
         if self.enable_menu_extraction and self.menu_extraction_service:
             items_data = [
                 {
@@ -241,106 +501,94 @@ class TransactionIngestionService:
                     'price': row.unit_price,
                     'transaction_date': row.date
                 }
-                for row in parse_result.parsed_rows
+                for row in rows
             ]
+            price_changes_before = self.menu_extraction_service.price_changes_detected
             menu_items_map = self.menu_extraction_service.extract_items_from_transaction_data(
                 restaurant_id=restaurant_id,
                 items_data=items_data
             )
-            result.items_created = sum(1 for item in menu_items_map.values() if item.auto_created)
-            result.items_found = len(menu_items_map) - result.items_created
-        else:
-            menu_items_map = {}
+            result.price_changes_detected += (
+                self.menu_extraction_service.price_changes_detected - price_changes_before
+            )
+            for name, item in menu_items_map.items():
+                state.menu_items_seen[name] = bool(item.auto_created)
+            items_created = sum(1 for created in state.menu_items_seen.values() if created)
+            result.items_created = state.items_created_before + items_created
+            result.items_found = state.items_found_before + len(state.menu_items_seen) - items_created
 
         # Create transactions with batch processing
-        for date_str, rows in transactions_by_date.items():
-            # Calculate transaction total
-            total_amount = sum(row.total for row in rows)
-
-            # Calculate operating hours with offset logic
-            row_times = [row.date.time() for row in rows]
-            if row_times:
-                # Normalize minutes relative to day start (4 AM)
-                # 04:00 is 0, 05:00 is 60... 02:00 (next day) is 22*60
-                def get_offset_minutes(t):
-                    minutes = t.hour * 60 + t.minute
-                    if t.hour < BUSINESS_DAY_START_HOUR:
-                        minutes += 24 * 60
-                    return minutes
-
-                # Find min/max in "offset minute space"
-                sorted_times = sorted(row_times, key=get_offset_minutes)
-                first_order_time = sorted_times[0]
-                last_order_time = sorted_times[-1]
-            else:
-                first_order_time = None
-                last_order_time = None
-
-            # Detect promotions using parsed discount information
-            is_promo_day = False
-            total_discount = Decimal("0.00")
-
-            for row in rows:
-                # Use promotion detection results from CSV parser
-                if row.is_promotion:
-                    is_promo_day = True
-                    if row.discount_amount:
-                        total_discount += row.discount_amount
-
-            # Create transaction
-            # Use date_str (adjusted for day start offset) as the transaction date
-            from datetime import date as date_type
-            adjusted_tx_date = date_type.fromisoformat(date_str)
-            transaction = Transaction(
-                restaurant_id=restaurant_id,
-                transaction_date=adjusted_tx_date,
-                total_amount=Decimal(str(total_amount)),
-                upload_id=upload_id,
-                is_promo=is_promo_day,
-                discount_amount=total_discount if total_discount > 0 else None,
-                first_order_time=first_order_time,
-                last_order_time=last_order_time,
-                source_hash=None  # Transactions don't have individual hashes, only items do
-            )
-            self.db.add(transaction)
-            self.db.flush()  # Get transaction ID
+        for business_date, date_rows in transactions_by_date.items():
+            transaction_id = state.writer.add_day(business_date, DaySummary.from_rows(date_rows))
 
             # Create transaction items
-            for row in rows:
+            for row in date_rows:
                 result.rows_processed += 1
 
-                # Compute row hash
-                row_hash = self.compute_row_hash(row)
+                row_hash = row_hashes[id(row)]
 
                 # Check for duplicate
                 if row_hash in existing_hashes:
-                    result.rows_skipped_duplicate += 1
-                    self.log_error(
-                        upload_id=upload_id,
-                        row_number=row.row_number,
-                        field="row",
-                        message="Duplicate row detected",
-                        severity="warning"
-                    )
+                    self._record_duplicate(upload_id, row.row_number, result)
                     continue
 
                 # Create transaction item
-                tx_item = TransactionItem(
-                    transaction_id=transaction.id,
-                    menu_item_name=row.item_name,
-                    quantity=row.quantity,
-                    unit_price=row.unit_price,
-                    total=row.total,
-                    source_hash=row_hash
+                menu_item = menu_items_map.get(row.item_name)
+                state.writer.add_item(
+                    transaction_id, business_date, row, row_hash,
+                    menu_item_id=menu_item.id if menu_item is not None else None
                 )
-                self.db.add(tx_item)
-                result.rows_inserted += 1
+                state.scope.add(row.item_name, business_date)
+                state.rollup_dates.add(business_date)
 
-                # Mark hash as seen to avoid duplicates within same upload
+                # Mark hash as seen to avoid duplicates within same batch
                 existing_hashes.add(row_hash)
 
-        # Log any parsing errors from CSV parser
-        for error in parse_result.errors:
+        self._flush_writer(state, upload_id, result)
+
+    def _classify_promotions(self, rows: List[ParsedRow]):
+        """
+        Run batch promotion detection on rows the parser did not classify.
+
+        CSVParser always sets promotion_type; rows built elsewhere (None)
+        are classified here so day summaries still see promos and discounts.
+        """
+        unclassified = [row for row in rows if row.promotion_type is None]
+        if not unclassified:
+            return
+
+        detections = self.promotion_detector.detect_discounts(unclassified)
+        for row, detection in zip(unclassified, detections):
+            row.discount_amount = detection.discount_amount
+            row.is_promotion = detection.is_promo
+            row.promotion_type = detection.discount_type
+
+    def _flush_writer(self, state: "_IngestionState", upload_id: UUID, result: IngestionResult):
+        """Write pending rows and record inserted/duplicate counts."""
+        state.writer.flush()
+        inserted, duplicate_rows = state.writer.drain()
+        result.rows_inserted += inserted
+        for row_number in duplicate_rows:
+            self._record_duplicate(upload_id, row_number, result)
+
+    def _record_duplicate(self, upload_id: UUID, row_number: int, result: IngestionResult):
+        result.rows_skipped_duplicate += 1
+        self.log_error(
+            upload_id=upload_id,
+            row_number=row_number,
+            field="row",
+            message="Duplicate row detected",
+            severity="warning"
+        )
+
+    def _log_parse_errors(
+        self,
+        upload_id: UUID,
+        errors: List[ValidationError],
+        result: IngestionResult
+    ):
+        """Log parsing errors from the CSV parser."""
+        for error in errors:
             result.rows_failed += 1
             self.log_error(
                 upload_id=upload_id,
@@ -356,22 +604,26 @@ class TransactionIngestionService:
                 "message": error.message
             })
 
+    def _refresh_rollup(self, state: "_IngestionState"):
+        """Rebuild daily_item_sales for dates written since the last commit."""
+        if state.rollup_dates:
+            DailySalesRollupService(self.db).refresh(state.scope.restaurant_id, state.rollup_dates)
+            state.rollup_dates = set()
+
+    def _commit(self, state: "_IngestionState", result: IngestionResult):
+        """Commit ingested rows and refresh derived analytics for the affected scope."""
+        result.scope = state.scope
         try:
+            self._refresh_rollup(state)
             self.db.commit()
 
-            # Recalculate data health score
-            from src.services.data_health import DataHealthService
-            health_service = DataHealthService(self.db)
-            health_service.calculate_score(restaurant_id)
+            # Update data health score
+            post_ingest = PostIngestService(self.db)
+            post_ingest.update_health(state.scope)
 
             # Run statistical promotion inference (non-blocking)
             try:
-                from src.services.promotion_detection import PromotionDetectionService
-                promo_service = PromotionDetectionService(self.db)
-                promotions_inferred = promo_service.detect_and_save_promotions(
-                    restaurant_id=restaurant_id,
-                    confidence_threshold=0.6
-                )
+                promotions_inferred = post_ingest.detect_promotions(state.scope)
                 if promotions_inferred > 0:
                     result.errors.append({
                         "type": "info",
@@ -392,4 +644,16 @@ class TransactionIngestionService:
             })
             raise
 
-        return result
+
+class _IngestionState:
+    """Per-upload state carried across ingestion batches."""
+
+    def __init__(self, writer, scope: AffectedScope):
+        self.writer = writer
+        self.scope = scope
+        # Business dates whose daily_item_sales rows are not yet refreshed
+        self.rollup_dates: Set[date] = set()
+        self.menu_items_seen: Dict[str, bool] = {}
+        # Menu item counts carried over from a checkpoint when resuming
+        self.items_created_before = 0
+        self.items_found_before = 0
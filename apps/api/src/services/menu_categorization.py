@@ -2,12 +2,31 @@
 Menu item categorization service using OpenAI LLM.
 
 Automatically categorizes menu items into a 3-level taxonomy for ML forecasting.
+
+Batches are categorized concurrently (bounded by CATEGORIZATION_CONCURRENCY)
+with retry and backoff on rate limits and transient API errors. Results are
+cached by normalized item name, in memory and - when a database session is
+given - in the shared menu_categorization_cache table, so a name is sent to
+the LLM at most once across restaurants. FakeCategorizationClient stands in
+for OpenAI offline (tests, local development).
 """
 import json
-from typing import Dict, List, Optional, Tuple
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import openai
 from openai import OpenAI
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
 
 from src.core.config import get_settings
+from src.models.menu import MenuCategorizationCache
 
 settings = get_settings()
 
@@ -22,6 +41,22 @@ CATEGORY_TAXONOMY = {
     "Other": ["Condiments", "Add-Ons", "Specials", "Other"]
 }
 
+# Transient API errors worth retrying
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+Categorization = Tuple[Optional[str], Optional[float], Optional[str]]
+
+
+def normalize_name(item_name: str) -> str:
+    """Cache key for an item name: lowercase with collapsed whitespace."""
+    return " ".join(item_name.lower().split())
+
 
 class MenuCategorizationService:
     """
@@ -31,15 +66,42 @@ class MenuCategorizationService:
     pooling for ML cold-start forecasting.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    MODEL = "gpt-4o-mini"  # Fast and cost-effective
+    RETRY_BASE_DELAY = 1.0  # Seconds; doubled per attempt unless the API sends Retry-After
+    RETRY_MAX_DELAY = 30.0
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        client=None,
+        db: Optional[Session] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
         """
         Initialize categorization service.
 
         Args:
             api_key: OpenAI API key (defaults to settings.OPENAI_API_KEY)
+            client: Chat completions client to use instead of OpenAI
+                (e.g. FakeCategorizationClient)
+            db: Session for the shared categorization cache (memory only if None)
+            max_concurrency: Parallel requests per batch
+                (defaults to settings.CATEGORIZATION_CONCURRENCY)
+            max_retries: Retries per item on transient errors
+                (defaults to settings.CATEGORIZATION_MAX_RETRIES)
         """
         self.api_key = api_key or settings.OPENAI_API_KEY
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        if client is not None:
+            self.client = client
+        elif settings.CATEGORIZATION_CLIENT == "fake":
+            self.client = FakeCategorizationClient()
+        else:
+            self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        self.db = db
+        self.max_concurrency = max_concurrency or settings.CATEGORIZATION_CONCURRENCY
+        self.max_retries = settings.CATEGORIZATION_MAX_RETRIES if max_retries is None else max_retries
+        self._memo: Dict[str, Categorization] = {}
 
     def _build_prompt(self, item_name: str) -> str:
         """
@@ -95,50 +157,146 @@ Return ONLY a JSON object with this exact format:
             # No API key configured - return None for all fields
             return None, None, "OpenAI API key not configured"
 
-        try:
-            prompt = self._build_prompt(item_name)
-
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Fast and cost-effective
-                messages=[
-                    {"role": "system", "content": "You are a restaurant menu categorization expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,  # Lower temperature for more consistent categorization
-                max_tokens=150,
-                response_format={"type": "json_object"}
-            )
-
-            # Parse response
-            result_text = response.choices[0].message.content
-            result = json.loads(result_text)
-
-            category_path = result.get("category_path")
-            confidence = float(result.get("confidence", 0.0))
-            reasoning = result.get("reasoning", "")
+        key = normalize_name(item_name)
+        cached = self.lookup_cached([item_name]).get(key)
+        if cached:
+            return cached
 
-            return category_path, confidence, reasoning
-
-        except Exception as e:
-            # Log error and return fallback
-            return None, 0.0, f"Categorization failed: {str(e)}"
+        result = self._request_with_retry(item_name)
+        self._store({key: result})
+        return result
 
     def categorize_batch(self, item_names: List[str]) -> List[Tuple[str, Optional[str], Optional[float], Optional[str]]]:
         """
         Categorize multiple menu items.
 
+        Names are deduplicated by normalized name and served from the cache
+        where possible; the rest are requested concurrently, at most
+        max_concurrency at a time.
+
         Args:
             item_names: List of menu item names
 
         Returns:
             List of tuples: (item_name, category_path, confidence, reasoning)
         """
-        results = []
-        for item_name in item_names:
-            category_path, confidence, reasoning = self.categorize_item(item_name)
-            results.append((item_name, category_path, confidence, reasoning))
+        if not self.client:
+            return [(item_name, None, None, "OpenAI API key not configured") for item_name in item_names]
+
+        keys = {item_name: normalize_name(item_name) for item_name in item_names}
+        results = self.lookup_cached(item_names)
+
+        missing: Dict[str, str] = {}  # normalized name -> first raw name seen
+        for item_name, key in keys.items():
+            if key not in results:
+                missing.setdefault(key, item_name)
+
+        if missing:
+            workers = min(self.max_concurrency, len(missing))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="categorize") as pool:
+                fetched = dict(zip(missing, pool.map(self._request_with_retry, missing.values())))
+            self._store(fetched)
+            results.update(fetched)
+
+        return [(item_name, *results[keys[item_name]]) for item_name in item_names]
+
+    def lookup_cached(self, item_names: Iterable[str]) -> Dict[str, Categorization]:
+        """
+        Cached categorizations for item names, without calling the LLM.
+
+        Args:
+            item_names: Menu item names
+
+        Returns:
+            Dict mapping normalized name to (category_path, confidence, reasoning)
+            for the names found in the cache
+        """
+        keys = {normalize_name(item_name) for item_name in item_names}
+        found = {key: self._memo[key] for key in keys if key in self._memo}
 
-        return results
+        remaining = keys - found.keys()
+        if remaining and self.db is not None:
+            stmt = select(MenuCategorizationCache).where(
+                MenuCategorizationCache.normalized_name.in_(remaining)
+            )
+            for entry in self.db.execute(stmt).scalars():
+                confidence = float(entry.confidence) if entry.confidence is not None else None
+                found[entry.normalized_name] = (entry.category_path, confidence, entry.reasoning)
+            self._memo.update(found)
+
+        return found
+
+    def _store(self, results: Dict[str, Categorization]):
+        """Cache successful categorizations (failures are retried next time)."""
+        results = {key: result for key, result in results.items() if result[0]}
+        if not results:
+            return
+
+        self._memo.update(results)
+        if self.db is None:
+            return
+
+        table = MenuCategorizationCache.__table__
+        stmt = pg_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.normalized_name],
+            set_={
+                "category_path": stmt.excluded.category_path,
+                "confidence": stmt.excluded.confidence,
+                "reasoning": stmt.excluded.reasoning,
+                "updated_at": func.now(),
+            }
+        )
+        self.db.execute(stmt, [
+            {
+                "normalized_name": key,
+                "category_path": category_path,
+                "confidence": Decimal(str(round(confidence, 2))) if confidence is not None else None,
+                "reasoning": reasoning,
+            }
+            for key, (category_path, confidence, reasoning) in sorted(results.items())
+        ])
+
+    def _request_with_retry(self, item_name: str) -> Categorization:
+        """Call the LLM, backing off on rate limits and transient errors."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._request(item_name)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    # Log error and return fallback
+                    return None, 0.0, f"Categorization failed: {str(e)}"
+                time.sleep(self._retry_delay(e, attempt))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is None:
+            retry_after = self.RETRY_BASE_DELAY * (2 ** attempt)
+        return min(retry_after, self.RETRY_MAX_DELAY)
+
+    def _request(self, item_name: str) -> Categorization:
+        prompt = self._build_prompt(item_name)
+
+        response = self.client.chat.completions.create(
+            model=self.MODEL,
+            messages=[
+                {"role": "system", "content": "You are a restaurant menu categorization expert."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,  # Lower temperature for more consistent categorization
+            max_tokens=150,
+            response_format={"type": "json_object"}
+        )
+
+        # Parse response
+        result_text = response.choices[0].message.content
+        result = json.loads(result_text)
+
+        category_path = result.get("category_path")
+        confidence = float(result.get("confidence", 0.0))
+        reasoning = result.get("reasoning", "")
+
+        return category_path, confidence, reasoning
 
     def validate_category_path(self, category_path: str) -> bool:
         """
@@ -181,3 +339,108 @@ Return ONLY a JSON object with this exact format:
             Dictionary mapping Level 1 categories to Level 2 subcategories
         """
         return CATEGORY_TAXONOMY.copy()
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the API asked us to wait (Retry-After), if any."""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        retry_after = headers.get("retry-after")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class FakeRateLimitError(Exception):
+    """Rate limit response from FakeCategorizationClient."""
+    status_code = 429
+
+    def __init__(self, retry_after: float = 0.0):
+        super().__init__("Rate limit exceeded (fake client)")
+        self.retry_after = retry_after
+
+
+class FakeCategorizationClient:
+    """
+    Offline stand-in for the OpenAI client.
+
+    Answers chat.completions.create with a keyword-based categorization in
+    the LLM's JSON format. It can simulate latency and rate limiting, and it
+    records calls and peak concurrency for tests.
+    """
+
+    KEYWORDS = [
+        (("steak", "ribeye", "burger", "beef", "brisket"), "Entrees > Beef"),
+        (("chicken", "wings"), "Entrees > Chicken"),
+        (("pork", "ribs", "bacon"), "Entrees > Pork"),
+        (("salmon", "fish", "shrimp", "tuna", "cod"), "Entrees > Seafood"),
+        (("pasta", "spaghetti", "lasagna", "penne"), "Entrees > Pasta"),
+        (("salad",), "Appetizers > Salads"),
+        (("soup", "chowder"), "Appetizers > Soups"),
+        (("fries", "potato", "rice"), "Sides > Starches"),
+        (("cake", "tiramisu", "brownie"), "Desserts > Cakes"),
+        (("ice cream", "gelato", "sundae"), "Desserts > Ice Cream"),
+        (("beer", "ipa", "wine", "margarita", "mojito", "sangria"), "Beverages > Alcoholic"),
+        (("coffee", "latte", "espresso", "tea"), "Beverages > Coffee/Tea"),
+        (("soda", "lemonade", "water", "coke"), "Beverages > Non-Alcoholic"),
+    ]
+
+    def __init__(self, latency: float = 0.0, rate_limited_calls: int = 0, retry_after: float = 0.0):
+        """
+        Args:
+            latency: Seconds each call takes
+            rate_limited_calls: Number of initial calls answered with a rate limit error
+            retry_after: Retry-After seconds sent with rate limit errors
+        """
+        self.latency = latency
+        self.rate_limited_calls = rate_limited_calls
+        self.retry_after = retry_after
+        self.calls = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages: List[Dict], **kwargs):
+        with self._lock:
+            self.calls += 1
+            rate_limited = self.calls <= self.rate_limited_calls
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if rate_limited:
+                raise FakeRateLimitError(self.retry_after)
+
+            item_name = re.search(r'Menu Item: "(.*)"', messages[-1]["content"]).group(1)
+            content = json.dumps(self.categorize(item_name))
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def categorize(self, item_name: str) -> Dict:
+        """Keyword categorization in the LLM response format."""
+        name = item_name.lower()
+        for keywords, prefix in self.KEYWORDS:
+            if any(keyword in name for keyword in keywords):
+                return {
+                    "category_path": f"{prefix} > {item_name.title()[:50]}",
+                    "confidence": 0.8,
+                    "reasoning": "Keyword match (fake client)",
+                }
+        return {
+            "category_path": f"Other > Specials > {item_name.title()[:50]}",
+            "confidence": 0.3,
+            "reasoning": "No keyword match (fake client)",
+        }
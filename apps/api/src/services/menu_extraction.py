@@ -3,18 +3,236 @@ Menu item extraction and deduplication service.
 
 Automatically creates MenuItem records from transaction data with fuzzy matching
 to handle name variations.
+
+Bulk extraction (extract_items_from_transaction_data) resolves names through a
+MenuItemResolver: the restaurant's items are loaded once into an exact-match map
+plus a rapidfuzz choice list, and each distinct name is resolved once per
+service instance (i.e. once per upload) instead of querying per row. Price
+changes are collected by a PriceHistoryBuilder and written in bulk.
 """
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
-from rapidfuzz import fuzz
-from sqlalchemy import select
+from rapidfuzz import fuzz, process
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from src.models.menu import MenuItem, MenuItemPriceHistory
-from src.services.menu_categorization import MenuCategorizationService
+from src.core.config import get_settings
+from src.services.category_profiles import CategoryProfileService
+from src.services.menu_categorization import Categorization, MenuCategorizationService, normalize_name
+
+
+class MenuItemResolver:
+    """
+    In-memory name index over one restaurant's menu items.
+
+    Matches like MenuItemExtractionService.find_existing_item: a
+    case-insensitive exact match on any item first, then the best
+    token_sort_ratio match among active items scoring at least `threshold`.
+    Resolved names are memoized; items added after the index was built
+    (e.g. auto-created during an upload) become match candidates too.
+    """
+
+    def __init__(self, items: List[MenuItem], threshold: float):
+        self.threshold = threshold
+        self._exact: Dict[str, MenuItem] = {}
+        self._choices: List[str] = []
+        self._candidates: List[MenuItem] = []
+        self._resolved: Dict[str, MenuItem] = {}
+        # Names known not to match the first N choices
+        self._checked: Dict[str, int] = {}
+        for item in items:
+            self.add(item)
+
+    @classmethod
+    def load(cls, db: Session, restaurant_id: UUID, threshold: float) -> "MenuItemResolver":
+        """Build the index for a restaurant with a single query."""
+        stmt = select(MenuItem).where(MenuItem.restaurant_id == restaurant_id)
+        return cls(list(db.execute(stmt).scalars().all()), threshold)
+
+    def add(self, item: MenuItem, name: Optional[str] = None):
+        """
+        Add an item to the index.
+
+        Args:
+            item: MenuItem to index
+            name: Raw name the item was created for; memoized as resolved
+        """
+        self._exact.setdefault(item.name.lower(), item)
+        if item.is_active:
+            self._choices.append(item.name.lower())
+            self._candidates.append(item)
+        if name is not None:
+            self._resolved[name] = item
+            self._checked.pop(name, None)
+
+    def resolve(self, name: str) -> Optional[MenuItem]:
+        """
+        Find the menu item for a name.
+
+        Args:
+            name: Item name as it appears in transactions
+
+        Returns:
+            Matching MenuItem or None
+        """
+        item = self._resolved.get(name)
+        if item is not None:
+            return item
+
+        key = name.lower()
+        item = self._exact.get(key)
+        if item is None:
+            start = self._checked.get(name, 0)
+            match = process.extractOne(
+                key,
+                self._choices[start:],
+                scorer=fuzz.token_sort_ratio,
+                score_cutoff=self.threshold
+            )
+            if match is None:
+                self._checked[name] = len(self._choices)
+                return None
+            item = self._candidates[start + match[2]]
+
+        self._resolved[name] = item
+        self._checked.pop(name, None)
+        return item
+
+    def resolve_many(self, names: List[str]) -> Dict[str, Optional[MenuItem]]:
+        """
+        Resolve many names at once, scoring all fuzzy lookups in one cdist call.
+
+        Args:
+            names: Item names (duplicates allowed)
+
+        Returns:
+            Dict mapping each distinct name to its MenuItem or None
+        """
+        resolved: Dict[str, Optional[MenuItem]] = {}
+        queries = []
+        for name in dict.fromkeys(names):
+            item = self._resolved.get(name) or self._exact.get(name.lower())
+            if item is not None:
+                self._resolved[name] = item
+                resolved[name] = item
+            elif self._checked.get(name, 0) < len(self._choices):
+                queries.append(name)
+            else:
+                resolved[name] = None
+
+        if queries:
+            start = min(self._checked.get(name, 0) for name in queries)
+            scores = process.cdist(
+                [name.lower() for name in queries],
+                self._choices[start:],
+                scorer=fuzz.token_sort_ratio,
+                score_cutoff=self.threshold
+            )
+            best = scores.argmax(axis=1)  # First best choice wins ties, as in extractOne
+            for row, name in enumerate(queries):
+                if scores[row, best[row]] >= self.threshold:
+                    item = self._candidates[start + best[row]]
+                    self._resolved[name] = item
+                    self._checked.pop(name, None)
+                else:
+                    item = None
+                    self._checked[name] = len(self._choices)
+                resolved[name] = item
+
+        return resolved
+
+
+class PriceHistoryBuilder:
+    """
+    Batched equivalent of calling detect_price_change for every row.
+
+    Observations are queued with add() and replayed in order by flush()
+    against an in-memory view of the items' prices and their existing
+    history entries, loaded with one query for the batch's date range.
+    New entries are inserted in one multi-row INSERT; changed entries are
+    updated through the session in a single flush.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._observations: List[Tuple[MenuItem, date, Decimal]] = []
+        self._last: Dict[int, Tuple[date, Decimal]] = {}
+
+    def add(self, menu_item: MenuItem, new_price: Decimal, transaction_date: datetime):
+        """Queue a (item, date, price) observation."""
+        observation = (transaction_date.date(), new_price)
+        # Repeating the previous observation for an item can never change anything
+        if self._last.get(id(menu_item)) == observation:
+            return
+        self._last[id(menu_item)] = observation
+        self._observations.append((menu_item, *observation))
+
+    def flush(self) -> int:
+        """
+        Apply queued observations.
+
+        Returns:
+            Number of observations that changed a price (what
+            detect_price_change would have returned True for)
+        """
+        observations, self._observations = self._observations, []
+        self._last = {}
+
+        # Rows matching the item's current price are no-ops; skip the query if that's all
+        if not any(item.price != price for item, _, price in observations):
+            return 0
+
+        item_ids = {item.id for item, _, _ in observations}
+        dates = [effective_date for _, effective_date, _ in observations]
+        stmt = select(MenuItemPriceHistory).where(
+            MenuItemPriceHistory.menu_item_id.in_(item_ids),
+            MenuItemPriceHistory.effective_date.between(min(dates), max(dates))
+        )
+        loaded: Dict[Tuple[UUID, date], MenuItemPriceHistory] = {}
+        for entry in self.db.execute(stmt).scalars():
+            loaded.setdefault((entry.menu_item_id, entry.effective_date), entry)
+
+        # Replay detect_price_change against (item, date) -> entry price
+        history = {key: entry.price for key, entry in loaded.items()}
+        changes = 0
+        for menu_item, effective_date, new_price in observations:
+            if menu_item.price == new_price:
+                continue
+
+            key = (menu_item.id, effective_date)
+            if key in history:
+                # Update existing entry if price is different
+                if history[key] != new_price:
+                    history[key] = new_price
+                    changes += 1
+                continue
+
+            # New entry; also becomes the item's current price
+            history[key] = new_price
+            menu_item.price = new_price
+            changes += 1
+
+        new_entries = []
+        for (menu_item_id, effective_date), price in history.items():
+            entry = loaded.get((menu_item_id, effective_date))
+            if entry is None:
+                new_entries.append({
+                    "menu_item_id": menu_item_id,
+                    "price": price,
+                    "effective_date": effective_date,
+                    "source": 'auto_detected',
+                })
+            elif entry.price != price:
+                entry.price = price
+
+        if new_entries:
+            self.db.execute(insert(MenuItemPriceHistory), new_entries)
+        self.db.flush()
+        return changes
 
 
 class MenuItemExtractionService:
@@ -25,21 +243,43 @@ class MenuItemExtractionService:
     - Fuzzy matching to detect name variations ("Burger" vs "Hamburger")
     - Auto-creation of MenuItem records
     - Price history tracking
-    - LLM-based categorization
+    - LLM-based categorization, either inline (new names in a batch are
+      categorized concurrently before items are created) or deferred (items
+      are created uncategorized unless cached, and categorize_pending_items
+      fills in category_path later)
     """
 
     FUZZY_MATCH_THRESHOLD = 85  # Levenshtein distance threshold (0-100)
+    CATEGORIZATION_BATCH_SIZE = 100
 
-    def __init__(self, db: Session, categorization_service: Optional[MenuCategorizationService] = None):
+    def __init__(
+        self,
+        db: Session,
+        categorization_service: Optional[MenuCategorizationService] = None,
+        categorization_mode: Optional[str] = None
+    ):
         """
         Initialize menu extraction service.
 
         Args:
             db: SQLAlchemy database session
             categorization_service: Optional categorization service (creates one if not provided)
+            categorization_mode: "inline" or "deferred" (defaults to settings.CATEGORIZATION_MODE)
         """
         self.db = db
-        self.categorization_service = categorization_service or MenuCategorizationService()
+        self.categorization_service = categorization_service or MenuCategorizationService(db=db)
+        self.categorization_mode = categorization_mode or get_settings().CATEGORIZATION_MODE
+        self._resolvers: Dict[UUID, MenuItemResolver] = {}
+        # Running total of price changes recorded by bulk extraction
+        self.price_changes_detected = 0
+
+    def get_resolver(self, restaurant_id: UUID) -> MenuItemResolver:
+        """Return the restaurant's name index, loading it on first use."""
+        resolver = self._resolvers.get(restaurant_id)
+        if resolver is None:
+            resolver = MenuItemResolver.load(self.db, restaurant_id, self.FUZZY_MATCH_THRESHOLD)
+            self._resolvers[restaurant_id] = resolver
+        return resolver
 
     def find_existing_item(
         self,
@@ -78,18 +318,14 @@ class MenuItemExtractionService:
         )
         all_items = self.db.execute(stmt).scalars().all()
 
-        best_match = None
-        best_score = 0
-
-        for item in all_items:
-            # Use token_sort_ratio for better matching of reordered words
-            score = fuzz.token_sort_ratio(item_name.lower(), item.name.lower())
-
-            if score >= self.FUZZY_MATCH_THRESHOLD and score > best_score:
-                best_score = score
-                best_match = item
-
-        return best_match
+        # Use token_sort_ratio for better matching of reordered words
+        match = process.extractOne(
+            item_name.lower(),
+            [item.name.lower() for item in all_items],
+            scorer=fuzz.token_sort_ratio,
+            score_cutoff=self.FUZZY_MATCH_THRESHOLD
+        )
+        return all_items[match[2]] if match else None
 
     def get_or_create_item(
         self,
@@ -125,12 +361,33 @@ class MenuItemExtractionService:
 
             return existing_item, False, None
 
-        # Create new menu item
+        new_item, reasoning = self._create_item(
+            restaurant_id, item_name, price, transaction_date, use_categorization
+        )
+        return new_item, True, reasoning
+
+    def _create_item(
+        self,
+        restaurant_id: UUID,
+        item_name: str,
+        price: Decimal,
+        transaction_date: datetime,
+        use_categorization: bool = True,
+        categorization: Optional[Categorization] = None
+    ) -> Tuple[MenuItem, Optional[str]]:
+        """
+        Create an auto-detected menu item with its initial price history entry.
+
+        A precomputed categorization (from a batch) takes precedence over
+        categorizing the item here.
+        """
         category_path = None
         confidence = None
         reasoning = None
 
-        if use_categorization and self.categorization_service.client:
+        if categorization is not None:
+            category_path, confidence, reasoning = categorization
+        elif use_categorization and self.categorization_service.client:
             category_path, confidence, reasoning = self.categorization_service.categorize_item(item_name)
 
         new_item = MenuItem(
@@ -158,7 +415,11 @@ class MenuItemExtractionService:
         self.db.add(price_history)
         self.db.flush()
 
-        return new_item, True, reasoning
+        resolver = self._resolvers.get(restaurant_id)
+        if resolver is not None:
+            resolver.add(new_item, item_name)
+
+        return new_item, reasoning
 
     def detect_price_change(
         self,
@@ -219,6 +480,15 @@ class MenuItemExtractionService:
         """
         Extract and create menu items from transaction data.
 
+        Names are resolved through the restaurant's MenuItemResolver, so
+        each distinct name costs one in-memory lookup per service instance
+        rather than queries per row. Unmatched names are created on their
+        first row, as get_or_create_item would. Price changes are replayed
+        in row order by a PriceHistoryBuilder, with the same outcome as
+        calling detect_price_change per row. Names that match no existing
+        item are categorized up front as one concurrent batch (inline mode)
+        or from the categorization cache only (deferred mode).
+
         Args:
             restaurant_id: Restaurant UUID
             items_data: List of dicts with keys: name, price, transaction_date
@@ -226,6 +496,11 @@ class MenuItemExtractionService:
         Returns:
             Dict mapping item names to MenuItem objects
         """
+        resolver = self.get_resolver(restaurant_id)
+        resolved = resolver.resolve_many([item_data['name'] for item_data in items_data])
+        categories = self._categorize_new_names([name for name, item in resolved.items() if item is None])
+        price_history = PriceHistoryBuilder(self.db)
+
         menu_items_map = {}
 
         for item_data in items_data:
@@ -233,20 +508,95 @@ class MenuItemExtractionService:
             price = item_data['price']
             transaction_date = item_data['transaction_date']
 
-            menu_item, created, reasoning = self.get_or_create_item(
-                restaurant_id=restaurant_id,
-                item_name=item_name,
-                price=price,
-                transaction_date=transaction_date
-            )
+            menu_item = menu_items_map.get(item_name)
+            if menu_item is None:
+                menu_item = resolver.resolve(item_name)
+                if menu_item is None:
+                    menu_item, _ = self._create_item(
+                        restaurant_id, item_name, price, transaction_date,
+                        categorization=categories.get(item_name, (None, None, None))
+                    )
+                    menu_items_map[item_name] = menu_item
+                    continue
+                menu_items_map[item_name] = menu_item
+
+            # Update last_seen and check for price changes on existing items
+            if not menu_item.last_seen or transaction_date > menu_item.last_seen:
+                menu_item.last_seen = transaction_date
+            price_history.add(menu_item, price, transaction_date)
+
+        self.price_changes_detected += price_history.flush()
+        return menu_items_map
 
-            menu_items_map[item_name] = menu_item
+    def _categorize_new_names(self, item_names: List[str]) -> Dict[str, Categorization]:
+        """Categorizations for names about to be created, keyed by raw name."""
+        if not item_names or not self.categorization_service.client:
+            return {}
+
+        if self.categorization_mode == "deferred":
+            # Only what is already known; the background pass does the rest
+            cached = self.categorization_service.lookup_cached(item_names)
+            return {
+                name: cached[normalize_name(name)]
+                for name in item_names if normalize_name(name) in cached
+            }
+
+        return {
+            name: (category_path, confidence, reasoning)
+            for name, category_path, confidence, reasoning
+            in self.categorization_service.categorize_batch(item_names)
+        }
+
+    def categorize_pending_items(
+        self,
+        restaurant_id: Optional[UUID] = None,
+        limit: Optional[int] = None
+    ) -> int:
+        """
+        Fill in category_path for auto-created items that have none.
 
-            # Check for price changes on existing items
-            if not created:
-                self.detect_price_change(menu_item, price, transaction_date)
+        This is the background pass for deferred categorization. Items are
+        categorized in concurrent batches of CATEGORIZATION_BATCH_SIZE and
+        committed per batch. Items whose categorization fails stay
+        uncategorized for a later pass.
 
-        return menu_items_map
+        Args:
+            restaurant_id: Only this restaurant's items (all restaurants if None)
+            limit: Maximum number of items to process
+
+        Returns:
+            Number of items categorized
+        """
+        if not self.categorization_service.client:
+            return 0
+
+        stmt = select(MenuItem).where(
+            MenuItem.auto_created == True,
+            MenuItem.category_path.is_(None)
+        ).order_by(MenuItem.created_at)
+        if restaurant_id is not None:
+            stmt = stmt.where(MenuItem.restaurant_id == restaurant_id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        pending = list(self.db.execute(stmt).scalars().all())
+
+        categorized = 0
+        for start in range(0, len(pending), self.CATEGORIZATION_BATCH_SIZE):
+            batch = pending[start:start + self.CATEGORIZATION_BATCH_SIZE]
+            results = self.categorization_service.categorize_batch([item.name for item in batch])
+            recategorized = set()
+            for item, (_, category_path, confidence, _) in zip(batch, results):
+                if category_path:
+                    item.category_path = category_path
+                    item.confidence_score = Decimal(str(confidence)) if confidence is not None else None
+                    recategorized.add(item.restaurant_id)
+                    categorized += 1
+            # Category profiles of these restaurants now cover other items
+            for rid in recategorized:
+                CategoryProfileService(self.db).invalidate(rid)
+            self.db.commit()
+
+        return categorized
 
     def get_items_needing_review(
         self,
@@ -0,0 +1,159 @@
+"""
+Incremental analytics run after an upload is ingested.
+
+Ingestion records which menu items and business dates an upload wrote
+rows for (AffectedScope). PostIngestService refreshes derived data for
+that scope only, so the work after an upload grows with the upload rather
+than with the restaurant's whole history:
+- update_health: data health score, extending the latest score's date stats
+- detect_promotions: flagged periods overlapping the affected dates and
+  price-variance inference, for the affected items
+- record_stockouts: velocity-based stockout detection for the affected
+  items, skipped when every affected date is older than its window
+
+The scope is conservative: rows the database rejected as duplicates are
+still counted, which at worst re-analyzes an unchanged item.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Optional, Set
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from src.models.data_health import DataHealthScore
+from src.models.inventory import InventorySnapshot
+from src.services.data_health import DataHealthService
+from src.services.promotion_detection import PromotionDetectionService
+from src.services.stockout_detection import StockoutDetectionService
+
+
+@dataclass
+class AffectedScope:
+    """Items and business dates an upload wrote rows for."""
+    restaurant_id: UUID
+    upload_id: UUID
+    item_names: Set[str] = field(default_factory=set)
+    business_dates: Set[date] = field(default_factory=set)
+
+    def add(self, item_name: str, business_date: date):
+        self.item_names.add(item_name)
+        self.business_dates.add(business_date)
+
+    def merge(self, other: "AffectedScope"):
+        self.item_names |= other.item_names
+        self.business_dates |= other.business_dates
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.business_dates
+
+    @property
+    def start_date(self) -> Optional[date]:
+        return min(self.business_dates) if self.business_dates else None
+
+    @property
+    def end_date(self) -> Optional[date]:
+        return max(self.business_dates) if self.business_dates else None
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form (stored with upload checkpoints)."""
+        return {
+            "item_names": sorted(self.item_names),
+            "business_dates": sorted(d.isoformat() for d in self.business_dates),
+        }
+
+    @classmethod
+    def from_dict(cls, restaurant_id: UUID, upload_id: UUID, data: Dict) -> "AffectedScope":
+        return cls(
+            restaurant_id=restaurant_id,
+            upload_id=upload_id,
+            item_names=set(data.get("item_names", [])),
+            business_dates={date.fromisoformat(d) for d in data.get("business_dates", [])},
+        )
+
+
+class PostIngestService:
+    """Refreshes health, promotions and stockouts for an AffectedScope."""
+
+    PROMOTION_CONFIDENCE_THRESHOLD = 0.6
+
+    # Stockout scan window; auto-saved detections need this confidence
+    STOCKOUT_DAYS_TO_ANALYZE = 30
+    STOCKOUT_AUTO_SAVE_CONFIDENCE = 0.8
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.promotion_detector = PromotionDetectionService(db)
+
+    def update_health(self, scope: AffectedScope) -> DataHealthScore:
+        """Record a new health score, reusing the latest one's date stats."""
+        return DataHealthService(self.db).calculate_score(
+            scope.restaurant_id,
+            upload_id=scope.upload_id,
+            business_dates=scope.business_dates
+        )
+
+    def detect_promotions(self, scope: AffectedScope) -> int:
+        """Detect and save promotions of the affected items; returns how many were created."""
+        if scope.is_empty:
+            return 0
+
+        return self.promotion_detector.detect_and_save_promotions(
+            restaurant_id=scope.restaurant_id,
+            confidence_threshold=self.PROMOTION_CONFIDENCE_THRESHOLD,
+            item_names=scope.item_names,
+            start_date=scope.start_date,
+            end_date=scope.end_date
+        )
+
+    def record_stockouts(self, scope: AffectedScope) -> int:
+        """Auto-save high-confidence stockouts of the affected items; returns how many were recorded."""
+        if scope.is_empty:
+            return 0
+
+        detection_service = StockoutDetectionService(self.db)
+
+        # Velocity and gaps only look this far back - older rows change nothing
+        window_start = date.today() - timedelta(
+            days=self.STOCKOUT_DAYS_TO_ANALYZE + detection_service.MIN_HISTORY_DAYS
+        )
+        if scope.end_date < window_start:
+            return 0
+
+        stockout_results = detection_service.detect_likely_stockouts(
+            restaurant_id=scope.restaurant_id,
+            days_to_analyze=self.STOCKOUT_DAYS_TO_ANALYZE,
+            item_names=scope.item_names
+        )
+
+        stockouts_detected = 0
+        for result in stockout_results:
+            if result.confidence < self.STOCKOUT_AUTO_SAVE_CONFIDENCE or not result.menu_item_id:
+                continue
+
+            # Check if already exists
+            existing = self.db.query(InventorySnapshot).filter(
+                InventorySnapshot.restaurant_id == scope.restaurant_id,
+                InventorySnapshot.menu_item_id == result.menu_item_id,
+                InventorySnapshot.date == result.detected_date
+            ).first()
+
+            if not existing:
+                self.db.add(InventorySnapshot(
+                    restaurant_id=scope.restaurant_id,
+                    menu_item_id=result.menu_item_id,
+                    date=result.detected_date,
+                    stockout_flag='Y',
+                    source='auto_detected'
+                ))
+                stockouts_detected += 1
+            elif existing.stockout_flag != 'Y':
+                existing.stockout_flag = 'Y'
+                existing.source = 'auto_detected'
+                stockouts_detected += 1
+
+        if stockouts_detected > 0:
+            self.db.commit()
+
+        return stockouts_detected
@@ -18,10 +18,10 @@ import numpy as np
 import pandas as pd
 from dataclasses import dataclass
 
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, and_
 from sqlalchemy.orm import Session
 
-from src.models.transaction import Transaction, TransactionItem
+from src.models.transaction import DailyItemSales
 from src.models.menu import MenuItem
 from src.models.promotion import PriceElasticity, Promotion
 
@@ -128,21 +128,19 @@ class PriceElasticityService:
         # Query daily sales with prices
         stmt = (
             select(
-                Transaction.transaction_date,
-                func.sum(TransactionItem.quantity).label('quantity'),
-                func.avg(TransactionItem.unit_price).label('avg_price'),
-                func.bool_or(Transaction.is_promo).label('is_promotion'),
-                func.min(Transaction.first_order_time).label('first_order'),
-                func.max(Transaction.last_order_time).label('last_order')
+                DailyItemSales.business_date.label('transaction_date'),
+                DailyItemSales.quantity,
+                DailyItemSales.avg_price,
+                DailyItemSales.is_promo.label('is_promotion'),
+                DailyItemSales.first_order_time.label('first_order'),
+                DailyItemSales.last_order_time.label('last_order')
             )
-            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
             .where(
-                Transaction.restaurant_id == restaurant_id,
-                Transaction.transaction_date >= cutoff_date,
-                TransactionItem.menu_item_name == menu_item.name
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.business_date >= cutoff_date,
+                DailyItemSales.menu_item_name == menu_item.name
             )
-            .group_by(Transaction.transaction_date)
-            .order_by(Transaction.transaction_date)
+            .order_by(DailyItemSales.business_date)
         )
 
         results = self.db.execute(stmt).all()
@@ -6,19 +6,30 @@ Detects discounts and promotions from:
 2. Negative prices (comps/voids)
 3. Keyword analysis
 4. Statistical price variance analysis (Bayesian change-point detection)
+
+Batch detection:
+    Methods 1-3 need no database and are exposed for whole parse chunks:
+    - KEYWORD_PATTERN: all DISCOUNT_KEYWORDS as one precompiled alternation
+    - match_keywords(name): keywords found in an item name, in one regex pass
+    - detect_discounts(rows): classify a chunk of parsed rows at once
+      (detect_discount_in_item classifies a one-row chunk)
+    CSVParser holds a single service instance for its whole parse, and
+    TransactionIngestionService runs detect_discounts on rows that reach
+    it without a promotion classification.
 """
-from typing import Dict, List, Optional, Tuple
-from datetime import date, timedelta
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from uuid import UUID
 import statistics
 import numpy as np
 from dataclasses import dataclass
 
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from src.models.transaction import Transaction, TransactionItem
+from src.models.transaction import DailyItemSales
 from src.models.menu import MenuItem
 from src.models.promotion import Promotion
 
@@ -33,6 +44,19 @@ class DiscountDetection:
     keywords_found: List[str] = None
 
 
+class _DetectionRow(NamedTuple):
+    """Fields of a parsed row detect_discounts reads."""
+    raw_item_name: str
+    unit_price: Optional[Decimal]
+    total: Optional[Decimal]
+    discount_amount: Optional[Decimal]
+
+
+def _keyword_prefixes(keywords: List[str]) -> Dict[str, frozenset]:
+    """Keyword -> the keywords it begins with, itself included."""
+    return {kw: frozenset(other for other in keywords if kw.startswith(other)) for kw in keywords}
+
+
 @dataclass
 class InferredPromotion:
     """Statistically inferred promotion period."""
@@ -63,6 +87,28 @@ class PromotionDetectionService:
         'sale', 'clearance', 'markdown', 'reduced'
     ]
 
+    # All keywords as one alternation (e.g. for vectorized str.contains)
+    KEYWORD_PATTERN = re.compile("|".join(re.escape(kw) for kw in DISCOUNT_KEYWORDS))
+
+    # Longest keyword starting at each position of a name (zero-width, so
+    # overlapping keywords are all seen)
+    KEYWORD_STARTS = re.compile(
+        "(?=(%s))" % "|".join(re.escape(kw) for kw in sorted(DISCOUNT_KEYWORDS, key=len, reverse=True))
+    )
+
+    # Matched keyword -> keywords it begins with (itself included), e.g.
+    # "promotion" -> {"promo", "promotion"}
+    KEYWORD_PREFIXES = _keyword_prefixes(DISCOUNT_KEYWORDS)
+
+    # Promo days at most this far apart belong to the same flagged period
+    PROMO_GAP_DAYS = 2
+
+    # Days around the changed range first scanned for flagged periods
+    FLAGGED_CONTEXT_DAYS = 14
+
+    # History window of the statistical price-variance pass
+    PRICE_HISTORY_LOOKBACK_DAYS = 90
+
     def __init__(self, db: Session):
         self.db = db
 
@@ -85,43 +131,86 @@ class PromotionDetectionService:
         Returns:
             DiscountDetection with confidence score
         """
+        row = _DetectionRow(item_name, unit_price, total, discount_amount)
+        return self.detect_discounts([row])[0]
 
-        # Method 1: Explicit discount column
-        if discount_amount is not None and discount_amount > 0:
-            return DiscountDetection(
-                is_promo=True,
-                discount_amount=discount_amount,
-                discount_type='explicit',
-                confidence=1.0
-            )
+    def match_keywords(self, item_name: str) -> List[str]:
+        """
+        Find discount keywords in an item name (case-insensitive).
 
-        # Method 2: Negative prices (comps, voids, refunds)
-        if unit_price < 0 or total < 0:
-            return DiscountDetection(
-                is_promo=True,
-                discount_amount=abs(total),
-                discount_type='comp_void',
-                confidence=1.0
-            )
+        Args:
+            item_name: Menu item name
 
-        # Method 3: Item name contains discount keywords
-        item_lower = item_name.lower()
-        found_keywords = [kw for kw in self.DISCOUNT_KEYWORDS if kw in item_lower]
-
-        if found_keywords:
-            return DiscountDetection(
-                is_promo=True,
-                discount_amount=None,  # Unknown amount
-                discount_type='keyword',
-                confidence=0.7,
-                keywords_found=found_keywords
-            )
+        Returns:
+            Keywords found, in DISCOUNT_KEYWORDS order
+        """
+        found = set()
+        for match in self.KEYWORD_STARTS.finditer(item_name.lower()):
+            found |= self.KEYWORD_PREFIXES[match.group(1)]
+        if not found:
+            return []
+        # Overlapping keywords (promo/promotion) are all reported
+        return [kw for kw in self.DISCOUNT_KEYWORDS if kw in found]
 
-        # No discount detected
-        return DiscountDetection(
-            is_promo=False,
-            confidence=1.0
-        )
+    def detect_discounts(self, rows: Sequence) -> List[DiscountDetection]:
+        """
+        Classify a chunk of parsed rows at once.
+
+        Each row needs raw_item_name, unit_price, total and discount_amount
+        (the explicit discount read from the file, if any) - e.g. ParsedRow.
+        Keyword matching runs once per distinct item name in the chunk.
+
+        Args:
+            rows: Parsed transaction rows
+
+        Returns:
+            One DiscountDetection per row, in order
+        """
+        keywords_by_name: Dict[str, List[str]] = {}
+        detections = []
+
+        for row in rows:
+            # Method 1: Explicit discount column
+            discount_amount = row.discount_amount
+            if discount_amount is not None and discount_amount > 0:
+                detections.append(DiscountDetection(
+                    is_promo=True,
+                    discount_amount=discount_amount,
+                    discount_type='explicit',
+                    confidence=1.0
+                ))
+                continue
+
+            # Method 2: Negative prices (comps, voids, refunds)
+            unit_price = row.unit_price or Decimal(0)
+            total = row.total or Decimal(0)
+            if unit_price < 0 or total < 0:
+                detections.append(DiscountDetection(
+                    is_promo=True,
+                    discount_amount=abs(total),
+                    discount_type='comp_void',
+                    confidence=1.0
+                ))
+                continue
+
+            # Method 3: Item name contains discount keywords
+            name = row.raw_item_name
+            found_keywords = keywords_by_name.get(name)
+            if found_keywords is None:
+                found_keywords = keywords_by_name[name] = self.match_keywords(name)
+
+            if found_keywords:
+                detections.append(DiscountDetection(
+                    is_promo=True,
+                    discount_amount=None,  # Unknown amount
+                    discount_type='keyword',
+                    confidence=0.7,
+                    keywords_found=found_keywords
+                ))
+            else:
+                detections.append(DiscountDetection(is_promo=False, confidence=1.0))
+
+        return detections
 
     def infer_promotions_from_price_history(
         self,
@@ -150,18 +239,16 @@ class PromotionDetectionService:
 
         stmt = (
             select(
-                Transaction.transaction_date,
-                func.avg(TransactionItem.unit_price).label('avg_price'),
-                func.count(TransactionItem.id).label('num_sales')
+                DailyItemSales.business_date.label('transaction_date'),
+                DailyItemSales.avg_price,
+                DailyItemSales.line_count.label('num_sales')
             )
-            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
             .where(
-                Transaction.restaurant_id == restaurant_id,
-                Transaction.transaction_date >= cutoff_date,
-                TransactionItem.menu_item_name == item_name
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.business_date >= cutoff_date,
+                DailyItemSales.menu_item_name == item_name
             )
-            .group_by(Transaction.transaction_date)
-            .order_by(Transaction.transaction_date)
+            .order_by(DailyItemSales.business_date)
         )
 
         results = self.db.execute(stmt).all()
@@ -292,117 +379,188 @@ class PromotionDetectionService:
 
     def detect_promotions_from_flagged_transactions(
         self,
-        restaurant_id: UUID
+        restaurant_id: UUID,
+        item_names: Optional[Iterable[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
     ) -> int:
         """
         Create promotions from transactions already flagged with is_promo=True.
         
         Groups consecutive promo days for each menu item into promotion periods.
-        
+
+        Without arguments the whole history is scanned. item_names and a
+        date range restrict the pass to those items' periods overlapping
+        [start_date, end_date]; the query window is widened until no such
+        period is cut off at its edges, so the periods found are the same
+        as in a full scan.
+
+        Args:
+            restaurant_id: Restaurant UUID
+            item_names: Only rebuild periods of these items
+            start_date: Only rebuild periods ending on or after this date
+            end_date: Only rebuild periods starting on or before this date
+
         Returns:
             Number of promotions created
         """
-        from datetime import datetime
-        
-        # Find all promo transactions grouped by item and date
+        if item_names is not None:
+            item_names = list(item_names)
+            if not item_names:
+                return 0
+
+        def overlaps(start: date, end: date) -> bool:
+            return (start_date is None or end >= start_date) and (end_date is None or start <= end_date)
+
+        context = timedelta(days=self.FLAGGED_CONTEXT_DAYS)
+        query_start = start_date - context if start_date else None
+        query_end = end_date + context if end_date else None
+
+        while True:
+            periods = [
+                period for period in self._group_promo_days(
+                    self._flagged_promo_days(restaurant_id, item_names, query_start, query_end)
+                )
+                if overlaps(period[1], period[2])
+            ]
+
+            # A period within the gap tolerance of the window edge may continue outside it
+            widen_start = query_start is not None and any(
+                (start - query_start).days <= self.PROMO_GAP_DAYS for _, start, _ in periods
+            )
+            widen_end = query_end is not None and any(
+                (query_end - end).days <= self.PROMO_GAP_DAYS for _, _, end in periods
+            )
+            if not (widen_start or widen_end):
+                break
+
+            context *= 2
+            if widen_start:
+                query_start = start_date - context
+            if widen_end:
+                query_end = end_date + context
+
+        promotions_created = 0
+        for item_name, start, end in periods:
+            if self._save_flagged_promotion(restaurant_id, item_name, start, end):
+                promotions_created += 1
+
+        if promotions_created > 0:
+            self.db.commit()
+
+        return promotions_created
+
+    def _flagged_promo_days(
+        self,
+        restaurant_id: UUID,
+        item_names: Optional[List[str]],
+        start_date: Optional[date],
+        end_date: Optional[date]
+    ) -> List:
+        """Promo (item, date) rows ordered by item and date."""
         stmt = (
             select(
-                TransactionItem.menu_item_name,
-                Transaction.transaction_date,
-                func.avg(TransactionItem.unit_price).label('avg_price'),
-                func.sum(Transaction.discount_amount).label('total_discount')
+                DailyItemSales.menu_item_name,
+                DailyItemSales.business_date.label('transaction_date'),
+                DailyItemSales.avg_price
             )
-            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
             .where(
-                Transaction.restaurant_id == restaurant_id,
-                Transaction.is_promo == True
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.is_promo.is_(True)
             )
-            .group_by(TransactionItem.menu_item_name, Transaction.transaction_date)
-            .order_by(TransactionItem.menu_item_name, Transaction.transaction_date)
+            .order_by(DailyItemSales.menu_item_name, DailyItemSales.business_date)
         )
-        
-        results = self.db.execute(stmt).all()
-        
-        if not results:
-            return 0
-        
-        # Group by item name and find consecutive date ranges
-        promotions_created = 0
+        if item_names is not None:
+            stmt = stmt.where(DailyItemSales.menu_item_name.in_(item_names))
+        if start_date is not None:
+            stmt = stmt.where(DailyItemSales.business_date >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(DailyItemSales.business_date <= end_date)
+
+        return self.db.execute(stmt).all()
+
+    def _group_promo_days(self, rows: Sequence) -> List[Tuple[str, date, date]]:
+        """Group ordered promo days into (item_name, start, end) periods."""
+        periods = []
         current_item = None
         period_start = None
         period_end = None
-        
-        def save_promotion(item_name: str, start: date, end: date):
-            nonlocal promotions_created
-            
-            # Find menu item
-            menu_item = self.db.query(MenuItem).filter(
-                MenuItem.restaurant_id == restaurant_id,
-                MenuItem.name == item_name
-            ).first()
-            
-            if not menu_item:
-                return
-            
-            # Check for existing
-            existing = self.db.query(Promotion).filter(
-                Promotion.restaurant_id == restaurant_id,
-                Promotion.menu_item_id == menu_item.id,
-                Promotion.start_date == datetime.combine(start, datetime.min.time()),
-                Promotion.end_date == datetime.combine(end, datetime.min.time())
-            ).first()
-            
-            if existing:
-                return
-            
-            new_promo = Promotion(
-                restaurant_id=restaurant_id,
-                menu_item_id=menu_item.id,
-                name=f"{item_name} - Detected Promotion",
-                discount_type='percentage',
-                discount_value=Decimal("10.00"),  # Default estimate
-                start_date=datetime.combine(start, datetime.min.time()),
-                end_date=datetime.combine(end, datetime.min.time()),
-                status='completed',
-                trigger_reason='inferred',
-                is_exploration=False
-            )
-            self.db.add(new_promo)
-            promotions_created += 1
-        
-        for row in results:
+
+        for row in rows:
             if current_item != row.menu_item_name:
-                # New item - save previous promotion if exists
+                # New item - close previous period if exists
                 if current_item and period_start:
-                    save_promotion(current_item, period_start, period_end)
-                
+                    periods.append((current_item, period_start, period_end))
+
                 current_item = row.menu_item_name
                 period_start = row.transaction_date
                 period_end = row.transaction_date
             else:
                 # Same item - check if consecutive
-                if (row.transaction_date - period_end).days <= 2:
+                if (row.transaction_date - period_end).days <= self.PROMO_GAP_DAYS:
                     # Extend period (allow 1-day gaps for weekends)
                     period_end = row.transaction_date
                 else:
-                    # Gap too large - save and start new period
-                    save_promotion(current_item, period_start, period_end)
+                    # Gap too large - close and start new period
+                    periods.append((current_item, period_start, period_end))
                     period_start = row.transaction_date
                     period_end = row.transaction_date
-        
-        # Save last promotion
+
+        # Close last period
         if current_item and period_start:
-            save_promotion(current_item, period_start, period_end)
-        
-        if promotions_created > 0:
-            self.db.commit()
-        
-        return promotions_created
+            periods.append((current_item, period_start, period_end))
+
+        return periods
+
+    def _save_flagged_promotion(
+        self,
+        restaurant_id: UUID,
+        item_name: str,
+        start: date,
+        end: date
+    ) -> bool:
+        """Add a detected promotion unless it already exists; returns True if added."""
+        # Find menu item
+        menu_item = self.db.query(MenuItem).filter(
+            MenuItem.restaurant_id == restaurant_id,
+            MenuItem.name == item_name
+        ).first()
+
+        if not menu_item:
+            return False
+
+        # Check for existing
+        existing = self.db.query(Promotion).filter(
+            Promotion.restaurant_id == restaurant_id,
+            Promotion.menu_item_id == menu_item.id,
+            Promotion.start_date == datetime.combine(start, datetime.min.time()),
+            Promotion.end_date == datetime.combine(end, datetime.min.time())
+        ).first()
+
+        if existing:
+            return False
+
+        self.db.add(Promotion(
+            restaurant_id=restaurant_id,
+            menu_item_id=menu_item.id,
+            name=f"{item_name} - Detected Promotion",
+            discount_type='percentage',
+            discount_value=Decimal("10.00"),  # Default estimate
+            start_date=datetime.combine(start, datetime.min.time()),
+            end_date=datetime.combine(end, datetime.min.time()),
+            status='completed',
+            trigger_reason='inferred',
+            is_exploration=False
+        ))
+        return True
 
     def detect_and_save_promotions(
         self,
         restaurant_id: UUID,
-        confidence_threshold: float = 0.6
+        confidence_threshold: float = 0.6,
+        item_names: Optional[Iterable[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
     ) -> int:
         """
         Run promotion inference on all menu items and save to database.
@@ -411,30 +569,50 @@ class PromotionDetectionService:
         1. Flagged transactions (from CSV discount column/keywords)
         2. Statistical price variance analysis (needs 30+ days)
 
+        item_names and the date range narrow both methods to data that
+        changed (see detect_promotions_from_flagged_transactions); the
+        statistical pass is skipped entirely when end_date falls before
+        its lookback window.
+
         Args:
             restaurant_id: Restaurant UUID
             confidence_threshold: Minimum confidence to save (0-1)
+            item_names: Only analyze these items (default: all)
+            start_date: First changed business date (default: unbounded)
+            end_date: Last changed business date (default: unbounded)
 
         Returns:
             Number of promotions created
         """
+        if item_names is not None:
+            item_names = list(item_names)
+
         promotions_created = 0
         
         # Method 1: Detect from flagged transactions (works with any amount of data)
-        promotions_created += self.detect_promotions_from_flagged_transactions(restaurant_id)
-        
+        promotions_created += self.detect_promotions_from_flagged_transactions(
+            restaurant_id, item_names=item_names, start_date=start_date, end_date=end_date
+        )
+
+        if end_date is not None and end_date < date.today() - timedelta(days=self.PRICE_HISTORY_LOOKBACK_DAYS):
+            # Changes are older than any price history window
+            return promotions_created
+
         # Method 2: Statistical inference (needs 30+ days of data)
         # Get all menu items for restaurant
-        menu_items = self.db.query(MenuItem).filter(
+        menu_query = self.db.query(MenuItem).filter(
             MenuItem.restaurant_id == restaurant_id
-        ).all()
+        )
+        if item_names is not None:
+            menu_query = menu_query.filter(MenuItem.name.in_(item_names))
+        menu_items = menu_query.all()
 
         for menu_item in menu_items:
             # Infer promotions for this item
             inferred = self.infer_promotions_from_price_history(
                 restaurant_id=restaurant_id,
                 item_name=menu_item.name,
-                lookback_days=90
+                lookback_days=self.PRICE_HISTORY_LOOKBACK_DAYS
             )
 
             # Save high-confidence inferred promotions
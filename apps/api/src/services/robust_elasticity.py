@@ -18,7 +18,7 @@ from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
 from src.models.menu import MenuItem, MenuCategory
-from src.models.transaction import Transaction, TransactionItem
+from src.models.transaction import TransactionItem
 from src.models.promotion import PriceElasticity
 from src.services.price_elasticity import PriceElasticityService, ElasticityEstimate
 
@@ -149,16 +149,16 @@ class RobustElasticityEstimator:
                 reason='Item not found'
             )
 
-        # Count observations and distinct prices
+        # Count observations and distinct prices (index-only on the
+        # restaurant/menu item covering index, no join to transactions)
         stmt = (
             select(
-                func.count(Transaction.id).label('obs'),
+                func.count().label('obs'),
                 func.count(func.distinct(TransactionItem.unit_price)).label('prices')
             )
-            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
             .where(
-                Transaction.restaurant_id == restaurant_id,
-                TransactionItem.menu_item_name == menu_item.name
+                TransactionItem.restaurant_id == restaurant_id,
+                TransactionItem.menu_item_id == menu_item.id
             )
         )
 
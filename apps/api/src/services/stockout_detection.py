@@ -4,7 +4,7 @@ Velocity-based stockout detection service.
 Infers likely stockout events based on item velocity patterns,
 avoiding false positives for naturally low-velocity items.
 """
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import date, timedelta
 from uuid import UUID
 from decimal import Decimal
@@ -13,7 +13,7 @@ import statistics
 from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
-from src.models.transaction import Transaction, TransactionItem
+from src.models.transaction import DailyItemSales
 from src.models.inventory import InventorySnapshot
 from src.models.menu import MenuItem
 
@@ -81,14 +81,13 @@ class StockoutDetectionService:
 
         stmt = (
             select(
-                func.count(func.distinct(Transaction.transaction_date)).label("active_days"),
-                func.sum(TransactionItem.quantity).label("total_qty")
+                func.count(DailyItemSales.business_date).label("active_days"),
+                func.sum(DailyItemSales.quantity).label("total_qty")
             )
-            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
             .where(
-                Transaction.restaurant_id == restaurant_id,
-                Transaction.transaction_date >= cutoff_date,
-                TransactionItem.menu_item_name == item_name
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.business_date >= cutoff_date,
+                DailyItemSales.menu_item_name == item_name
             )
         )
 
@@ -113,7 +112,8 @@ class StockoutDetectionService:
     def detect_likely_stockouts(
         self,
         restaurant_id: UUID,
-        days_to_analyze: int = 30
+        days_to_analyze: int = 30,
+        item_names: Optional[Iterable[str]] = None
     ) -> List[StockoutDetectionResult]:
         """
         Analyze recent history and detect likely stockout events.
@@ -121,6 +121,8 @@ class StockoutDetectionService:
         Args:
             restaurant_id: Restaurant UUID
             days_to_analyze: Number of days to scan for stockouts
+            item_names: Only analyze these items (default: every item sold
+                in the lookback period)
 
         Returns:
             List of detected stockout events with confidence scores
@@ -131,14 +133,15 @@ class StockoutDetectionService:
         lookback_date = date.today() - timedelta(days=days_to_analyze + self.MIN_HISTORY_DAYS)
 
         item_stmt = (
-            select(TransactionItem.menu_item_name)
-            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
+            select(DailyItemSales.menu_item_name)
             .where(
-                Transaction.restaurant_id == restaurant_id,
-                Transaction.transaction_date >= lookback_date
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.business_date >= lookback_date
             )
             .distinct()
         )
+        if item_names is not None:
+            item_stmt = item_stmt.where(DailyItemSales.menu_item_name.in_(list(item_names)))
 
         items = self.db.execute(item_stmt).scalars().all()
 
@@ -235,21 +238,16 @@ class StockoutDetectionService:
     ) -> Dict[date, float]:
         """Get daily sales quantities for an item."""
         stmt = (
-            select(
-                Transaction.transaction_date,
-                func.sum(TransactionItem.quantity).label("qty")
-            )
-            .join(Transaction, TransactionItem.transaction_id == Transaction.id)
+            select(DailyItemSales.business_date, DailyItemSales.quantity)
             .where(
-                Transaction.restaurant_id == restaurant_id,
-                Transaction.transaction_date >= start_date,
-                TransactionItem.menu_item_name == item_name
+                DailyItemSales.restaurant_id == restaurant_id,
+                DailyItemSales.business_date >= start_date,
+                DailyItemSales.menu_item_name == item_name
             )
-            .group_by(Transaction.transaction_date)
         )
 
         results = self.db.execute(stmt).all()
-        return {row.transaction_date: float(row.qty) for row in results}
+        return {row.business_date: float(row.quantity) for row in results}
 
     def _get_existing_stockouts(
         self,
@@ -0,0 +1,341 @@
+"""
+Transaction writers used by the ingestion service.
+
+Two interchangeable backends persist daily Transactions and their items:
+- BulkTransactionWriter: client-generated UUIDs and multi-row INSERTs in
+  fixed-size batches; duplicate row hashes are skipped by the database
+  (ON CONFLICT DO NOTHING on the restaurant-scoped hash index) (default)
+- OrmTransactionWriter: one ORM object per row, kept as a fallback; callers
+  must filter out known duplicates before add_item
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import date, time
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from src.core.business_day import time_to_offset_minutes
+from src.models.transaction import Transaction, TransactionItem
+from src.services.csv_parser import ParsedRow
+
+
+@dataclass
+class DaySummary:
+    """Aggregates for one business date, mergeable across ingestion batches."""
+    total_amount: Decimal
+    is_promo: bool
+    discount_amount: Decimal
+    first_order_time: time
+    last_order_time: time
+
+    @classmethod
+    def from_rows(cls, rows: List[ParsedRow]) -> "DaySummary":
+        """Summarize the rows of a single business date."""
+        # Order times in "offset minute space" (4 AM day start)
+        sorted_times = sorted((row.date.time() for row in rows), key=time_to_offset_minutes)
+
+        # Use promotion detection results from CSV parser
+        is_promo = False
+        discount = Decimal("0.00")
+        for row in rows:
+            if row.is_promotion:
+                is_promo = True
+                if row.discount_amount:
+                    discount += row.discount_amount
+
+        return cls(
+            total_amount=Decimal(str(sum(row.total for row in rows))),
+            is_promo=is_promo,
+            discount_amount=discount,
+            first_order_time=sorted_times[0],
+            last_order_time=sorted_times[-1],
+        )
+
+    @classmethod
+    def from_transaction(cls, transaction: Transaction) -> "DaySummary":
+        """Summary of an already-persisted transaction."""
+        return cls(
+            total_amount=transaction.total_amount,
+            is_promo=transaction.is_promo,
+            discount_amount=transaction.discount_amount or Decimal("0.00"),
+            first_order_time=transaction.first_order_time,
+            last_order_time=transaction.last_order_time,
+        )
+
+    def merge(self, other: "DaySummary"):
+        """Fold another batch's summary for the same date into this one."""
+        self.total_amount += other.total_amount
+        self.is_promo = self.is_promo or other.is_promo
+        self.discount_amount += other.discount_amount
+        self.first_order_time = min(self.first_order_time, other.first_order_time, key=time_to_offset_minutes)
+        self.last_order_time = max(self.last_order_time, other.last_order_time, key=time_to_offset_minutes)
+
+    def to_values(self) -> Dict:
+        """Column values for the transactions table."""
+        return {
+            "total_amount": self.total_amount,
+            "is_promo": self.is_promo,
+            "discount_amount": self.discount_amount if self.discount_amount > 0 else None,
+            "first_order_time": self.first_order_time,
+            "last_order_time": self.last_order_time,
+        }
+
+
+class OrmTransactionWriter:
+    """
+    Writes one ORM object per Transaction/TransactionItem.
+
+    Flushes once per new business date to obtain the transaction ID.
+    """
+
+    # Duplicate hashes would violate the unique index - filter before add_item
+    dedups_on_insert = False
+
+    def __init__(self, db: Session, restaurant_id: UUID, upload_id: UUID):
+        self.db = db
+        self.restaurant_id = restaurant_id
+        self.upload_id = upload_id
+        self._transactions: Dict[date, Transaction] = {}
+        self._inserted = 0
+
+    def add_day(self, business_date: date, summary: DaySummary) -> UUID:
+        """Create or extend the transaction for a business date; returns its ID."""
+        transaction = self._transactions.get(business_date)
+        if transaction is None:
+            transaction = Transaction(
+                restaurant_id=self.restaurant_id,
+                transaction_date=business_date,
+                upload_id=self.upload_id,
+                source_hash=None,  # Transactions don't have individual hashes, only items do
+                **summary.to_values()
+            )
+            self.db.add(transaction)
+            self.db.flush()  # Get transaction ID
+            self._transactions[business_date] = transaction
+        else:
+            # Date continues from an earlier batch - merge aggregates
+            merged = DaySummary.from_transaction(transaction)
+            merged.merge(summary)
+            for key, value in merged.to_values().items():
+                setattr(transaction, key, value)
+
+        return transaction.id
+
+    def load_existing(self):
+        """Continue the upload's already-committed transactions (resumed ingestion)."""
+        for transaction in _upload_transactions(self.db, self.upload_id):
+            self._transactions[transaction.transaction_date] = transaction
+
+    def add_item(
+        self,
+        transaction_id: UUID,
+        business_date: date,
+        row: ParsedRow,
+        row_hash: str,
+        menu_item_id: Optional[UUID] = None
+    ):
+        """Queue a line item."""
+        self.db.add(TransactionItem(
+            transaction_id=transaction_id,
+            restaurant_id=self.restaurant_id,
+            business_date=business_date,
+            menu_item_name=row.item_name,
+            menu_item_id=menu_item_id,
+            quantity=row.quantity,
+            unit_price=row.unit_price,
+            total=row.total,
+            source_hash=row_hash
+        ))
+        self._inserted += 1
+
+    def flush(self):
+        """Write pending rows to the database."""
+        self.db.flush()
+
+    def finish(self):
+        """Write everything still pending."""
+        self.db.flush()
+
+    def drain(self) -> Tuple[int, List[int]]:
+        """Return and reset (rows inserted, duplicate row numbers) since the last drain."""
+        inserted, self._inserted = self._inserted, 0
+        return inserted, []
+
+
+class BulkTransactionWriter:
+    """
+    Writes transactions and items with multi-row INSERTs.
+
+    IDs are generated client-side, so no round trip is needed per business
+    date. Rows are buffered and written in BATCH_SIZE statements on flush();
+    transactions whose totals grew after their insert (dates spanning
+    several batches) are updated once in finish().
+
+    Items are inserted with ON CONFLICT DO NOTHING RETURNING source_hash,
+    so rows whose hash already exists for the restaurant are skipped by
+    the database and reported back through drain().
+    """
+
+    BATCH_SIZE = 1000
+
+    dedups_on_insert = True
+
+    def __init__(self, db: Session, restaurant_id: UUID, upload_id: UUID):
+        self.db = db
+        self.restaurant_id = restaurant_id
+        self.upload_id = upload_id
+        self._days: Dict[date, tuple] = {}  # business_date -> (id, DaySummary)
+        self._dirty: set = set()
+        self._pending_transactions: List[Dict] = []
+        self._pending_items: List[Dict] = []
+        self._pending_row_numbers: List[int] = []
+        self._inserted = 0
+        self._duplicate_rows: List[int] = []
+
+    def add_day(self, business_date: date, summary: DaySummary) -> UUID:
+        """Create or extend the transaction for a business date; returns its ID."""
+        existing = self._days.get(business_date)
+        if existing is not None:
+            transaction_id, current = existing
+            current.merge(summary)
+            self._dirty.add(business_date)
+            return transaction_id
+
+        transaction_id = uuid.uuid4()
+        self._days[business_date] = (transaction_id, summary)
+        self._pending_transactions.append({
+            "id": transaction_id,
+            "restaurant_id": self.restaurant_id,
+            "transaction_date": business_date,
+            "upload_id": self.upload_id,
+            "source_hash": None,
+            "stockout_occurred": None,
+            **summary.to_values()
+        })
+        return transaction_id
+
+    def load_existing(self):
+        """Continue the upload's already-committed transactions (resumed ingestion)."""
+        for transaction in _upload_transactions(self.db, self.upload_id):
+            self._days[transaction.transaction_date] = (
+                transaction.id, DaySummary.from_transaction(transaction)
+            )
+
+    def add_item(
+        self,
+        transaction_id: UUID,
+        business_date: date,
+        row: ParsedRow,
+        row_hash: str,
+        menu_item_id: Optional[UUID] = None
+    ):
+        """Queue a line item."""
+        self._pending_items.append({
+            "id": uuid.uuid4(),
+            "transaction_id": transaction_id,
+            "restaurant_id": self.restaurant_id,
+            "business_date": business_date,
+            "menu_item_name": row.item_name,
+            "menu_item_id": menu_item_id,
+            "quantity": row.quantity,
+            "unit_price": row.unit_price,
+            "total": row.total,
+            "source_hash": row_hash,
+            "promotion_id": None,
+        })
+        self._pending_row_numbers.append(row.row_number)
+        if len(self._pending_items) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows; transactions first so item FKs resolve."""
+        if self._pending_transactions:
+            # Summaries may have been merged since queueing - take current values
+            for values in self._pending_transactions:
+                _, summary = self._days[values["transaction_date"]]
+                values.update(summary.to_values())
+                self._dirty.discard(values["transaction_date"])
+            self._execute_batched(insert(Transaction.__table__), self._pending_transactions)
+            self._pending_transactions = []
+
+        if self._pending_items:
+            self._insert_items()
+            self._pending_items = []
+            self._pending_row_numbers = []
+
+    def finish(self):
+        """Write buffered rows and update transactions merged after insert."""
+        self.flush()
+
+        if self._dirty:
+            table = Transaction.__table__
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam("_id"))
+                .values(
+                    total_amount=bindparam("total_amount"),
+                    is_promo=bindparam("is_promo"),
+                    discount_amount=bindparam("discount_amount"),
+                    first_order_time=bindparam("first_order_time"),
+                    last_order_time=bindparam("last_order_time"),
+                )
+            )
+            params = []
+            for business_date in self._dirty:
+                transaction_id, summary = self._days[business_date]
+                params.append({"_id": transaction_id, **summary.to_values()})
+            self._execute_batched(stmt, params)
+            self._dirty = set()
+
+    def drain(self) -> Tuple[int, List[int]]:
+        """Return and reset (rows inserted, duplicate row numbers) since the last drain."""
+        inserted, self._inserted = self._inserted, 0
+        duplicates, self._duplicate_rows = self._duplicate_rows, []
+        return inserted, duplicates
+
+    def _insert_items(self):
+        table = TransactionItem.__table__
+        stmt = (
+            pg_insert(table)
+            .on_conflict_do_nothing(index_elements=[table.c.restaurant_id, table.c.source_hash])
+            .returning(table.c.source_hash)
+        )
+
+        for start in range(0, len(self._pending_items), self.BATCH_SIZE):
+            batch = self._pending_items[start:start + self.BATCH_SIZE]
+            row_numbers = self._pending_row_numbers[start:start + self.BATCH_SIZE]
+            inserted_hashes = set(self.db.execute(stmt, batch).scalars().all())
+
+            # A hash is returned at most once; rows are inserted in order, so
+            # the first occurrence of a returned hash is the one that landed
+            for values, row_number in zip(batch, row_numbers):
+                row_hash = values["source_hash"]
+                if row_hash in inserted_hashes:
+                    inserted_hashes.discard(row_hash)
+                    self._inserted += 1
+                else:
+                    self._duplicate_rows.append(row_number)
+
+    def _execute_batched(self, stmt, params: List[Dict]):
+        for start in range(0, len(params), self.BATCH_SIZE):
+            self.db.execute(stmt, params[start:start + self.BATCH_SIZE])
+
+
+def _upload_transactions(db: Session, upload_id: UUID) -> List[Transaction]:
+    return db.query(Transaction).filter(Transaction.upload_id == upload_id).all()
+
+
+def create_transaction_writer(
+    db: Session,
+    restaurant_id: UUID,
+    upload_id: UUID,
+    bulk: bool = True
+):
+    """Create the writer backend for one upload."""
+    writer_cls = BulkTransactionWriter if bulk else OrmTransactionWriter
+    return writer_cls(db, restaurant_id, upload_id)
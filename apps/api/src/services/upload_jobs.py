@@ -0,0 +1,337 @@
+"""
+Background processing of CSV uploads.
+
+The upload endpoint spools the file to disk, creates a PENDING DataUpload
+and hands the work to an UploadJobRunner; clients poll
+GET /data/uploads/{id} for progress. Two job backends are available:
+- ThreadPoolJobBackend: runs jobs on a small in-process thread pool (default)
+- InlineJobBackend: runs jobs synchronously in the request (tests, scripts)
+
+Jobs open their own database sessions; progress counters are written
+through a separate short-lived session after every parsed chunk so they
+are visible to pollers before the ingestion transaction commits.
+
+Ingestion commits a checkpoint every `checkpoint_rows` rows. An upload
+that fails (or whose job died) after a checkpoint can be resumed with
+the same file: resume jobs skip the committed rows and continue the
+upload's transactions and counters.
+
+After a completed upload, stockout detection runs only for the items
+and dates the upload wrote (see services/post_ingest.py).
+
+With deferred categorization, a completed upload queues a follow-up job
+on the same backend that LLM-categorizes the restaurant's new menu items.
+"""
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from src.core.config import get_settings
+from src.db.session import SessionLocal
+from src.models.data_upload import DataUpload
+from src.schemas.data import UploadStatus
+from src.services.columnar_parser import ColumnarCSVParser
+from src.services.csv_parser import CSVParser
+from src.services.ingestion import IngestionResult, TransactionIngestionService
+from src.services.menu_extraction import MenuItemExtractionService
+from src.services.post_ingest import AffectedScope, PostIngestService
+
+logger = logging.getLogger(__name__)
+
+
+class InlineJobBackend:
+    """Runs each job immediately in the caller's thread."""
+
+    def submit(self, fn: Callable, *args) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait: bool = True):
+        pass
+
+
+class ThreadPoolJobBackend:
+    """Runs jobs on a bounded thread pool."""
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload-job")
+
+    def submit(self, fn: Callable, *args) -> Future:
+        return self._executor.submit(fn, *args)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+class UploadJobRunner:
+    """
+    Parses and ingests spooled CSV uploads outside the request cycle.
+
+    Failures are recorded on the DataUpload rather than raised: the
+    `errors` JSON carries a "failure" code ("invalid_format",
+    "duplicate_file", "resumable_upload", "file_mismatch" or "error") and
+    a human-readable "message".
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        parse_backend: str = "rows",
+        checkpoint_rows: Optional[int] = None,
+        defer_categorization: bool = False
+    ):
+        self.backend = backend or InlineJobBackend()
+        self.session_factory = session_factory
+        self.parse_backend = parse_backend
+        self.checkpoint_rows = checkpoint_rows
+        self.defer_categorization = defer_categorization
+
+    def submit(
+        self,
+        upload_id: UUID,
+        restaurant_id: UUID,
+        file_path: str,
+        resume: bool = False
+    ) -> Future:
+        """
+        Queue an upload for processing.
+
+        Args:
+            upload_id: Committed DataUpload to process
+            restaurant_id: Owning restaurant
+            file_path: Spooled CSV; deleted once the job finishes
+            resume: Continue the upload from its last checkpoint; file_path
+                must hold the same file as the original upload
+
+        Returns:
+            Future resolving to the final upload status
+        """
+        return self.backend.submit(self.run, upload_id, restaurant_id, file_path, resume)
+
+    def run(
+        self,
+        upload_id: UUID,
+        restaurant_id: UUID,
+        file_path: str,
+        resume: bool = False
+    ) -> UploadStatus:
+        """Job body: ingest the file and record the outcome on the upload."""
+        db = self.session_factory()
+        try:
+            upload = db.query(DataUpload).filter(DataUpload.id == upload_id).first()
+            if upload is None:
+                logger.warning(f"Upload {upload_id} vanished before processing")
+                return UploadStatus.FAILED
+
+            upload.status = UploadStatus.PROCESSING.value
+            db.commit()
+
+            try:
+                self._process(db, upload, restaurant_id, file_path, resume)
+            except Exception as e:
+                logger.exception(f"Upload {upload_id} failed")
+                db.rollback()
+                upload.status = UploadStatus.FAILED.value
+                upload.errors = {
+                    "failure": "error",
+                    "error": str(e),
+                    "message": f"Failed to process CSV: {str(e)}",
+                    # Rows through this one are committed; resume to continue
+                    "checkpoint_row": upload.checkpoint_row,
+                }
+                db.commit()
+
+            final_status = UploadStatus(upload.status)
+        finally:
+            db.close()
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+        if self.defer_categorization and final_status == UploadStatus.COMPLETED:
+            self.backend.submit(self.categorize_items, restaurant_id)
+        return final_status
+
+    def categorize_items(self, restaurant_id: UUID) -> int:
+        """Job body: categorize the restaurant's uncategorized auto-created items."""
+        db = self.session_factory()
+        try:
+            extraction_service = MenuItemExtractionService(db, categorization_mode="deferred")
+            return extraction_service.categorize_pending_items(restaurant_id)
+        except Exception:
+            # Items stay uncategorized and are picked up by the next pass
+            logger.exception(f"Deferred categorization failed for restaurant {restaurant_id}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    def _process(
+        self,
+        db: Session,
+        upload: DataUpload,
+        restaurant_id: UUID,
+        file_path: str,
+        resume: bool = False
+    ):
+        ingestion_service = TransactionIngestionService(db)
+
+        with open(file_path, "rb") as f:
+            file_hash = ingestion_service.compute_stream_hash(f)
+
+            if resume and upload.file_hash not in (None, file_hash):
+                upload.status = UploadStatus.FAILED.value
+                upload.errors = {
+                    **(upload.errors or {}),
+                    "failure": "file_mismatch",
+                    "message": "Resumed upload must use the same file as the original upload",
+                }
+                db.commit()
+                return
+
+            if not resume:
+                resumable_id = ingestion_service.find_resumable_upload(restaurant_id, file_hash)
+                if resumable_id:
+                    upload.status = UploadStatus.FAILED.value
+                    upload.errors = {
+                        "failure": "resumable_upload",
+                        "upload_id": str(resumable_id),
+                        "message": f"This file was partially ingested by upload {resumable_id}; resume that upload instead",
+                    }
+                    db.commit()
+                    return
+
+            parser = ColumnarCSVParser() if self.parse_backend == "columnar" else CSVParser()
+            stream = parser.stream_csv(f)
+
+            # Check for critical parsing errors (missing columns, etc.)
+            if stream.has_header_errors:
+                upload.status = UploadStatus.FAILED.value
+                upload.errors = {
+                    "failure": "invalid_format",
+                    "message": "Failed to detect CSV format or missing required columns",
+                    "errors": [{"field": e.field, "message": e.message} for e in stream.result.errors]
+                }
+                db.commit()
+                return
+
+            # Ingest transactions chunk by chunk with deduplication
+            ingestion_result = ingestion_service.ingest_stream(
+                restaurant_id=restaurant_id,
+                upload_id=upload.id,
+                stream=stream,
+                file_hash=file_hash,
+                on_progress=lambda result: self._report_progress(upload.id, result),
+                checkpoint_rows=self.checkpoint_rows,
+                resume=resume
+            )
+
+        # Check for file-level duplicate
+        if any(e.get("type") == "duplicate_file" for e in ingestion_result.errors):
+            upload.status = UploadStatus.FAILED.value
+            upload.errors = {
+                **ingestion_result.to_dict(),
+                "failure": "duplicate_file",
+                "message": "This file has already been uploaded",
+            }
+            db.commit()
+            return
+
+        # Update upload status
+        success_rate = (ingestion_result.rows_inserted / ingestion_result.rows_processed
+                       if ingestion_result.rows_processed > 0 else 0)
+
+        if success_rate > 0.5:
+            upload.status = UploadStatus.COMPLETED.value  # Partial success still counts as completed
+        else:
+            upload.status = UploadStatus.FAILED.value
+
+        upload.rows_processed = ingestion_result.rows_processed
+        upload.rows_inserted = ingestion_result.rows_inserted
+        upload.rows_failed = ingestion_result.rows_failed
+        upload.errors = ingestion_result.to_dict()
+        db.commit()
+
+        stockouts_detected = 0
+        if upload.status == UploadStatus.COMPLETED.value and ingestion_result.rows_inserted > 0:
+            stockouts_detected = self._detect_stockouts(db, upload.id, ingestion_result.scope)
+
+        upload.errors = {
+            **ingestion_result.to_dict(),
+            "date_format": stream.result.date_format,
+            "message": self._build_message(ingestion_result, stockouts_detected),
+        }
+        db.commit()
+
+    def _report_progress(self, upload_id: UUID, result: IngestionResult):
+        """Publish running counters from a separate session."""
+        progress_db = self.session_factory()
+        try:
+            progress_db.execute(
+                update(DataUpload)
+                .where(DataUpload.id == upload_id)
+                .values(
+                    rows_processed=result.rows_processed,
+                    rows_inserted=result.rows_inserted,
+                    rows_failed=result.rows_failed,
+                )
+            )
+            progress_db.commit()
+        except Exception as e:
+            # Progress is best-effort - never fail the ingest over it
+            logger.warning(f"Failed to report progress for upload {upload_id}: {str(e)}")
+            progress_db.rollback()
+        finally:
+            progress_db.close()
+
+    def _detect_stockouts(self, db: Session, upload_id: UUID, scope: AffectedScope) -> int:
+        """Auto-save high-confidence stockouts of the upload's items; returns how many were recorded."""
+        try:
+            return PostIngestService(db).record_stockouts(scope)
+        except Exception as e:
+            # Don't fail the upload if stockout detection fails
+            db.rollback()
+            logger.warning(f"Stockout detection failed after upload {upload_id}: {str(e)}")
+            return 0
+
+    @staticmethod
+    def _build_message(result: IngestionResult, stockouts_detected: int) -> str:
+        message_parts = [
+            f"Processed {result.rows_processed} rows",
+            f"{result.rows_inserted} inserted",
+        ]
+        if result.rows_skipped_duplicate > 0:
+            message_parts.append(f"{result.rows_skipped_duplicate} duplicates skipped")
+        if result.rows_failed > 0:
+            message_parts.append(f"{result.rows_failed} failed")
+        if stockouts_detected > 0:
+            message_parts.append(f"{stockouts_detected} stockouts auto-detected")
+        return ", ".join(message_parts)
+
+
+@lru_cache
+def get_upload_job_runner() -> UploadJobRunner:
+    """Dependency returning the process-wide upload job runner."""
+    settings = get_settings()
+    if settings.UPLOAD_JOB_BACKEND == "inline":
+        backend = InlineJobBackend()
+    else:
+        backend = ThreadPoolJobBackend(max_workers=settings.UPLOAD_JOB_WORKERS)
+    return UploadJobRunner(
+        backend,
+        parse_backend=settings.CSV_PARSE_BACKEND,
+        checkpoint_rows=settings.UPLOAD_CHECKPOINT_ROWS,
+        defer_categorization=settings.CATEGORIZATION_MODE == "deferred",
+    )
@@ -10,6 +10,7 @@ from src.core.business_day import (
     get_business_date,
     time_to_offset_minutes,
     calculate_hours_open,
+    calculate_hours_open_array,
     BUSINESS_DAY_START_HOUR
 )
 
@@ -121,6 +122,14 @@ class TestCalculateHoursOpen:
         assert calculate_hours_open(time(10, 0), None) == 12.0
         assert calculate_hours_open(None, time(22, 0)) == 12.0
 
+    def test_array_matches_scalar(self):
+        """The vectorized version should agree with calculate_hours_open pair by pair."""
+        times = [None, time(4, 0), time(3, 59), time(11, 0), time(12, 30), time(20, 0), time(2, 0), time(23, 45)]
+        pairs = [(first, last) for first in times for last in times]
+
+        hours = calculate_hours_open_array([p[0] for p in pairs], [p[1] for p in pairs])
+        assert list(hours) == [calculate_hours_open(first, last) for first, last in pairs]
+
     def test_lunch_only_11am_to_3pm(self):
         """Lunch-only restaurant: 11 AM to 3 PM = 4 hours."""
         first = time(11, 0)
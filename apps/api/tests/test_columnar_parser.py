@@ -0,0 +1,97 @@
+"""
+Tests for the columnar (pandas) CSV parsing backend.
+
+The columnar backend must produce exactly what the row-at-a-time
+CSVParser produces: same rows, same values, same errors in the same order.
+"""
+import io
+
+import pytest
+
+from src.services.columnar_parser import ColumnarCSVParser, ParsedBatch
+from src.services.csv_parser import CSVParser, ParsedRow
+
+
+def parse_columnar(content: bytes, chunk_size: int = 5):
+    """Stream content through the columnar backend, collecting rows and errors."""
+    stream = ColumnarCSVParser().stream_csv(io.BytesIO(content), chunk_size=chunk_size)
+    rows, errors = [], []
+    for batch in stream:
+        assert isinstance(batch, ParsedBatch)
+        rows.extend(ParsedRow(**record._asdict()) for record in batch.parsed_rows)
+        errors.extend(batch.errors)
+    return stream, rows, errors
+
+
+class TestColumnarEquivalence:
+    """Columnar output should match CSVParser.parse_csv exactly."""
+
+    def test_matches_row_parser(self):
+        """Clean rows, vectorized edge cases and row fallbacks should all agree."""
+        content = """date,item,quantity,price,total,discount
+12/15/2024,2x Coffee,1,6.00,12.00,
+12/15/2024,Coffee x 3,1,2.00,6.00,
+12/15/2024,(4) Tea Special,1,2.00,8.00,
+invalid-date,Fries,1,5.00,5.00,
+12/15/2024,"Fish, Chips",1,12.00,12.00,1.50
+12/16/2024,Comp Burger,1,-10.00,-10.00,
+12/16/2024,  Café   Latte!! ,2.7,3.50,7.00,-2
+2024-12-16 10:00,Other Date Format,1,3.00,3.00,
+12/16/2024,Zero,1,0,0,
+12/16/2024,Exponent,1,1e1,10,
+12/16/2024,,1,1,1,
+12/16/2024,Extra Field,1,1,1,,extra
+12/16/2030,Future,1,1,1,
+12/16/2024,Negative Qty,-1,1,1,
+12/16/2024,Bad Discount,1,1,1,abc
+12/16/2024,Happy Hour Beer,1,4.00,4.00,
+""".encode("utf-8")
+
+        expected = CSVParser().parse_csv(content)
+        stream, rows, errors = parse_columnar(content)
+
+        assert rows == expected.parsed_rows
+        assert errors == expected.errors
+        assert stream.result.total_rows == expected.total_rows
+        assert stream.result.parsed_count == len(expected.parsed_rows)
+        assert stream.result.date_format == "%m/%d/%Y"
+
+    @pytest.mark.parametrize("content", [
+        # Total only: unit price derived
+        b"date,item,quantity,total\n2024-12-15,3x Tea,2,10.00\n2024-12-15,Void Tea,1,-3\n",
+        # Price only: total derived
+        b"date,item,quantity,price\n2024-12-15,Tea,3,3.33\n2024-12-15T10:00:00Z,Tea,1,1\n",
+    ])
+    def test_derived_values_match(self, content):
+        """Missing price or total columns should be derived identically."""
+        expected = CSVParser().parse_csv(content)
+        _, rows, errors = parse_columnar(content)
+
+        assert rows == expected.parsed_rows
+        assert errors == expected.errors
+
+    def test_header_errors(self):
+        """Missing columns should be reported before iteration."""
+        stream = ColumnarCSVParser().stream_csv(io.BytesIO(b"foo,bar\n1,2\n"))
+
+        assert stream.has_header_errors
+        assert list(stream) == []
+
+
+class TestParsedBatch:
+    """Tests for the columnar batch container."""
+
+    def test_batch_is_columnar(self):
+        """Clean rows should live in a DataFrame ordered by row number."""
+        content = b"date,item,quantity,price\n2024-12-15,Tea,1,2.00\nbad,Tea,1,2.00\n2024-12-15,Coffee,2,3.00\n"
+        batch = next(iter(ColumnarCSVParser().stream_csv(io.BytesIO(content))))
+
+        assert len(batch) == 2
+        assert batch.frame["row_number"].tolist() == [2, 4]
+        assert batch.frame["item_name"].tolist() == ["tea", "coffee"]
+        assert [e.row_number for e in batch.errors] == [3]
+        assert batch.parsed_rows[1].quantity == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
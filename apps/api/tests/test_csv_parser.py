@@ -4,11 +4,13 @@ Unit tests for CSV parser service.
 Tests vendor detection, column mapping, date parsing, name normalization,
 quantity extraction, and validation logic.
 """
+import io
+
 import pytest
 from datetime import datetime
 from decimal import Decimal
 
-from src.services.csv_parser import CSVParser, POSVendor, ParseResult
+from src.services.csv_parser import CSVParser, FileDateParser, POSVendor, ParseResult
 
 
 class TestVendorDetection:
@@ -248,6 +250,55 @@ class TestDateParsing:
         assert "invalid date format" in error.message.lower()
 
 
+
+class TestDateFormatInference:
+    """Test per-file date format inference and the fast path."""
+
+    def test_infer_iso(self):
+        """ISO dates should use the fromisoformat fast path."""
+        parser = CSVParser()
+        assert parser.infer_date_format(["2024-12-15", "2024-12-16 14:30:00"]) == FileDateParser.ISO
+
+    def test_infer_us_format(self):
+        """US dates should lock in a month-first strptime format."""
+        parser = CSVParser()
+        assert parser.infer_date_format(["12/15/2024 2:30 PM", "1/5/2024 11:05 AM"]) == "%m/%d/%Y %I:%M %p"
+
+    def test_infer_ignores_invalid_samples(self):
+        """Unparseable samples should not prevent inference."""
+        parser = CSVParser()
+        assert parser.infer_date_format(["", "not-a-date", "12/15/2024"]) == "%m/%d/%Y"
+
+    def test_day_first_not_locked_in(self):
+        """Day-first dates are left to dateutil so ambiguous rows keep their meaning."""
+        parser = CSVParser()
+        assert parser.infer_date_format(["15/12/2024", "20/11/2024"]) is None
+
+    def test_fallback_matches_dateutil(self):
+        """Rows that miss the locked-in format should still parse like before."""
+        dates = FileDateParser("%m/%d/%Y")
+        dt, error = dates.parse("2024-12-15 14:30", 2)
+        assert error is None
+        assert dt == datetime(2024, 12, 15, 14, 30)
+
+    def test_bounds_computed_once(self):
+        """Range checks should use the bounds fixed when the parser was created."""
+        dates = FileDateParser(FileDateParser.ISO, now=datetime(2024, 6, 1))
+        assert dates.parse("2024-05-31", 2)[1] is None
+        assert "future" in dates.parse("2024-06-02", 3)[1].message.lower()
+        assert "5 years" in dates.parse("2018-12-31", 4)[1].message.lower()
+
+    def test_parse_result_reports_format(self):
+        """The detected format should be exposed on ParseResult."""
+        parser = CSVParser()
+        csv_content = b"""date,item,quantity,price
+12/15/2024,Coffee,1,3.00
+12/16/2024,Tea,1,2.50
+"""
+        result = parser.parse_csv(csv_content)
+        assert result.date_format == "%m/%d/%Y"
+        assert result.parsed_rows[1].date == datetime(2024, 12, 16)
+
 class TestEncodingDetection:
     """Test file encoding detection."""
 
@@ -440,5 +491,192 @@ invalid-date,Invalid1,1,10.00
         assert result.success_rate == 0.5  # 2/4 = 50%
 
 
+class TestStreamingParse:
+    """Tests for the chunked streaming parser."""
+
+    def test_stream_yields_bounded_chunks(self):
+        """Rows and errors should arrive in chunks no larger than chunk_size."""
+        parser = CSVParser()
+        lines = ["date,item,quantity,price"]
+        for i in range(25):
+            lines.append(f"2024-12-15,Item{i},1,10.00")
+        lines.append("invalid-date,Broken,1,10.00")
+        content = "\n".join(lines).encode("utf-8")
+
+        stream = parser.stream_csv(io.BytesIO(content), chunk_size=10)
+        chunks = list(stream)
+
+        assert [len(c.parsed_rows) + len(c.errors) for c in chunks] == [10, 10, 6]
+        assert stream.result.total_rows == 26
+        assert stream.result.parsed_count == 25
+        assert stream.result.error_count == 1
+        # Streaming keeps only counters on the result
+        assert stream.result.parsed_rows == []
+        assert stream.result.success_rate == 25 / 26
+
+    def test_stream_matches_parse_csv(self):
+        """Streaming and in-memory parsing should produce the same rows."""
+        parser = CSVParser()
+        csv_content = b"""date,item,quantity,price,total
+2024-12-15,2x Coffee,1,6.00,12.00
+invalid-date,Fries,1,5.00,5.00
+2024-12-15,"Fish, Chips",1,12.00,12.00
+"""
+        expected = parser.parse_csv(csv_content)
+
+        stream = parser.stream_csv(io.BytesIO(csv_content), chunk_size=1)
+        rows, errors = [], []
+        for chunk in stream:
+            rows.extend(chunk.parsed_rows)
+            errors.extend(chunk.errors)
+
+        assert rows == expected.parsed_rows
+        assert errors == expected.errors
+        assert stream.result.vendor == expected.vendor
+
+    def test_stream_quoted_newline(self):
+        """Records with quoted newlines should survive incremental decoding."""
+        parser = CSVParser()
+        csv_content = 'date,item,quantity,price\n2024-12-15,"Café\nSpecial",1,4.00\n'.encode("utf-8")
+
+        stream = parser.stream_csv(io.BytesIO(csv_content))
+        rows = [row for chunk in stream for row in chunk.parsed_rows]
+
+        assert len(rows) == 1
+        assert rows[0].raw_item_name == "Café\nSpecial"
+
+    def test_stream_utf8_after_ascii_head(self):
+        """UTF-8 names past an all-ASCII encoding sample should decode intact."""
+        parser = CSVParser()
+        filler = "2024-12-15,Burger,1,10.00\n" * (parser.ENCODING_SAMPLE_BYTES // 20)
+        csv_content = ("date,item,quantity,price\n" + filler + "2024-12-15,Jalapeño Poppers,1,6.00\n").encode("utf-8")
+
+        stream = parser.stream_csv(io.BytesIO(csv_content))
+        rows = [row for chunk in stream for row in chunk.parsed_rows]
+
+        assert stream.result.encoding == "utf-8"
+        assert rows[-1].raw_item_name == "Jalapeño Poppers"
+
+    def test_stream_falls_back_for_non_utf8(self):
+        """Files that are not valid UTF-8 should decode with a single-byte encoding, not replacement characters."""
+        parser = CSVParser()
+        csv_content = "date,item,quantity,price\n2024-12-15,Café,1,4.00\n".encode("iso-8859-1")
+
+        rows = [row for chunk in parser.stream_csv(io.BytesIO(csv_content)) for row in chunk.parsed_rows]
+
+        assert "�" not in rows[0].raw_item_name
+        assert rows[0].raw_item_name.startswith("Caf")
+
+    def test_stream_header_errors_available_before_iteration(self):
+        """Missing columns should be reported as soon as the stream opens."""
+        parser = CSVParser()
+        file_obj = io.BytesIO(b"foo,bar,baz\n1,2,3\n")
+
+        stream = parser.stream_csv(file_obj)
+
+        assert stream.has_header_errors
+        assert list(stream) == []
+        # The caller's file object is left open
+        assert not file_obj.closed
+
+
+
+class TestParallelParse:
+    """Tests for process-pool parsing (parse_csv with workers > 1)."""
+
+    def test_parallel_matches_serial(self):
+        """Chunked parallel parsing should keep row numbers and error order."""
+        parser = CSVParser()
+        parser.PARALLEL_CHUNK_SIZE = 4
+        lines = ["date,item,quantity,price"]
+        for i in range(30):
+            if i % 7 == 3:
+                lines.append(f"invalid-date,Broken{i},1,10.00")
+            elif i % 5 == 0:
+                lines.append(f'2024-12-15,"Special\n{i}",1,4.00')
+            else:
+                lines.append(f"2024-12-15,Item{i},2,10.00")
+            if i == 12:
+                lines.append("")  # Blank lines are skipped, not numbered
+        content = "\n".join(lines).encode("utf-8")
+
+        serial = parser.parse_csv(content)
+        parallel = parser.parse_csv(content, workers=2)
+
+        assert parallel.parsed_rows == serial.parsed_rows
+        assert parallel.errors == serial.errors
+        assert parallel.total_rows == serial.total_rows == 30
+        assert parallel.success_rate == serial.success_rate
+        assert parallel.parsed_rows[-1].row_number == 31
+
+    def test_single_slice_parses_in_process(self):
+        """A file that fits one slice should be parsed by the parser itself, with its own cache."""
+        parser = CSVParser()
+        content = b"date,item,quantity,price\n2024-12-15,Burger,1,10.00\n2024-12-15,Burger,1,10.00\n"
+
+        result = parser.parse_csv(content, workers=4)
+
+        assert len(result.parsed_rows) == 2
+        assert parser.item_name_cache_info().misses == 1
+        assert parser.item_name_cache_info().hits == result.item_name_cache_hits == 1
+
+    def test_parallel_header_errors(self):
+        """Missing columns should be reported without starting workers."""
+        parser = CSVParser()
+
+        result = parser.parse_csv(b"foo,bar,baz\n1,2,3\n", workers=4)
+
+        assert result.total_rows == 0
+        assert result.errors[0].field == "headers"
+
+
+class TestItemNameCache:
+    """Tests for the memoized item name resolution."""
+
+    def test_repeated_names_hit_cache(self):
+        """Each distinct raw name should be resolved once per parse."""
+        parser = CSVParser()
+        lines = ["date,item,quantity,price"]
+        for i in range(30):
+            lines.append(f"2024-12-15,{['2x Coffee', 'Burger', 'Fries'][i % 3]},1,4.00")
+        content = "\n".join(lines).encode("utf-8")
+
+        result = parser.parse_csv(content)
+
+        assert result.item_name_cache_misses == 3
+        assert result.item_name_cache_hits == 27
+        assert result.parsed_rows[0].quantity == 2
+        assert result.parsed_rows[0].item_name == "coffee"
+        assert "Extracted quantity 2 from item name" in result.parsed_rows[3].warnings
+
+    def test_stream_reports_cache_stats_per_chunk(self):
+        """Chunk stats should add up to the stream result's totals."""
+        parser = CSVParser()
+        lines = ["date,item,quantity,price"]
+        for i in range(20):
+            lines.append(f"2024-12-15,Item{i % 4},1,4.00")
+        content = "\n".join(lines).encode("utf-8")
+
+        stream = parser.stream_csv(io.BytesIO(content), chunk_size=5)
+        chunks = list(stream)
+
+        assert [c.item_name_cache_misses for c in chunks] == [4, 0, 0, 0]
+        assert sum(c.item_name_cache_hits for c in chunks) == stream.result.item_name_cache_hits == 16
+
+    def test_cache_is_bounded(self):
+        """The cache should never hold more than ITEM_NAME_CACHE_SIZE names."""
+        class SmallCacheParser(CSVParser):
+            ITEM_NAME_CACHE_SIZE = 2
+
+        parser = SmallCacheParser()
+        for name in ["A", "B", "C", "A"]:
+            parser.resolve_item_name(name)
+
+        info = parser.item_name_cache_info()
+        assert info.currsize == 2
+        assert info.misses == 4
+        assert parser.resolve_item_name("3x Latte") == (3, "Latte", "latte")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -1,7 +1,9 @@
 """
 Tests for data upload endpoints.
 """
+import hashlib
 import io
+from datetime import datetime, timedelta
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -10,6 +12,7 @@ from src.models.user import User
 from src.models.restaurant import Restaurant
 from src.models.data_upload import DataUpload
 from src.models.transaction import Transaction, TransactionItem
+from src.services.upload_jobs import ThreadPoolJobBackend, UploadJobRunner
 
 
 class TestUpload:
@@ -188,6 +191,34 @@ class TestGetUploadStatus:
         assert data["id"] == upload_id
         assert "status" in data
 
+    def test_get_upload_status_reports_counters(
+        self,
+        client: TestClient,
+        auth_headers_with_restaurant: dict
+    ):
+        """Test that polling returns the progress counters and final message."""
+        csv_content = """date,menu_item,quantity,unit_price,total
+2024-01-15,Paella,2,18.50,37.00
+2024-01-15,Sangria,4,6.00,24.00
+invalid-date,Tapas,3,12.00,36.00"""
+        files = {"file": ("test_data.csv", io.BytesIO(csv_content.encode()), "text/csv")}
+        upload_id = client.post(
+            "/api/data/upload",
+            headers=auth_headers_with_restaurant,
+            files=files
+        ).json()["upload_id"]
+
+        data = client.get(
+            f"/api/data/uploads/{upload_id}",
+            headers=auth_headers_with_restaurant
+        ).json()
+
+        assert data["status"] == "COMPLETED"
+        assert data["rows_processed"] == 2
+        assert data["rows_inserted"] == 2
+        assert data["rows_failed"] == 1
+        assert "2 inserted" in data["message"]
+
     def test_get_nonexistent_upload(
         self,
         client: TestClient,
@@ -201,3 +232,187 @@ class TestGetUploadStatus:
         )
 
         assert response.status_code == 404
+
+
+class TestResumeUpload:
+    """Tests for POST /api/data/uploads/{id}/resume."""
+
+    CSV_CONTENT = """date,menu_item,quantity,unit_price,total
+2024-01-15,Paella,2,18.50,37.00
+2024-01-16,Tapas,3,12.00,36.00"""
+
+    def test_resume_failed_upload(
+        self,
+        client: TestClient,
+        auth_headers_with_restaurant: dict,
+        test_user_with_restaurant,
+        db: Session
+    ):
+        """Test that a failed upload can be resumed with the same file."""
+        _, restaurant = test_user_with_restaurant
+        upload = DataUpload(restaurant_id=restaurant.id, status="FAILED")
+        db.add(upload)
+        db.commit()
+
+        files = {"file": ("test_data.csv", io.BytesIO(self.CSV_CONTENT.encode()), "text/csv")}
+        response = client.post(
+            f"/api/data/uploads/{upload.id}/resume",
+            headers=auth_headers_with_restaurant,
+            files=files
+        )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "COMPLETED"
+
+        data = client.get(
+            f"/api/data/uploads/{upload.id}",
+            headers=auth_headers_with_restaurant
+        ).json()
+        assert data["rows_inserted"] == 2
+        assert data["checkpoint_row"] == 3
+
+    def test_new_upload_of_partially_ingested_file_conflicts(
+        self,
+        client: TestClient,
+        auth_headers_with_restaurant: dict,
+        test_user_with_restaurant,
+        db: Session
+    ):
+        """Test that re-uploading a checkpointed file points at the upload to resume."""
+        _, restaurant = test_user_with_restaurant
+        content = self.CSV_CONTENT.encode()
+        upload = DataUpload(
+            restaurant_id=restaurant.id,
+            status="FAILED",
+            file_hash=hashlib.sha256(content).hexdigest(),
+            checkpoint_row=2,
+        )
+        db.add(upload)
+        db.commit()
+
+        files = {"file": ("test_data.csv", io.BytesIO(content), "text/csv")}
+        response = client.post(
+            "/api/data/upload",
+            headers=auth_headers_with_restaurant,
+            files=files
+        )
+
+        assert response.status_code == 409
+        assert str(upload.id) in response.json()["detail"]
+
+    def test_resume_completed_upload_rejected(
+        self,
+        client: TestClient,
+        auth_headers_with_restaurant: dict,
+        test_user_with_restaurant,
+        db: Session
+    ):
+        """Test that completed uploads cannot be resumed."""
+        _, restaurant = test_user_with_restaurant
+        upload = DataUpload(restaurant_id=restaurant.id, status="COMPLETED")
+        db.add(upload)
+        db.commit()
+
+        files = {"file": ("test_data.csv", io.BytesIO(self.CSV_CONTENT.encode()), "text/csv")}
+        response = client.post(
+            f"/api/data/uploads/{upload.id}/resume",
+            headers=auth_headers_with_restaurant,
+            files=files
+        )
+
+        assert response.status_code == 409
+
+    def test_resume_live_processing_upload_rejected(
+        self,
+        client: TestClient,
+        auth_headers_with_restaurant: dict,
+        test_user_with_restaurant,
+        db: Session
+    ):
+        """Test that an upload whose job is still reporting progress cannot be resumed."""
+        _, restaurant = test_user_with_restaurant
+        upload = DataUpload(restaurant_id=restaurant.id, status="PROCESSING", updated_at=datetime.now())
+        db.add(upload)
+        db.commit()
+
+        files = {"file": ("test_data.csv", io.BytesIO(self.CSV_CONTENT.encode()), "text/csv")}
+        response = client.post(
+            f"/api/data/uploads/{upload.id}/resume",
+            headers=auth_headers_with_restaurant,
+            files=files
+        )
+
+        assert response.status_code == 409
+        db.refresh(upload)
+        assert upload.status == "PROCESSING"
+
+    def test_resume_stale_processing_upload(
+        self,
+        client: TestClient,
+        auth_headers_with_restaurant: dict,
+        test_user_with_restaurant,
+        db: Session
+    ):
+        """Test that a processing upload whose job stopped reporting progress can be resumed."""
+        _, restaurant = test_user_with_restaurant
+        upload = DataUpload(
+            restaurant_id=restaurant.id,
+            status="PROCESSING",
+            updated_at=datetime.now() - timedelta(days=1)
+        )
+        db.add(upload)
+        db.commit()
+
+        files = {"file": ("test_data.csv", io.BytesIO(self.CSV_CONTENT.encode()), "text/csv")}
+        response = client.post(
+            f"/api/data/uploads/{upload.id}/resume",
+            headers=auth_headers_with_restaurant,
+            files=files
+        )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "COMPLETED"
+
+
+class TestUploadJobRunner:
+    """Tests for background processing of spooled uploads."""
+
+    def test_thread_backend_processes_upload(
+        self,
+        db: Session,
+        test_user_with_restaurant,
+        tmp_path
+    ):
+        """Test that a threaded job ingests the file, reports progress and removes the spool."""
+        _, restaurant = test_user_with_restaurant
+        upload = DataUpload(restaurant_id=restaurant.id, status="PENDING")
+        db.add(upload)
+        db.commit()
+
+        csv_path = tmp_path / "upload.csv"
+        csv_path.write_text(
+            "date,menu_item,quantity,unit_price,total\n"
+            "2024-01-15,Paella,2,18.50,37.00\n"
+            "2024-01-16,Tapas,3,12.00,36.00\n"
+        )
+
+        progress = []
+        runner = UploadJobRunner(ThreadPoolJobBackend(max_workers=1))
+        report_progress = runner._report_progress
+        runner._report_progress = lambda upload_id, result: (
+            progress.append(result.rows_processed), report_progress(upload_id, result)
+        )
+        try:
+            final_status = runner.submit(upload.id, restaurant.id, str(csv_path)).result(timeout=60)
+        finally:
+            runner.backend.shutdown()
+
+        assert final_status.value == "COMPLETED"
+        assert progress == [2]
+        assert not csv_path.exists()
+
+        db.refresh(upload)
+        assert upload.status == "COMPLETED"
+        assert upload.rows_processed == 2
+        assert upload.rows_inserted == 2
+        assert upload.file_hash is not None
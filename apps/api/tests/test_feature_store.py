@@ -0,0 +1,142 @@
+"""
+Tests for the feature store and incremental training frame refreshes.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.models.inventory import InventorySnapshot
+from src.models.menu import MenuItem
+from src.models.transaction import Transaction, TransactionItem
+from src.services.daily_sales import DailySalesRollupService
+from src.services.feature_store import FeatureStore, Watermark
+from src.services.features import SALES_COLUMNS, FEATURE_CONTEXT_DAYS, FeatureEngineeringService
+
+
+def _sales(start: date, days: int, seed: int = 3) -> pd.DataFrame:
+    """Daily sales rows of one item with gaps, stockouts and promos."""
+    rng = np.random.default_rng(seed)
+    rows = [
+        (
+            start + timedelta(days=offset), "Burger", float(rng.poisson(12)),
+            bool(rng.random() < 0.15), bool(rng.random() < 0.1), None, None
+        )
+        for offset in range(days)
+        if rng.random() > 0.1
+    ]
+    return pd.DataFrame(rows, columns=SALES_COLUMNS)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = FeatureStore(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    service = FeatureEngineeringService(db=None, store=store)
+    frame = service._build_features(_sales(date(2024, 1, 1), 120))
+    restaurant_id = uuid4()
+    watermark = Watermark(sales_updated_at=datetime(2024, 5, 1, 12, 30), snapshots_updated_at=None)
+
+    assert store.load(restaurant_id, "Burger") is None
+    store.save(restaurant_id, "Burger", frame, watermark)
+
+    loaded, loaded_mark = store.load(restaurant_id, "Burger")
+    assert loaded_mark == watermark
+    pd.testing.assert_frame_equal(
+        loaded.drop(columns=["item_name", "first_order", "last_order"]),
+        frame.drop(columns=["item_name", "first_order", "last_order"]),
+        check_freq=False
+    )
+
+
+def test_eviction_keeps_size_bound(tmp_path):
+    service = FeatureEngineeringService(db=None, store=FeatureStore(str(tmp_path), max_bytes=10 ** 9))
+    frame = service._build_features(_sales(date(2024, 1, 1), 200))
+
+    probe = FeatureStore(str(tmp_path / "probe"), max_bytes=10 ** 9)
+    probe.save(uuid4(), "Burger", frame, Watermark())
+    frame_bytes = probe.total_bytes
+
+    store = FeatureStore(str(tmp_path / "bounded"), max_bytes=int(frame_bytes * 2.5))
+    restaurant_id = uuid4()
+    for name in ["A", "B", "C"]:
+        store.save(restaurant_id, name, frame, Watermark())
+
+    assert store.total_bytes <= store.max_bytes
+    assert store.stats.evictions == 1
+    assert store.load(restaurant_id, "A") is None
+    assert store.load(restaurant_id, "C") is not None
+
+
+@pytest.mark.parametrize("changed_offset", [FEATURE_CONTEXT_DAYS + 20, 150, 199, 230])
+def test_extend_features_matches_full_build(tmp_path, changed_offset):
+    """Rebuilding only the changed tail should equal building the whole history."""
+    start = date(2024, 1, 1)
+    full_sales = _sales(start, 240)
+    changed_from = start + timedelta(days=changed_offset)
+    flagged = {start + timedelta(days=160), start + timedelta(days=20)}
+
+    service = FeatureEngineeringService(db=None, store=FeatureStore(str(tmp_path), max_bytes=10 ** 9))
+    expected = service._build_features(full_sales.copy(), flagged)
+
+    # The stored frame only saw sales before the change
+    cached = service._build_features(full_sales[full_sales["date"] < changed_from].copy(), flagged)
+    new_sales = full_sales[full_sales["date"] >= changed_from].copy()
+    new_flags = {d for d in flagged if d >= changed_from}
+
+    extended = service._extend_features(cached, new_sales, new_flags, changed_from)
+    pd.testing.assert_frame_equal(
+        extended.drop(columns="item_name"),
+        expected.drop(columns="item_name"),
+        check_freq=False
+    )
+
+
+def test_stockout_flag_edit_refreshes_stored_frame(db, test_user_with_restaurant, tmp_path):
+    """Flipping an existing snapshot's stockout flag should not serve the stale frame."""
+    _, restaurant = test_user_with_restaurant
+    menu_item = MenuItem(restaurant_id=restaurant.id, name="Burger", price=Decimal("10.00"), is_active=True)
+    db.add(menu_item)
+
+    start = date.today() - timedelta(days=60)
+    for offset in range(60):
+        tx = Transaction(
+            restaurant_id=restaurant.id,
+            transaction_date=start + timedelta(days=offset),
+            total_amount=Decimal("100.00")
+        )
+        db.add(tx)
+        db.flush()
+        db.add(TransactionItem(
+            transaction_id=tx.id,
+            restaurant_id=restaurant.id,
+            business_date=tx.transaction_date,
+            menu_item_name="Burger",
+            quantity=4 if offset == 50 else 10,
+            unit_price=Decimal("10.00"),
+            total=Decimal("100.00")
+        ))
+    db.flush()
+    flagged_day = start + timedelta(days=50)
+    snapshot = InventorySnapshot(
+        restaurant_id=restaurant.id, menu_item_id=menu_item.id, date=flagged_day, stockout_flag='N'
+    )
+    db.add(snapshot)
+    db.commit()
+    DailySalesRollupService(db).refresh(restaurant.id)
+    db.commit()
+
+    service = FeatureEngineeringService(db, store=FeatureStore(str(tmp_path), max_bytes=10 ** 9))
+    before = service.create_training_dataset(restaurant.id, menu_item.id, days_history=90)
+    assert not before.loc[pd.Timestamp(flagged_day), "stockout"]
+
+    snapshot.stockout_flag = 'Y'
+    db.commit()
+
+    after = service.create_training_dataset(restaurant.id, menu_item.id, days_history=90)
+    assert service.store.stats.hits == 0
+    assert after.loc[pd.Timestamp(flagged_day), "stockout"]
+    assert after.loc[pd.Timestamp(flagged_day), "adjusted_quantity"] == 10.0
@@ -7,7 +7,13 @@ import pandas as pd
 import numpy as np
 
 from src.models.transaction import Transaction, TransactionItem
-from src.services.features import FeatureEngineeringService
+from src.services.daily_sales import DailySalesRollupService
+from src.services.features import (
+    SALES_COLUMNS,
+    FeatureEngineeringService,
+    _impute_stockout_demand_iterative,
+    impute_stockout_demand,
+)
 
 def test_create_training_dataset(db, test_user_with_restaurant):
     """Verify feature generation and unconstraining logic."""
@@ -40,6 +46,8 @@ def test_create_training_dataset(db, test_user_with_restaurant):
 
         item = TransactionItem(
             transaction_id=tx.id,
+            restaurant_id=tx.restaurant_id,
+            business_date=tx.transaction_date,
             menu_item_name=item_name,
             quantity=qty,
             unit_price=Decimal("10.00"),
@@ -48,6 +56,8 @@ def test_create_training_dataset(db, test_user_with_restaurant):
         db.add(item)
 
     db.commit()
+    DailySalesRollupService(db).refresh(test_restaurant.id)
+    db.commit()
 
     # Execute
     service = FeatureEngineeringService(db)
@@ -102,6 +112,8 @@ def test_create_training_dataset_long_history(db, test_user_with_restaurant):
         db.flush()
         item = TransactionItem(
             transaction_id=tx.id,
+            restaurant_id=tx.restaurant_id,
+            business_date=tx.transaction_date,
             menu_item_name=item_name,
             quantity=qty,
             unit_price=Decimal("10"),
@@ -109,6 +121,8 @@ def test_create_training_dataset_long_history(db, test_user_with_restaurant):
         )
         db.add(item)
     db.commit()
+    DailySalesRollupService(db).refresh(test_restaurant.id)
+    db.commit()
 
     service = FeatureEngineeringService(db)
     df = service.create_training_dataset(
@@ -117,3 +131,52 @@ def test_create_training_dataset_long_history(db, test_user_with_restaurant):
     )
     assert not df.empty
     assert len(df) >= 10
+
+
+@pytest.mark.parametrize("stockout_rate", [0.0, 0.05, 0.3, 0.9])
+def test_vectorized_imputation_matches_iterative(stockout_rate):
+    """The one-pass imputation should reproduce the per-day loop exactly."""
+    rng = np.random.default_rng(7)
+    for _ in range(5):
+        days = int(rng.integers(1, 200))
+        index = pd.date_range("2024-01-01", periods=days, freq="D")
+        df = pd.DataFrame({
+            "quantity": rng.poisson(8, size=days).astype(float),
+            "stockout": rng.random(days) < stockout_rate,
+        }, index=index)
+
+        pd.testing.assert_series_equal(
+            impute_stockout_demand(df),
+            _impute_stockout_demand_iterative(df),
+            check_names=False
+        )
+
+
+
+def test_panel_features_match_per_item_build():
+    """The panel builder should give each item exactly its _build_features frame."""
+    rng = np.random.default_rng(11)
+    rows = []
+    for item_name in ["Burger", "Fries", "Salad"]:
+        start = date(2024, 1, 1) + timedelta(days=int(rng.integers(0, 20)))
+        # Gaps in the sales dates exercise the per-item reindexing
+        for offset in sorted(rng.choice(120, size=90, replace=False)):
+            rows.append((
+                start + timedelta(days=int(offset)), item_name, float(rng.poisson(10)),
+                bool(rng.random() < 0.15), bool(rng.random() < 0.1), None, None
+            ))
+    sales = pd.DataFrame(rows, columns=SALES_COLUMNS)
+    flagged = {"Fries": {date(2024, 3, 1), date(2024, 3, 2)}}
+
+    service = FeatureEngineeringService(db=None)
+    panel = service._build_panel_features(sales, flagged)
+
+    assert list(panel.index.names) == ["item_name", "date"]
+    for item_name, item_sales in sales.groupby("item_name"):
+        expected = service._build_features(item_sales.copy(), flagged.get(item_name))
+        pd.testing.assert_frame_equal(
+            panel.xs(item_name, level="item_name"),
+            expected.drop(columns="item_name"),
+            check_names=False,
+            check_freq=False
+        )
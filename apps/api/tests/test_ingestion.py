@@ -4,8 +4,10 @@ Integration tests for transaction ingestion service.
 Tests file-level and row-level deduplication, batch processing,
 error handling, and large CSV uploads.
 """
+import io
+
 import pytest
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from uuid import uuid4
 
@@ -14,11 +16,18 @@ from sqlalchemy.orm import sessionmaker
 
 from src.models.data_upload import DataUpload
 from src.models.ingestion_log import IngestionLog
+from src.models.promotion import Promotion
 from src.models.restaurant import Restaurant
-from src.models.transaction import Transaction, TransactionItem
+from src.models.transaction import DailyItemSales, Transaction, TransactionItem
 from src.models.user import User
+from src.services.columnar_parser import ColumnarCSVParser
 from src.services.csv_parser import CSVParser
+from src.services.daily_sales import DailySalesRollupService
+from src.services.data_health import DataHealthService
 from src.services.ingestion import TransactionIngestionService
+from src.services.post_ingest import AffectedScope, PostIngestService
+from src.services.promotion_detection import PromotionDetectionService
+from src.services.stockout_detection import StockoutDetectionService
 from src.core.config import get_settings
 
 settings = get_settings()
@@ -284,6 +293,38 @@ class TestRowDeduplication:
         assert result2.rows_inserted == 1  # Only Fries is new
         assert result2.rows_skipped_duplicate == 1  # Burger duplicate
 
+    @pytest.mark.parametrize("bulk_insert", [True, False])
+    def test_cross_file_duplicates_logged(self, db_session, test_restaurant, bulk_insert):
+        """Rows rejected by the hash index should be counted and logged per row."""
+        parser = CSVParser()
+        service = TransactionIngestionService(db_session, bulk_insert=bulk_insert)
+
+        first = b"date,item,quantity,unit_price,total\n2024-12-15,Burger,1,10.00,10.00\n"
+        second = first + b"2024-12-15,Fries,1,5.00,5.00\n2024-12-15,Burger,1,10.00,10.00\n"
+
+        uploads = []
+        for content in (first, second):
+            upload = DataUpload(restaurant_id=test_restaurant.id, status="PROCESSING")
+            db_session.add(upload)
+            db_session.commit()
+            uploads.append(upload)
+            result = service.ingest_transactions(
+                restaurant_id=test_restaurant.id,
+                upload_id=upload.id,
+                parse_result=parser.parse_csv(content),
+                file_bytes=content
+            )
+
+        assert result.rows_processed == 3
+        assert result.rows_inserted == 1
+        assert result.rows_skipped_duplicate == 2
+
+        logs = db_session.query(IngestionLog).filter(
+            IngestionLog.upload_id == uploads[1].id
+        ).all()
+        assert sorted(log.row_number for log in logs) == [2, 4]
+        assert all(log.message == "Duplicate row detected" for log in logs)
+
 
 class TestErrorHandling:
     """Test error logging and handling."""
@@ -376,5 +417,410 @@ class TestLargeCSVProcessing:
         assert transaction_count == 28  # 28 days of transactions
 
 
+class TestStreamingIngestion:
+    """Test chunked ingestion from a streaming parse."""
+
+    def test_ingest_stream_across_chunks(self, db_session, test_restaurant):
+        """Dates and duplicates spanning chunks should behave like a single batch."""
+        csv_content = b"""date,item,quantity,unit_price,total
+2024-12-15 11:00,Burger,1,10.00,10.00
+2024-12-15 12:00,Fries,1,5.00,5.00
+2024-12-15 11:00,Burger,1,10.00,10.00
+2024-12-16 09:00,Burger,1,10.00,10.00
+invalid-date,Soda,1,3.00,3.00
+"""
+        upload = DataUpload(restaurant_id=test_restaurant.id, status="PROCESSING")
+        db_session.add(upload)
+        db_session.commit()
+        db_session.refresh(upload)
+
+        service = TransactionIngestionService(db_session)
+        file_obj = io.BytesIO(csv_content)
+        file_hash = service.compute_stream_hash(file_obj)
+        assert file_hash == service.compute_file_hash(csv_content)
+
+        stream = CSVParser().stream_csv(file_obj, chunk_size=2)
+        result = service.ingest_stream(
+            restaurant_id=test_restaurant.id,
+            upload_id=upload.id,
+            stream=stream,
+            file_hash=file_hash
+        )
+
+        assert result.rows_processed == 4
+        assert result.rows_inserted == 3
+        assert result.rows_skipped_duplicate == 1
+        assert result.rows_failed == 1
+
+        transactions = db_session.query(Transaction).filter(
+            Transaction.restaurant_id == test_restaurant.id
+        ).order_by(Transaction.transaction_date).all()
+
+        # One transaction per business date even though 12-15 spans two chunks
+        assert len(transactions) == 2
+        # Skipped duplicates still count toward the daily total, as in ingest_transactions
+        assert transactions[0].total_amount == Decimal("25.00")
+        assert str(transactions[0].first_order_time) == "11:00:00"
+        assert str(transactions[0].last_order_time) == "12:00:00"
+
+
+class TestIngestionBackends:
+    """Bulk INSERT and ORM fallback backends should store the same data."""
+
+    @pytest.mark.parametrize("parser_cls", [CSVParser, ColumnarCSVParser])
+    @pytest.mark.parametrize("bulk_insert", [True, False])
+    def test_backends_store_same_rows(self, db_session, test_restaurant, bulk_insert, parser_cls):
+        """Both write backends and both parse backends should produce identical transactions and items."""
+        csv_content = b"""date,item,quantity,unit_price,total
+2024-12-15 11:00,Burger,2,10.00,20.00
+2024-12-15 23:30,Fries,1,5.00,5.00
+2024-12-16 01:30,Soda,1,3.00,3.00
+2024-12-16 12:00,Burger,1,10.00,10.00
+"""
+        upload = DataUpload(restaurant_id=test_restaurant.id, status="PROCESSING")
+        db_session.add(upload)
+        db_session.commit()
+        db_session.refresh(upload)
+
+        service = TransactionIngestionService(db_session, bulk_insert=bulk_insert)
+        stream = parser_cls().stream_csv(io.BytesIO(csv_content), chunk_size=3)
+        result = service.ingest_stream(
+            restaurant_id=test_restaurant.id,
+            upload_id=upload.id,
+            stream=stream,
+            file_hash=service.compute_file_hash(csv_content)
+        )
+
+        assert result.rows_inserted == 4
+
+        transactions = db_session.query(Transaction).filter(
+            Transaction.restaurant_id == test_restaurant.id
+        ).order_by(Transaction.transaction_date).all()
+
+        # 01:30 on the 16th belongs to the 15th business day
+        assert [t.total_amount for t in transactions] == [Decimal("28.00"), Decimal("10.00")]
+        assert str(transactions[0].first_order_time) == "11:00:00"
+        assert str(transactions[0].last_order_time) == "01:30:00"
+        assert all(t.upload_id == upload.id for t in transactions)
+
+        items = db_session.query(TransactionItem).filter(
+            TransactionItem.transaction_id.in_([t.id for t in transactions])
+        ).all()
+        assert sorted(i.menu_item_name for i in items) == ["burger", "burger", "fries", "soda"]
+        assert all(i.source_hash for i in items)
+
+        # Denormalized filter columns match the parent transaction
+        by_id = {t.id: t for t in transactions}
+        assert all(i.restaurant_id == test_restaurant.id for i in items)
+        assert all(i.business_date == by_id[i.transaction_id].transaction_date for i in items)
+
+        # Every row is linked to the menu item its name resolved to
+        linked = {(i.menu_item_name, i.menu_item_id) for i in items}
+        assert len(linked) == 3 and all(menu_item_id for _, menu_item_id in linked)
+
+
+class TestCheckpointedIngestion:
+    """Checkpoint commits and resuming a failed streaming ingest."""
+
+    @pytest.mark.parametrize("parser_cls", [CSVParser, ColumnarCSVParser])
+    @pytest.mark.parametrize("bulk_insert", [True, False])
+    def test_resume_after_failure(self, db_session, test_restaurant, bulk_insert, parser_cls):
+        """A resumed ingest should store exactly what an uninterrupted one would."""
+        lines = ["date,item,quantity,unit_price,total"]
+        for i in range(20):
+            lines.append(f"2024-12-{15 + i // 8} {10 + i % 8}:00,Item{i % 6},1,{i + 1}.00,{i + 1}.00")
+        lines.insert(8, "invalid-date,Broken,1,3.00,3.00")
+        lines.append("2024-12-15 10:00,Item0,1,1.00,1.00")  # Duplicate of the first row
+        csv_content = "\n".join(lines).encode("utf-8")
+
+        upload = DataUpload(restaurant_id=test_restaurant.id, status="PROCESSING")
+        db_session.add(upload)
+        db_session.commit()
+        db_session.refresh(upload)
+
+        service = TransactionIngestionService(db_session, bulk_insert=bulk_insert)
+        file_hash = service.compute_file_hash(csv_content)
+
+        chunks_seen = []
+
+        def fail_on_third_chunk(result):
+            chunks_seen.append(result.rows_processed)
+            if len(chunks_seen) == 3:
+                raise RuntimeError("connection lost")
+
+        # Checkpoints after chunks 2 and 4; the failure loses chunk 3
+        with pytest.raises(RuntimeError):
+            service.ingest_stream(
+                restaurant_id=test_restaurant.id,
+                upload_id=upload.id,
+                stream=parser_cls().stream_csv(io.BytesIO(csv_content), chunk_size=5),
+                file_hash=file_hash,
+                on_progress=fail_on_third_chunk,
+                checkpoint_rows=10
+            )
+        db_session.rollback()
+
+        db_session.refresh(upload)
+        assert upload.checkpoint_row == 11
+        assert upload.checkpoint["rows_processed"] == 9
+        assert upload.checkpoint["rows_failed"] == 1
+        assert upload.file_hash == file_hash
+
+        result = TransactionIngestionService(db_session, bulk_insert=bulk_insert).ingest_stream(
+            restaurant_id=test_restaurant.id,
+            upload_id=upload.id,
+            stream=parser_cls().stream_csv(io.BytesIO(csv_content), chunk_size=5),
+            file_hash=file_hash,
+            checkpoint_rows=10,
+            resume=True
+        )
+
+        assert result.rows_processed == 21
+        assert result.rows_inserted == 20
+        assert result.rows_skipped_duplicate == 1
+        assert result.rows_failed == 1
+
+        db_session.refresh(upload)
+        assert upload.checkpoint_row == 23
+
+        # The scope covers rows committed before the failure too
+        assert result.scope.item_names == {f"item{i}" for i in range(6)}
+        assert sorted(d.day for d in result.scope.business_dates) == [15, 16, 17]
+
+        transactions = db_session.query(Transaction).filter(
+            Transaction.restaurant_id == test_restaurant.id
+        ).order_by(Transaction.transaction_date).all()
+
+        # Dates that span the checkpoint still map to a single transaction
+        assert [t.transaction_date.day for t in transactions] == [15, 16, 17]
+        assert [t.total_amount for t in transactions] == [Decimal("37.00"), Decimal("100.00"), Decimal("74.00")]
+        assert str(transactions[1].first_order_time) == "10:00:00"
+        assert str(transactions[1].last_order_time) == "17:00:00"
+
+        items = db_session.query(TransactionItem).filter(
+            TransactionItem.restaurant_id == test_restaurant.id
+        ).count()
+        assert items == 20
+
+        failures = db_session.query(IngestionLog).filter(
+            IngestionLog.upload_id == upload.id,
+            IngestionLog.severity == "error"
+        ).count()
+        assert failures == 1
+
+        db_session.query(IngestionLog).filter(IngestionLog.upload_id == upload.id).delete()
+        db_session.commit()
+
+
+class TestIncrementalPostIngest:
+    """Post-ingest analytics limited to the items and dates an upload wrote."""
+
+    def _ingest(self, db_session, restaurant, csv_content: bytes):
+        upload = DataUpload(restaurant_id=restaurant.id, status="PROCESSING")
+        db_session.add(upload)
+        db_session.commit()
+        db_session.refresh(upload)
+
+        return TransactionIngestionService(db_session).ingest_transactions(
+            restaurant_id=restaurant.id,
+            upload_id=upload.id,
+            parse_result=CSVParser().parse_csv(csv_content),
+            file_bytes=csv_content
+        )
+
+    def test_health_date_stats_match_full_scan(self, db_session, test_restaurant):
+        """Carried-forward date stats should equal a full transaction scan."""
+        self._ingest(db_session, test_restaurant, b"""date,item,quantity,unit_price,total
+2024-12-01,Burger,1,10.00,10.00
+2024-12-02,Burger,1,10.00,10.00
+2024-12-05,Fries,1,5.00,5.00
+""")
+        # Overlaps 12-05 from the first upload, extends both ends of the range
+        result = self._ingest(db_session, test_restaurant, b"""date,item,quantity,unit_price,total
+2024-11-28,Soda,1,3.00,3.00
+2024-12-05,Soda,1,3.00,3.00
+2024-12-09,Soda,1,3.00,3.00
+""")
+
+        assert result.scope.item_names == {"soda"}
+        assert len(result.scope.business_dates) == 3
+
+        health_service = DataHealthService(db_session)
+        score = health_service.get_latest_score(test_restaurant.id)
+        min_date, max_date, active_days = health_service._get_date_stats(test_restaurant.id)
+
+        assert score.component_breakdown["date_stats"] == {
+            "min_date": min_date.isoformat(),
+            "max_date": max_date.isoformat(),
+            "active_days": active_days,
+        }
+        assert active_days == 5
+        assert score.component_breakdown["completeness"]["days_of_history"] == 11
+
+    def test_promotions_only_for_affected_items(self, db_session, test_restaurant, monkeypatch):
+        """Flagged periods should span uploads, and untouched items are not revisited."""
+        monkeypatch.setattr(PromotionDetectionService, "FLAGGED_CONTEXT_DAYS", 2)
+
+        lines = ["date,item,quantity,unit_price,total,discount"]
+        for day in range(1, 11):
+            lines.append(f"2024-11-{day:02d} 12:00,Burger,1,8.00,8.00,2.00")
+        lines.append("2024-11-20 12:00,Fries,1,4.00,4.00,1.00")
+        self._ingest(db_session, test_restaurant, "\n".join(lines).encode("utf-8"))
+
+        # Forget what the first upload detected
+        db_session.query(Promotion).filter(Promotion.restaurant_id == test_restaurant.id).delete()
+        db_session.commit()
+
+        # Continues the Burger period (within the 2-day gap tolerance)
+        self._ingest(db_session, test_restaurant, b"""date,item,quantity,unit_price,total,discount
+2024-11-12 12:00,Burger,1,8.00,8.00,2.00
+2024-11-13 12:00,Burger,1,8.00,8.00,2.00
+""")
+
+        promotions = db_session.query(Promotion).filter(
+            Promotion.restaurant_id == test_restaurant.id
+        ).all()
+
+        # The window was widened back to the period's true start
+        assert [(p.name, p.start_date.day, p.end_date.day) for p in promotions] == [
+            ("burger - Detected Promotion", 1, 13)
+        ]
+
+    def test_stockouts_skip_dates_outside_window(self, db_session, test_restaurant):
+        """Uploads of old history should not trigger stockout detection."""
+        scope = AffectedScope(
+            test_restaurant.id, uuid4(), {"burger"}, {date.today() - timedelta(days=365)}
+        )
+        post_ingest = PostIngestService(db_session)
+
+        calls = []
+        original = StockoutDetectionService.detect_likely_stockouts
+        StockoutDetectionService.detect_likely_stockouts = lambda self, *a, **kw: calls.append(kw) or []
+        try:
+            assert post_ingest.record_stockouts(scope) == 0
+            assert calls == []
+
+            scope.add("fries", date.today())
+            assert post_ingest.record_stockouts(scope) == 0
+            assert calls[0]["item_names"] == {"burger", "fries"}
+        finally:
+            StockoutDetectionService.detect_likely_stockouts = original
+
+
+class TestDailySalesRollup:
+    """daily_item_sales maintained by ingestion."""
+
+    def _ingest(self, db_session, restaurant, csv_content: bytes):
+        upload = DataUpload(restaurant_id=restaurant.id, status="PROCESSING")
+        db_session.add(upload)
+        db_session.commit()
+        db_session.refresh(upload)
+
+        return TransactionIngestionService(db_session).ingest_transactions(
+            restaurant_id=restaurant.id,
+            upload_id=upload.id,
+            parse_result=CSVParser().parse_csv(csv_content),
+            file_bytes=csv_content
+        )
+
+    def _rollup(self, db_session, restaurant):
+        rows = db_session.query(DailyItemSales).filter(
+            DailyItemSales.restaurant_id == restaurant.id
+        ).all()
+        return {(r.business_date.day, r.menu_item_name): r for r in rows}
+
+    def test_rollup_updated_across_uploads(self, db_session, test_restaurant):
+        """A later upload on the same date should merge into the date's rows."""
+        self._ingest(db_session, test_restaurant, b"""date,item,quantity,unit_price,total
+2024-12-15 12:00,Burger,2,10.00,20.00
+2024-12-15 13:00,Burger,1,12.00,12.00
+2024-12-15 13:30,Fries,1,5.00,5.00
+2024-12-16 12:00,Fries,3,5.00,15.00
+""")
+        self._ingest(db_session, test_restaurant, b"""date,item,quantity,unit_price,total,discount
+2024-12-15 19:00,Burger,1,8.00,8.00,2.00
+""")
+
+        rollup = self._rollup(db_session, test_restaurant)
+        assert set(rollup) == {(15, "burger"), (15, "fries"), (16, "fries")}
+
+        burger = rollup[(15, "burger")]
+        assert burger.quantity == 4
+        assert burger.revenue == Decimal("40.00")
+        assert burger.line_count == 3
+        assert burger.avg_price == Decimal("10.0000")
+        assert (burger.min_price, burger.max_price) == (Decimal("8.00"), Decimal("12.00"))
+        assert str(burger.first_order_time) == "12:00:00"
+        assert str(burger.last_order_time) == "19:00:00"
+
+        # Flags come from the transactions the item was sold in
+        assert burger.is_promo
+        assert not rollup[(15, "fries")].is_promo
+
+        assert DailySalesRollupService(db_session).check_consistency(test_restaurant.id) == []
+
+    def test_rollup_order_times_across_midnight(self, db_session, test_restaurant):
+        """First/last order times of a date should follow the 4 AM business day across uploads."""
+        self._ingest(db_session, test_restaurant, b"""date,item,quantity,unit_price,total
+2024-12-15 11:00,Burger,1,10.00,10.00
+2024-12-15 22:00,Burger,1,10.00,10.00
+""")
+        self._ingest(db_session, test_restaurant, b"""date,item,quantity,unit_price,total
+2024-12-16 01:30,Burger,1,10.00,10.00
+""")
+
+        burger = self._rollup(db_session, test_restaurant)[(15, "burger")]
+        assert str(burger.first_order_time) == "11:00:00"
+        assert str(burger.last_order_time) == "01:30:00"
+
+        assert DailySalesRollupService(db_session).check_consistency(test_restaurant.id) == []
+
+    def test_weekly_sales(self, db_session, test_restaurant):
+        """Weekly totals should group Monday-based weeks per item."""
+        # 2024-12-15 is a Sunday; 12-16 and 12-18 fall in the next week
+        self._ingest(db_session, test_restaurant, b"""date,item,quantity,unit_price,total
+2024-12-15 12:00,Burger,2,10.00,20.00
+2024-12-16 12:00,Burger,1,10.00,10.00
+2024-12-18 12:00,Burger,3,10.00,30.00
+2024-12-18 13:00,Fries,1,5.00,5.00
+""")
+
+        rows = DailySalesRollupService(db_session).weekly_sales(test_restaurant.id)
+        assert [(r.menu_item_name, r.week_start.day, r.quantity, r.active_days) for r in rows] == [
+            ("burger", 9, 2, 1),
+            ("burger", 16, 4, 2),
+            ("fries", 16, 1, 1),
+        ]
+        assert rows[1].revenue == Decimal("40.00")
+
+        rows = DailySalesRollupService(db_session).weekly_sales(
+            test_restaurant.id, start_date=date(2024, 12, 17), item_names=["burger"]
+        )
+        assert [(r.menu_item_name, r.week_start.day) for r in rows] == [("burger", 16)]
+
+    def test_consistency_check_and_repair(self, db_session, test_restaurant):
+        """The checker should report drifted rows and refresh should fix them."""
+        self._ingest(db_session, test_restaurant, b"""date,item,quantity,unit_price,total
+2024-12-15 12:00,Burger,2,10.00,20.00
+2024-12-16 12:00,Fries,3,5.00,15.00
+""")
+        rollup = self._rollup(db_session, test_restaurant)
+        rollup[(15, "burger")].quantity = 7
+        db_session.delete(rollup[(16, "fries")])
+        db_session.commit()
+
+        service = DailySalesRollupService(db_session)
+        mismatches = service.check_consistency(test_restaurant.id)
+        assert [(m.business_date.day, m.menu_item_name, m.field) for m in mismatches] == [
+            (15, "burger", "quantity"),
+            (16, "fries", "row"),
+        ]
+        assert mismatches[0].expected == 2 and mismatches[0].actual == 7
+
+        service.refresh(test_restaurant.id, business_dates={m.business_date for m in mismatches})
+        db_session.commit()
+        assert service.check_consistency(test_restaurant.id) == []
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
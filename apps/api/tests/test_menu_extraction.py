@@ -8,14 +8,21 @@ from datetime import datetime
 from decimal import Decimal
 from uuid import uuid4
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
-from src.models.menu import MenuItem, MenuItemPriceHistory
+from src.models.forecast import CategoryProfile
+from src.models.menu import MenuCategorizationCache, MenuItem, MenuItemPriceHistory
 from src.models.restaurant import Restaurant
 from src.models.user import User
-from src.services.menu_categorization import MenuCategorizationService, CATEGORY_TAXONOMY
-from src.services.menu_extraction import MenuItemExtractionService
+from src.services import category_profiles
+from src.services.category_profiles import CategoryProfileService
+from src.services.menu_categorization import (
+    CATEGORY_TAXONOMY,
+    FakeCategorizationClient,
+    MenuCategorizationService,
+)
+from src.services.menu_extraction import MenuItemExtractionService, MenuItemResolver, PriceHistoryBuilder
 from src.core.config import get_settings
 
 settings = get_settings()
@@ -287,6 +294,247 @@ class TestPriceHistory:
         ).count()
         assert history_count == 1
 
+    def test_batched_price_history_matches_per_row(self, db_session, test_restaurant):
+        """PriceHistoryBuilder should leave the same history as detect_price_change per row."""
+        service = MenuItemExtractionService(db_session, categorization_service=MenuCategorizationService(api_key=None))
+        # Happy-hour style alternating prices, with same-day flip-flops
+        observations = [
+            (1, "5.00"), (1, "4.00"), (1, "5.00"), (1, "5.00"), (2, "5.00"), (2, "4.00"),
+            (3, "4.00"), (3, "4.00"), (3, "6.00"), (5, "5.00"), (5, "4.00"), (5, "5.00"),
+        ]
+
+        def make_item(name):
+            item, _, _ = service.get_or_create_item(
+                restaurant_id=test_restaurant.id,
+                item_name=name,
+                price=Decimal("5.00"),
+                transaction_date=datetime(2024, 11, 30, 12, 0, 0),
+                use_categorization=False
+            )
+            # Pre-existing entry inside the batch's date range
+            db_session.add(MenuItemPriceHistory(
+                menu_item_id=item.id, price=Decimal("4.50"), effective_date=datetime(2024, 12, 3).date(), source="manual"
+            ))
+            db_session.flush()
+            return item
+
+        per_row_item = make_item("Margarita")
+        per_row_changes = sum(
+            service.detect_price_change(per_row_item, Decimal(price), datetime(2024, 12, day, 17, 0, 0))
+            for day, price in observations
+        )
+
+        batched_item = make_item("Mojito")
+        builder = PriceHistoryBuilder(db_session)
+        for day, price in observations:
+            builder.add(batched_item, Decimal(price), datetime(2024, 12, day, 17, 0, 0))
+        batched_changes = builder.flush()
+
+        def history(item):
+            return sorted(
+                (h.effective_date, h.price) for h in db_session.query(MenuItemPriceHistory).filter(
+                    MenuItemPriceHistory.menu_item_id == item.id
+                )
+            )
+
+        assert batched_changes == per_row_changes
+        assert batched_item.price == per_row_item.price
+        assert history(batched_item) == history(per_row_item)
+
+
+class TestMenuItemResolver:
+    """Test the in-memory resolver used for bulk extraction."""
+
+    NAMES = ["Caesar Salad", "caesar salad", "Caeser Salad Special", "Salad Caesar", "Ribeye", "Burger"]
+
+    def _add_items(self, db_session, restaurant_id):
+        for name, active in [("Caesar Salad", True), ("Caesar Salad Special", True), ("Burger Deluxe", False)]:
+            db_session.add(MenuItem(restaurant_id=restaurant_id, name=name, price=Decimal("9.00"), is_active=active))
+        db_session.commit()
+
+    def test_resolver_matches_find_existing_item(self, db_session, test_restaurant):
+        """Single and batch resolution should agree with the per-name query path."""
+        self._add_items(db_session, test_restaurant.id)
+        service = MenuItemExtractionService(db_session, categorization_service=MenuCategorizationService(api_key=None))
+
+        expected = {name: service.find_existing_item(test_restaurant.id, name) for name in self.NAMES}
+
+        assert service.get_resolver(test_restaurant.id).resolve_many(self.NAMES) == expected
+        fresh = MenuItemResolver.load(db_session, test_restaurant.id, service.FUZZY_MATCH_THRESHOLD)
+        assert {name: fresh.resolve(name) for name in self.NAMES} == expected
+
+    def test_extract_queries_menu_once(self, db_session, test_restaurant):
+        """Bulk extraction should not query menu items per row."""
+        self._add_items(db_session, test_restaurant.id)
+        service = MenuItemExtractionService(db_session, categorization_service=MenuCategorizationService(api_key=None))
+        items_data = [
+            {"name": name, "price": Decimal("9.00"), "transaction_date": datetime(2024, 12, 1 + i % 20, 12, 0)}
+            for i, name in enumerate(self.NAMES * 50)
+        ]
+
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", record)
+        try:
+            menu_items_map = service.extract_items_from_transaction_data(test_restaurant.id, items_data)
+            menu_items_map2 = service.extract_items_from_transaction_data(test_restaurant.id, items_data)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", record)
+
+        menu_selects = [st for st in statements if st.lstrip().startswith("SELECT") and "FROM menu_items" in st]
+        assert len(menu_selects) == 1
+        assert menu_items_map == menu_items_map2
+
+        # New names are created once; later variants match the created item
+        assert menu_items_map["Caesar Salad"].id == menu_items_map["caesar salad"].id
+        assert menu_items_map["Ribeye"].auto_created is True
+        assert menu_items_map["Burger"].auto_created is True
+        assert menu_items_map["Ribeye"].first_seen == datetime(2024, 12, 5, 12, 0)
+        assert menu_items_map["Ribeye"].last_seen == datetime(2024, 12, 19, 12, 0)
+        assert db_session.query(MenuItem).filter(MenuItem.restaurant_id == test_restaurant.id).count() == 5
+
+    def test_created_items_become_candidates(self, db_session, test_restaurant):
+        """A misspelled name should match an item created earlier in the batch."""
+        service = MenuItemExtractionService(db_session, categorization_service=MenuCategorizationService(api_key=None))
+        items_data = [
+            {"name": name, "price": Decimal("10.00"), "transaction_date": datetime(2024, 12, 1, 12, 0)}
+            for name in ["Caesar Salad Special", "Caeser Salad Special"]
+        ]
+
+        menu_items_map = service.extract_items_from_transaction_data(test_restaurant.id, items_data)
+
+        assert menu_items_map["Caesar Salad Special"].id == menu_items_map["Caeser Salad Special"].id
+
+
+class TestConcurrentCategorization:
+    """Test batched, cached categorization with the offline fake client."""
+
+    @pytest.fixture
+    def tag(self, db_session):
+        """Unique name suffix; cache entries with it are removed afterwards."""
+        tag = uuid4().hex[:8]
+        yield tag
+        db_session.rollback()
+        db_session.query(MenuCategorizationCache).filter(
+            MenuCategorizationCache.normalized_name.like(f"%{tag}")
+        ).delete(synchronize_session=False)
+        db_session.commit()
+
+    def test_batch_is_concurrent_and_deduplicated(self):
+        """Distinct names should be requested once each, in parallel, up to the bound."""
+        client = FakeCategorizationClient(latency=0.05)
+        service = MenuCategorizationService(client=client, max_concurrency=4)
+        names = [f"Burger {i}" for i in range(10)] + [f"burger  {i}" for i in range(10)]
+
+        results = service.categorize_batch(names)
+
+        assert client.calls == 10
+        assert 1 < client.max_in_flight <= 4
+        assert [r[0] for r in results] == names
+        assert results[0][1:] == results[10][1:]
+        assert results[0][1] == "Entrees > Beef > Burger 0"
+
+    def test_rate_limits_are_retried(self):
+        """Rate limit errors should be retried with backoff until the call succeeds."""
+        client = FakeCategorizationClient(rate_limited_calls=2)
+        service = MenuCategorizationService(client=client, max_retries=3)
+        service.RETRY_BASE_DELAY = 0
+
+        category_path, confidence, _ = service.categorize_item("Iced Latte")
+
+        assert client.calls == 3
+        assert category_path == "Beverages > Coffee/Tea > Iced Latte"
+        assert confidence == 0.8
+
+    def test_retries_exhausted_returns_fallback(self):
+        """A call that keeps failing should fall back without caching the failure."""
+        client = FakeCategorizationClient(rate_limited_calls=10)
+        service = MenuCategorizationService(client=client, max_retries=1)
+        service.RETRY_BASE_DELAY = 0
+
+        category_path, confidence, reasoning = service.categorize_item("Iced Latte")
+
+        assert client.calls == 2
+        assert category_path is None
+        assert confidence == 0.0
+        assert "Categorization failed" in reasoning
+        assert service.lookup_cached(["Iced Latte"]) == {}
+
+    def test_persistent_cache_is_shared(self, db_session, tag):
+        """Categorizations stored by one service should be reused by another without API calls."""
+        first = MenuCategorizationService(client=FakeCategorizationClient(), db=db_session)
+        first.categorize_batch([f"Ribeye Steak {tag}", f"Tiramisu {tag}"])
+        db_session.commit()
+
+        client = FakeCategorizationClient()
+        second = MenuCategorizationService(client=client, db=db_session)
+        results = second.categorize_batch([f"RIBEYE steak {tag}", f"Tiramisu {tag}"])
+
+        assert client.calls == 0
+        assert results[0][1] == f"Entrees > Beef > Ribeye Steak {tag.title()}"
+        assert results[1][2] == 0.8
+
+    def test_inline_extraction_categorizes_new_items(self, db_session, test_restaurant, tag):
+        """New items in a batch should be categorized with one request per distinct name."""
+        client = FakeCategorizationClient()
+        service = MenuItemExtractionService(
+            db_session,
+            categorization_service=MenuCategorizationService(client=client, db=db_session),
+            categorization_mode="inline"
+        )
+        items_data = [
+            {"name": name, "price": Decimal("9.00"), "transaction_date": datetime(2024, 12, 1, 12, 0)}
+            for name in [f"Chicken Wings {tag}", f"Lemonade {tag}", f"Chicken Wings {tag}"]
+        ]
+
+        menu_items_map = service.extract_items_from_transaction_data(test_restaurant.id, items_data)
+
+        assert client.calls == 2
+        assert menu_items_map[f"Chicken Wings {tag}"].category_path.startswith("Entrees > Chicken")
+        assert menu_items_map[f"Lemonade {tag}"].confidence_score == Decimal("0.80")
+
+    def test_deferred_mode_fills_in_later(self, db_session, test_restaurant, tag):
+        """Deferred mode should create items uncategorized and let the background pass categorize them."""
+        client = FakeCategorizationClient()
+        service = MenuItemExtractionService(
+            db_session,
+            categorization_service=MenuCategorizationService(client=client, db=db_session),
+            categorization_mode="deferred"
+        )
+        items_data = [
+            {"name": f"Salmon Fillet {tag}", "price": Decimal("21.00"), "transaction_date": datetime(2024, 12, 1, 12, 0)}
+        ]
+
+        item = service.extract_items_from_transaction_data(test_restaurant.id, items_data)[f"Salmon Fillet {tag}"]
+        db_session.commit()
+
+        assert client.calls == 0
+        assert item.category_path is None
+
+        assert service.categorize_pending_items(test_restaurant.id) == 1
+        db_session.refresh(item)
+        assert item.category_path.startswith("Entrees > Seafood")
+
+    def test_deferred_pass_invalidates_category_profiles(self, db_session, test_restaurant, tag):
+        """Categorizing items should drop the restaurant's stored and in-memory category profiles."""
+        service = MenuItemExtractionService(
+            db_session,
+            categorization_service=MenuCategorizationService(client=FakeCategorizationClient(), db=db_session),
+            categorization_mode="deferred"
+        )
+        service.extract_items_from_transaction_data(test_restaurant.id, [
+            {"name": f"Tiramisu {tag}", "price": Decimal("8.00"), "transaction_date": datetime(2024, 12, 1, 12, 0)}
+        ])
+        CategoryProfileService(db_session).get(test_restaurant.id, "Global")
+        db_session.commit()
+        assert db_session.get(CategoryProfile, (test_restaurant.id, "Global")) is not None
+
+        assert service.categorize_pending_items(test_restaurant.id) == 1
+
+        assert db_session.get(CategoryProfile, (test_restaurant.id, "Global")) is None
+        assert (test_restaurant.id, "Global", 90) not in category_profiles._memory
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -107,3 +107,76 @@ def test_promotion_detection_negative_price(db, test_user_with_restaurant):
     tx = db.query(Transaction).filter(Transaction.upload_id == upload.id).first()
     assert tx.is_promo is True
     assert tx.discount_amount == Decimal("5.00"), "Should capture absolute value of negative total as discount"
+
+
+def _detection_rows(count):
+    """Synthetic parsed rows covering every detection method."""
+    names = ["Burger", "Lunch Special", "Happy Hour Beer", "Promotion Combo", "Fries", "Comp Dessert"]
+    rows = []
+    for i in range(count):
+        price = Decimal("-4.00") if i % 11 == 0 else Decimal("8.00")
+        rows.append(ParsedRow(
+            row_number=i + 2,
+            date=datetime(2024, 12, 15),
+            item_name=names[i % len(names)].lower(),
+            raw_item_name=names[i % len(names)],
+            quantity=1,
+            unit_price=price,
+            total=price,
+            discount_amount=Decimal("1.50") if i % 13 == 0 else None,
+        ))
+    return rows
+
+
+def test_match_keywords_reports_overlapping_keywords():
+    """The compiled matcher should report every keyword, including overlaps."""
+    from src.services.promotion_detection import PromotionDetectionService
+    service = PromotionDetectionService(db=None)
+
+    assert service.match_keywords("Weekend PROMOTION") == ["promo", "promotion"]
+    assert service.match_keywords("Burger") == []
+
+
+def test_detect_discounts_matches_single_item_detection():
+    """Batch detection should agree with detect_discount_in_item row by row."""
+    from src.services.promotion_detection import PromotionDetectionService
+    service = PromotionDetectionService(db=None)
+    rows = _detection_rows(200)
+
+    batch = service.detect_discounts(rows)
+    single = [
+        service.detect_discount_in_item(
+            item_name=row.raw_item_name,
+            unit_price=row.unit_price,
+            total=row.total,
+            discount_amount=row.discount_amount
+        )
+        for row in rows
+    ]
+
+    assert batch == single
+    assert {d.discount_type for d in batch} == {"explicit", "comp_void", "keyword", "none"}
+
+
+
+def test_csv_parser_classifies_chunks_with_batch_detection(monkeypatch):
+    """Streamed chunks should go through detect_discounts, not per-row detection."""
+    import io
+    from src.services.csv_parser import CSVParser
+    from src.services.promotion_detection import PromotionDetectionService
+
+    def per_row(*args, **kwargs):
+        raise AssertionError("parser should classify whole chunks")
+    monkeypatch.setattr(PromotionDetectionService, "detect_discount_in_item", per_row)
+
+    content = b"""date,item,quantity,price,total,discount
+12/15/2024,Burger,1,8.00,8.00,
+12/15/2024,Burger,1,8.00,8.00,1.50
+12/15/2024,Comp Burger,1,-8.00,-8.00,
+12/15/2024,Happy Hour Beer,1,4.00,4.00,
+"""
+    rows = [row for chunk in CSVParser().stream_csv(io.BytesIO(content), chunk_size=3) for row in chunk.parsed_rows]
+
+    assert [row.promotion_type for row in rows] == ["none", "explicit", "comp_void", "keyword"]
+    assert [row.discount_amount for row in rows] == [None, Decimal("1.50"), Decimal("8.00"), None]
+    assert [row.is_promotion for row in rows] == [False, True, True, True]
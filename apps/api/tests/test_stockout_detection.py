@@ -9,6 +9,7 @@ from uuid import uuid4
 from src.models.data_upload import DataUpload
 from src.models.menu import MenuItem
 from src.models.transaction import Transaction, TransactionItem
+from src.services.daily_sales import DailySalesRollupService
 from src.services.stockout_detection import StockoutDetectionService, StockoutDetectionResult
 
 
@@ -33,6 +34,8 @@ class TestVelocityCalculation:
 
             item = TransactionItem(
                 transaction_id=tx.id,
+                restaurant_id=tx.restaurant_id,
+                business_date=tx.transaction_date,
                 menu_item_name="Velocity Test Item",
                 quantity=2,
                 unit_price=Decimal("10.00"),
@@ -40,6 +43,8 @@ class TestVelocityCalculation:
             )
             db.add(item)
         db.commit()
+        DailySalesRollupService(db).refresh(test_restaurant.id)
+        db.commit()
 
         service = StockoutDetectionService(db)
         velocity, active_days = service.calculate_item_velocity(
@@ -71,6 +76,8 @@ class TestStockoutDetection:
 
             item = TransactionItem(
                 transaction_id=tx.id,
+                restaurant_id=tx.restaurant_id,
+                business_date=tx.transaction_date,
                 menu_item_name="High Velocity Item",
                 quantity=5,
                 unit_price=Decimal("10.00"),
@@ -79,6 +86,8 @@ class TestStockoutDetection:
             db.add(item)
 
         db.commit()
+        DailySalesRollupService(db).refresh(test_restaurant.id)
+        db.commit()
 
         service = StockoutDetectionService(db)
 
@@ -114,6 +123,8 @@ class TestStockoutDetection:
 
             item = TransactionItem(
                 transaction_id=tx.id,
+                restaurant_id=tx.restaurant_id,
+                business_date=tx.transaction_date,
                 menu_item_name="Low Velocity Specialty",
                 quantity=1,
                 unit_price=Decimal("30.00"),
@@ -121,6 +132,8 @@ class TestStockoutDetection:
             )
             db.add(item)
         db.commit()
+        DailySalesRollupService(db).refresh(test_restaurant.id)
+        db.commit()
 
         service = StockoutDetectionService(db)
         results = service.detect_likely_stockouts(test_restaurant.id, days_to_analyze=30)